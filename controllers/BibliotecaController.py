@@ -1,45 +1,208 @@
-from PyQt6 import QtWidgets, QtCore, QtGui
+from collections import deque
+
+from PyQt6 import QtWidgets, QtCore
 
 from utils.Biblioteca import Biblioteca
+from utils.BibliotecaCache import BibliotecaCache
+from utils.LyricsSearchIndex import LyricsSearchIndex
+from threads.LibraryScanThread import LibraryScanThread
+from controllers.BibliotecaModel import BibliotecaModel
 
 class BibliotecaController:
-    def __init__(self, ui, parent=None, verbose: bool = True):
+    def __init__(self, ui, parent=None, verbose: bool = True, scan_workers: int = 4, scan_mode: str = "hilos",
+                 header_only_scan: bool = True, compact_storage: bool = False, fuzzy_filter: bool = False,
+                 restore_roots: bool = True):
         self.ui = ui
         self.parent = parent or ui
         self.verbose = verbose
+        # Workers para extraer metadatos en paralelo ("hilos" para discos/red, "procesos" si domina la CPU)
+        self.scan_workers = scan_workers
+        self.scan_mode = scan_mode
+        # Escaneo sólo de cabeceras: las letras se leen al abrir la canción (Song.timeline diferido)
+        self.header_only_scan = header_only_scan
 
-        self.biblioteca = Biblioteca()
-        self.model = QtGui.QStandardItemModel()
+        # compact_storage: almacén columnar de canciones para bibliotecas muy grandes
+        cache = self._abrir_cache()
+        self.biblioteca = Biblioteca(cache=cache, compacta=compact_storage, indice=self._abrir_indice(cache))
+        # Modelo virtual: el texto de cada fila se genera sólo al pintarla; también aplica el filtro
+        self.model = BibliotecaModel(self.biblioteca, fuzzy=fuzzy_filter)
+        self.scan_thread = None
+        self.scan_root = None
+        # Carpetas raíz a escanear cuando termine el escaneo en curso
+        self._pending_roots = deque()
 
         self.ui.listViewBiblioteca.setModel(self.model)
+        # Todas las filas miden lo mismo: la vista no tiene que medir cada una
+        self.ui.listViewBiblioteca.setUniformItemSizes(True)
         self.ui.pushButtonAgregarBiblioteca.clicked.connect(self.on_add_library)
+        if hasattr(self.ui, 'lineEditBuscarBiblioteca'):
+            self.ui.lineEditBuscarBiblioteca.textChanged.connect(self.on_filter_changed)
+
+        self.ui.listViewBiblioteca.setContextMenuPolicy(QtCore.Qt.ContextMenuPolicy.CustomContextMenu)
+        self.ui.listViewBiblioteca.customContextMenuRequested.connect(self.on_library_context_menu)
+
+        if hasattr(self.ui, 'pushButtonCancelarEscaneo'):
+            self.ui.pushButtonCancelarEscaneo.clicked.connect(self.on_cancel_scan)
+        self._set_scanning(False)
+
+        if restore_roots:
+            # Volver a cargar las carpetas de la sesión anterior (el cache evita reparsear)
+            for root in self.biblioteca.raices_guardadas():
+                self.start_scan(root)
+
+    def _abrir_cache(self):
+        """Abre el cache persistente de la biblioteca; si falla se trabaja sólo en memoria."""
+        try:
+            return BibliotecaCache()
+        except Exception as e:
+            if self.verbose:
+                print(f"No se pudo abrir el cache de la biblioteca: {e}")
+            return None
+
+    def _abrir_indice(self, cache):
+        """Índice de búsqueda en letras, persistido junto al cache de la biblioteca."""
+        path = LyricsSearchIndex.ruta_junto_a(cache.db_path) if cache is not None else None
+        indice = LyricsSearchIndex(path)
+        indice.cargar()
+        return indice
+
+    def save_index(self):
+        """Guarda el índice de letras si cambió (p. ej. tras guardar letras o al cerrar)."""
+        indice = self.biblioteca.indice
+        if indice is not None and indice.modificado:
+            try:
+                indice.guardar()
+            except Exception as e:
+                print(f"Error al guardar el índice de letras: {e}")
+
+    def search_lyrics(self, query: str, limit: int = 100):
+        """Busca en las letras de la biblioteca; devuelve [(ResultadoBusqueda, Song), ...]."""
+        return self.biblioteca.buscar_letras(query, limit)
 
     def on_add_library(self):
         folder = QtWidgets.QFileDialog.getExistingDirectory(self.parent, "Seleccionar carpeta de música")
         if not folder:
             return
-        count = self.biblioteca.cargar_desde_carpeta(folder, recursive=True, verbose=self.verbose)
-        self._update_view()
+        self.start_scan(folder)
+
+    def start_scan(self, folder_path: str) -> bool:
+        """Añade `folder_path` como carpeta raíz y la escanea en segundo plano sin descartar las
+        demás; la lista se va llenando con cada lote. Si ya hay un escaneo se encola."""
+        if self.scan_thread is not None:
+            self._pending_roots.append(folder_path)
+            if self.verbose:
+                print(f"Escaneo de {folder_path} en cola.")
+            return True
+        root = self.biblioteca.registrar_raiz(folder_path)
+        if root is None:
+            return False
+        self.scan_root = root
+
+        self.scan_thread = LibraryScanThread(self.biblioteca, root, recursive=True,
+                                             workers=self.scan_workers, modo=self.scan_mode,
+                                             header_only=self.header_only_scan, verbose=self.verbose)
+        self.scan_thread.batchReady.connect(self._on_scan_batch)
+        self.scan_thread.progressUpdated.connect(self._on_scan_progress)
+        self.scan_thread.scanFinished.connect(self._on_scan_finished)
+        self._set_scanning(True)
+        self.scan_thread.start()
+        return True
+
+    def _start_next_scan(self) -> bool:
+        while self._pending_roots:
+            if self.start_scan(self._pending_roots.popleft()):
+                return True
+        return False
+
+    def on_cancel_scan(self):
+        self._pending_roots.clear()
+        if self.scan_thread is not None:
+            self.scan_thread.cancel()
+
+    def stop_scan(self):
+        """Cancela y espera el escaneo en curso (p. ej. al cerrar la ventana)."""
+        self._pending_roots.clear()
+        if self.scan_thread is not None:
+            self.scan_thread.stop()
+
+    def remove_root(self, folder_path: str) -> int:
+        """Quita una carpeta raíz y sus canciones de la lista (las de otras raíces se conservan)."""
+        if self.scan_thread is not None and self.scan_root == self.biblioteca.buscar_raiz(folder_path):
+            self.scan_thread.stop()
+        keys = self.biblioteca.quitar_raiz(folder_path)
+        self.model.remove_songs(keys)
+        if self.verbose:
+            print(f"Carpeta quitada: {folder_path} ({len(keys)} canciones)")
+        return len(keys)
+
+    def on_library_context_menu(self, pos):
+        if not self.biblioteca.raices:
+            return
+        view = self.ui.listViewBiblioteca
+        menu = QtWidgets.QMenu(view)
+        for root in self.biblioteca.raices:
+            action = menu.addAction(f"Quitar carpeta: {root}")
+            action.triggered.connect(lambda _=False, r=root: self.remove_root(r))
+        menu.exec(view.viewport().mapToGlobal(pos))
+
+    def _set_scanning(self, scanning: bool):
+        if hasattr(self.ui, 'progressBarBiblioteca'):
+            bar = self.ui.progressBarBiblioteca
+            bar.setVisible(scanning)
+            if scanning:
+                bar.setRange(0, 0)  # indeterminada hasta conocer el total de archivos
+                bar.setValue(0)
+        if hasattr(self.ui, 'pushButtonCancelarEscaneo'):
+            self.ui.pushButtonCancelarEscaneo.setVisible(scanning)
+            self.ui.pushButtonAgregarBiblioteca.setVisible(not scanning)
+
+    def _on_scan_batch(self, lote: list):
+        if self.scan_root not in self.biblioteca.raices:
+            return  # lotes pendientes de una carpeta que se acaba de quitar
+        agregadas = self.biblioteca.agregar_canciones(lote, raiz=self.scan_root)
+        if agregadas:
+            # Una sola inserción por lote: una señal rowsInserted en vez de una por canción
+            self.model.append_songs(agregadas)
+
+    def on_filter_changed(self, text: str):
+        """Filtra la lista con cada pulsación (cada carácter añadido sólo revisa las coincidencias previas)."""
+        self.model.set_filter_text(text)
+
+    def refresh_song(self, song):
+        """Actualiza la fila de una canción modificada sin reiniciar la lista."""
+        key = getattr(song, "file_path", None)
+        if key:
+            self.model.update_song(key, song)
+
+    def _on_scan_progress(self, done: int, total: int):
+        if hasattr(self.ui, 'progressBarBiblioteca'):
+            bar = self.ui.progressBarBiblioteca
+            if bar.maximum() != total:
+                bar.setRange(0, max(0, total))
+            bar.setValue(done)
+
+    def _on_scan_finished(self, count: int, cancelled: bool):
+        thread = self.scan_thread
+        self.scan_thread = None
+        self.scan_root = None
+        if thread is not None:
+            thread.wait()
+            thread.deleteLater()
+        self._set_scanning(False)
         if self.verbose:
-            print(f"{count} canciones cargadas.")
+            estado = " (escaneo cancelado)" if cancelled else ""
+            print(f"{count} canciones cargadas{estado}.")
+        self._start_next_scan()
 
     def populate_from_folder(self, folder_path: str):
-        count = self.biblioteca.cargar_desde_carpeta(folder_path, recursive=True, verbose=self.verbose)
+        count = self.biblioteca.agregar_raiz(folder_path, recursive=True, verbose=self.verbose,
+                                             workers=self.scan_workers, modo=self.scan_mode,
+                                             solo_cabeceras=self.header_only_scan)
         self._update_view()
         return count
 
     def _update_view(self):
-        self.model.clear()
-        for key, song in self.biblioteca.songs.items():
-            title = getattr(song, "title", "") or ""
-            artist = getattr(song, "artist", "") or ""
-            if title or artist:
-                text = f"{title} - {artist}".strip(" -")
-            else:
-                text = getattr(song, "file_path", "<sin ruta>")
-            item = QtGui.QStandardItem(text)
-            item.setData(key, QtCore.Qt.ItemDataRole.UserRole)
-            self.model.appendRow(item)
+        self.model.reset_songs(list(self.biblioteca.songs.items()))
 
     def get_selected_song(self):
         sel = self.ui.listViewBiblioteca.selectedIndexes()
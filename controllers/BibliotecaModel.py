@@ -0,0 +1,197 @@
+from bisect import bisect_left
+from typing import Iterable, List, Optional, Tuple
+
+from PyQt6 import QtCore
+
+from utils.FiltroBiblioteca import FiltroIncremental, clave_busqueda
+
+
+class BibliotecaModel(QtCore.QAbstractListModel):
+    """Modelo de lista virtual sobre `Biblioteca.songs` para listViewBiblioteca.
+
+    Sólo guarda la ruta de cada fila; el texto "título - artista" se genera cuando la vista
+    pide pintar la fila. Las altas, bajas y cambios emiten señales por fila (sin reset), y el
+    filtro de búsqueda se aplica en el propio modelo conservando la selección.
+    Roles: DisplayRole (texto), UserRole (ruta/clave de la canción), ToolTipRole (ruta).
+    """
+
+    def __init__(self, biblioteca, fuzzy: bool = False, parent=None):
+        super().__init__(parent)
+        self.biblioteca = biblioteca
+        self.filter = FiltroIncremental(difuso=fuzzy)
+        self._keys: List[str] = []
+        self._rows: dict = {}  # clave -> fila en `_keys`
+        self._filas: Optional[List[int]] = None  # filas de `_keys` visibles con el filtro (None = todas)
+        self._filter_text = ""
+
+    # --- Interfaz de QAbstractListModel ---
+    def rowCount(self, parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> int:
+        if parent.isValid():
+            return 0
+        return len(self._keys) if self._filas is None else len(self._filas)
+
+    def data(self, index: QtCore.QModelIndex, role: int = QtCore.Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        key = self.key_at(index.row())
+        if key is None:
+            return None
+        if role == QtCore.Qt.ItemDataRole.DisplayRole:
+            return self.format_song(key, self.biblioteca.songs.get(key))
+        if role == QtCore.Qt.ItemDataRole.UserRole:
+            return key
+        if role == QtCore.Qt.ItemDataRole.ToolTipRole:
+            return key
+        return None
+
+    @staticmethod
+    def format_song(key: str, song) -> str:
+        title = getattr(song, "title", "") or ""
+        artist = getattr(song, "artist", "") or ""
+        if title or artist:
+            return f"{title} - {artist}".strip(" -")
+        return getattr(song, "file_path", None) or key or "<sin ruta>"
+
+    # --- Filas / claves ---
+    def key_at(self, row: int) -> Optional[str]:
+        if self._filas is not None:
+            if not 0 <= row < len(self._filas):
+                return None
+            row = self._filas[row]
+        return self._keys[row] if 0 <= row < len(self._keys) else None
+
+    def index_of(self, key: str) -> QtCore.QModelIndex:
+        """Índice de la fila visible de `key` (inválido si no está o el filtro la oculta)."""
+        fila = self._view_row(self._rows.get(key, -1))
+        return self.index(fila, 0) if fila >= 0 else QtCore.QModelIndex()
+
+    def _view_row(self, source_row: int) -> int:
+        if source_row < 0 or self._filas is None:
+            return source_row
+        i = bisect_left(self._filas, source_row)
+        return i if i < len(self._filas) and self._filas[i] == source_row else -1
+
+    # --- Cambios de contenido ---
+    def append_songs(self, entries: List[Tuple[str, object]]) -> None:
+        """Añade (clave, song) al final emitiendo una sola inserción por lote."""
+        entries = [(key, song) for key, song in entries if key not in self._rows]
+        if not entries:
+            return
+        inicio = len(self._keys)
+        visibles = self.filter.agregar(clave_busqueda(song) for _, song in entries)
+        if self._filas is None:
+            primera, n = inicio, len(entries)
+        else:
+            primera, n = len(self._filas), len(visibles)
+        if n:
+            self.beginInsertRows(QtCore.QModelIndex(), primera, primera + n - 1)
+        for key, _ in entries:
+            self._rows[key] = len(self._keys)
+            self._keys.append(key)
+        if self._filas is not None:
+            self._filas.extend(visibles)
+        if n:
+            self.endInsertRows()
+
+    def update_song(self, key: str, song=None) -> None:
+        """Refresca la fila de `key` (p. ej. tras editar sus etiquetas) sin reiniciar la vista."""
+        fila = self._rows.get(key)
+        if fila is None:
+            return
+        if song is None:
+            song = self.biblioteca.songs.get(key)
+        visible = self.filter.actualizar(fila, clave_busqueda(song))
+        if self._filas is None:
+            idx = self.index(fila, 0)
+            self.dataChanged.emit(idx, idx)
+            return
+        pos = bisect_left(self._filas, fila)
+        presente = pos < len(self._filas) and self._filas[pos] == fila
+        if presente and visible:
+            idx = self.index(pos, 0)
+            self.dataChanged.emit(idx, idx)
+        elif presente:
+            self.beginRemoveRows(QtCore.QModelIndex(), pos, pos)
+            del self._filas[pos]
+            self.endRemoveRows()
+        elif visible:
+            self.beginInsertRows(QtCore.QModelIndex(), pos, pos)
+            self._filas.insert(pos, fila)
+            self.endInsertRows()
+
+    def remove_song(self, key: str) -> None:
+        fila = self._rows.get(key)
+        if fila is None:
+            return
+        pos = self._view_row(fila)
+        if pos >= 0:
+            self.beginRemoveRows(QtCore.QModelIndex(), pos, pos)
+        del self._keys[fila]
+        del self._rows[key]
+        for k in self._keys[fila:]:
+            self._rows[k] -= 1
+        self.filter.quitar(fila)
+        visibles = self.filter.visibles()
+        self._filas = None if visibles is None else list(visibles)
+        if pos >= 0:
+            self.endRemoveRows()
+
+    def remove_songs(self, keys: Iterable[str]) -> None:
+        """Quita muchas canciones a la vez (una carpeta raíz) con un único reset del modelo."""
+        filas = {self._rows[key] for key in keys if key in self._rows}
+        if not filas:
+            return
+        if len(filas) == 1:
+            self.remove_song(self._keys[next(iter(filas))])
+            return
+        self.beginResetModel()
+        self.filter.quitar_filas(filas)
+        self._keys = [key for fila, key in enumerate(self._keys) if fila not in filas]
+        self._rows = {key: fila for fila, key in enumerate(self._keys)}
+        visibles = self.filter.visibles()
+        self._filas = None if visibles is None else list(visibles)
+        self.endResetModel()
+
+    def reset_songs(self, entries: Iterable[Tuple[str, object]]) -> None:
+        """Sustituye todo el contenido (carga síncrona de una carpeta)."""
+        self.beginResetModel()
+        self._clear_rows()
+        entries = list(entries)
+        for key, _ in entries:
+            self._rows[key] = len(self._keys)
+            self._keys.append(key)
+        visibles = self.filter.agregar(clave_busqueda(song) for _, song in entries)
+        if self._filas is not None:
+            self._filas = visibles
+        self.endResetModel()
+
+    def clear(self) -> None:
+        self.beginResetModel()
+        self._clear_rows()
+        self.endResetModel()
+
+    def _clear_rows(self) -> None:
+        self._keys = []
+        self._rows = {}
+        self.filter.limpiar()
+        # Conservar la búsqueda escrita: las filas que lleguen después se filtran con ella
+        visibles = self.filter.filtrar(self._filter_text)
+        self._filas = None if visibles is None else []
+
+    # --- Filtro ---
+    def set_filter_text(self, text: str) -> None:
+        """Aplica la búsqueda; se notifica como cambio de disposición para conservar la selección."""
+        self._filter_text = text or ""
+        anteriores = self._filas
+        visibles = self.filter.filtrar(self._filter_text)
+        if anteriores is None and visibles is None:
+            return
+        self.layoutAboutToBeChanged.emit()
+        persistentes = self.persistentIndexList()
+        claves = [self.key_at(idx.row()) for idx in persistentes]
+        self._filas = None if visibles is None else list(visibles)
+        nuevos = []
+        for key in claves:
+            nuevos.append(self.index_of(key) if key is not None else QtCore.QModelIndex())
+        self.changePersistentIndexList(persistentes, nuevos)
+        self.layoutChanged.emit()
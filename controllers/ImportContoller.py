@@ -15,7 +15,7 @@ class ImportContoller:
 
 	def _populate_table_from_text(self, text: str) -> int:
 		"""
-		Convierte texto en líneas y lo coloca en tableWidgetLyrics.
+		Convierte texto en líneas y lo carga en el modelo de tableWidgetLyrics.
 		- Normaliza saltos de línea y elimina BOM/CR.
 		- Inserta saltos de línea entre CJK (japonés) y texto latino (romaji) cuando faltan.
 		- Elimina timestamps al inicio de línea (por ejemplo [00:09.60]) y deja la columna de marcadores vacía.
@@ -23,9 +23,8 @@ class ImportContoller:
 		"""
 		try:
 			import re
-			table = self.ui.tableWidgetLyrics
-			table.clearContents()
-			table.setRowCount(0)
+			model = self.ui.tableWidgetLyrics.model()
+			model.clear()
 
 			ts_leading = re.compile(r'^\s*\[?\s*\d{1,2}:\d{2}(?:\.\d{1,3})?\s*\]?\s*')
 
@@ -63,12 +62,8 @@ class ImportContoller:
 				if s:
 					lines.append(s)
 
-			for i, ln in enumerate(lines):
-				table.insertRow(i)
-				item_ts = QtWidgets.QTableWidgetItem("")
-				item_lyrc = QtWidgets.QTableWidgetItem(ln)
-				table.setItem(i, 0, item_ts)
-				table.setItem(i, 1, item_lyrc)
+			# Un único reset del modelo (LyricsTableModel) con las marcas vacías
+			model.set_lines((None, ln) for ln in lines)
 			return len(lines)
 		except Exception as e:
 			if self.verbose:
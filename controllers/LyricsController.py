@@ -1,11 +1,14 @@
 from PyQt6 import QtCore, QtWidgets
+import time
 from typing import Optional
-import re
+from controllers.LyricsTableModel import LyricsHighlightDelegate, LyricsTableModel
 from controllers.LyricsTimingService import LyricsTimingService
 from controllers.LyricsSyncService import LyricsSyncService
+from metadata.LyricTimeline import LyricTimeline
+from threads.SaveLyricsThread import SaveLyricsThread
 
 class LyricsController:
-    """Controlador para gestionar tableWidgetLyrics.
+    """Controlador para gestionar tableWidgetLyrics (vista sobre LyricsTableModel).
     Al hacer doble clic en una canción de listViewBiblioteca carga sus letras en la tabla.
     """
     def __init__(self, ui, biblioteca_controller, player_controller: Optional[object] = None, verbose: bool = True):
@@ -14,6 +17,11 @@ class LyricsController:
         self.player_controller = player_controller
         self.verbose = verbose
 
+        # Tabla de letras: modelo sobre los datos + delegate que pinta la línea activa
+        self.model = LyricsTableModel(self.ui.tableWidgetLyrics)
+        self.ui.tableWidgetLyrics.setModel(self.model)
+        self.ui.tableWidgetLyrics.setItemDelegate(LyricsHighlightDelegate(self.ui.tableWidgetLyrics))
+
         self.ui.listViewBiblioteca.doubleClicked.connect(self.on_list_double_clicked)
 
         try:
@@ -38,16 +46,24 @@ class LyricsController:
         self.timing_service = LyricsTimingService()
         self.sync_service = LyricsSyncService(self.timing_service)
 
+        # Guardados en segundo plano: mutagen puede tardar segundos en reescribir un FLAC grande
+        self._saving = {}  # ruta -> Song del último guardado encolado
+        self.save_thread = SaveLyricsThread()
+        self.save_thread.saveFinished.connect(self._on_save_finished)
+        self.save_thread.saveReport.connect(self._on_save_report)
+        self.save_thread.start()
+
     def on_list_double_clicked(self, index: QtCore.QModelIndex):
+        requested_at = time.perf_counter()  # inicio de la latencia "doble clic -> audio"
         try:
             song = None
             if hasattr(self.biblioteca_controller, "get_selected_song"):
                 song = self.biblioteca_controller.get_selected_song()
             if song is None:
-                keys = list(self.biblioteca_controller.biblioteca.songs.keys())
-                row = index.row()
-                if 0 <= row < len(keys):
-                    song = self.biblioteca_controller.biblioteca.songs[keys[row]]
+                # La fila visible no coincide con el orden de songs si hay filtro: usar la clave de la fila
+                key = index.data(QtCore.Qt.ItemDataRole.UserRole)
+                if key:
+                    song = self.biblioteca_controller.biblioteca.songs.get(key)
             if song is None:
                 if self.verbose:
                     print("No se encontró la canción seleccionada.")
@@ -59,7 +75,7 @@ class LyricsController:
                     file_path = getattr(song, 'file_path', None)
                     if file_path:
                         try:
-                            self.player_controller.play_file(file_path)  # type: ignore
+                            self.player_controller.play_file(file_path, requested_at=requested_at)  # type: ignore
                         except Exception as e:
                             if self.verbose:
                                 print(f"Error al iniciar reproducción automática: {e}")
@@ -77,27 +93,8 @@ class LyricsController:
             if self.verbose:
                 print(f"Error al cargar la canción desde la lista: {e}")
 
-    def _normalize_timestamp(self, ts: str) -> str:
-        """
-        Normaliza timestamps con milisegundos incompletos:
-        - 00:09.60  -> 00:09.600
-        - 3:00.9    -> 3:00.900
-        - 00:18.9234 -> 00:18.923 (trunca a 3 dígitos)
-        Si no concuerda con el patrón, devuelve ts sin cambios.
-        """
-        import re
-        m = re.match(r"^(\d{1,2}):(\d{2})\.(\d{1,})$", ts.strip())
-        if not m:
-            return ts
-        mins, secs, ms = m.groups()
-        if len(ms) < 3:
-            ms = ms.ljust(3, "0")
-        elif len(ms) > 3:
-            ms = ms[:3]
-        return f"{mins}:{secs}.{ms}"
-
     def load_song_to_table(self, song) -> None:
-        """Puebla tableWidgetLyrics con las letras de la canción y actualiza labels."""
+        """Carga las letras de la canción en el modelo de tableWidgetLyrics y actualiza labels."""
         try:
             try:
                 self.ui.labelTituloSet.setText(getattr(song, "title", "--"))
@@ -107,25 +104,11 @@ class LyricsController:
             except Exception:
                 pass
 
-            table = self.ui.tableWidgetLyrics
-
-            table.clearContents()
-            lyrics = getattr(song, "lyrics", []) or []
-            table.setRowCount(0)
-
-            for i, entry in enumerate(lyrics):
-                ts = entry.get("ts", "")
-                lyrc = entry.get("lyrc", "")
-
-                ts_norm = self._normalize_timestamp(ts)
-
-                table.insertRow(i)
-
-                item_ts = QtWidgets.QTableWidgetItem(ts_norm)
-                item_lyrc = QtWidgets.QTableWidgetItem(lyrc)
-
-                table.setItem(i, 0, item_ts)
-                table.setItem(i, 1, item_lyrc)
+            timeline = getattr(song, "timeline", None)
+            if timeline is None:
+                timeline = LyricTimeline.from_lyrics(getattr(song, "lyrics", []) or [])
+            # Los tiempos ya están en ms: el modelo los formatea al pintar cada celda
+            self.model.set_timeline(timeline)
         except Exception as e:
             if self.verbose:
                 print(f"Error al poblar la tabla de letras: {e}")
@@ -138,51 +121,87 @@ class LyricsController:
             if song is None:
                 sel = self.ui.listViewBiblioteca.selectedIndexes()
                 if sel:
-                    row = sel[0].row()
-                    keys = list(self.biblioteca_controller.biblioteca.songs.keys())
-                    if 0 <= row < len(keys):
-                        song = self.biblioteca_controller.biblioteca.songs[keys[row]]
+                    key = sel[0].data(QtCore.Qt.ItemDataRole.UserRole)
+                    if key:
+                        song = self.biblioteca_controller.biblioteca.songs.get(key)
 
             if song is None:
                 QtWidgets.QMessageBox.warning(self.ui, "Guardar letras", "No hay canción seleccionada para guardar.")
                 return False
 
-            table = self.ui.tableWidgetLyrics
-            rows = table.rowCount()
-            if rows == 0:
+            if self.model.rowCount() == 0:
                 QtWidgets.QMessageBox.information(self.ui, "Guardar letras", "La tabla de letras está vacía. Nada que guardar.")
                 return False
 
-            ts_re = re.compile(r"^\d{1,2}:\d{2}\.\d{3}$")
-
-            new_lyrics = []
-            for i in range(rows):
-                item_ts = table.item(i, 0)
-                item_lyrc = table.item(i, 1)
-                ts = item_ts.text().strip() if item_ts is not None else ""
-                lyrc = item_lyrc.text().strip() if item_lyrc is not None else ""
-                if not ts or not lyrc:
+            # El modelo sólo admite tiempos válidos: basta comprobar que no haya celdas vacías
+            lineas = []
+            for i, (ms, lyrc) in enumerate(self.model.rows()):
+                lyrc = lyrc.strip()
+                if ms is None or not lyrc:
                     QtWidgets.QMessageBox.warning(self.ui, "Fila inválida", f"La fila {i+1} tiene timestamp o letra vacío. Complete todos los campos para guardar.")
                     return False
-                if not ts_re.match(ts):
-                    QtWidgets.QMessageBox.warning(self.ui, "Formato inválido", f"Timestamp inválido en la fila {i+1}: '{ts}'. El formato debe ser M:SS.mmm o MM:SS.mmm (ej. 3:00.590).")
-                    return False
-                new_lyrics.append({"ts": ts, "lyrc": lyrc})
-
-            song.lyrics = new_lyrics
-            ok = song.save_metadata()
-            if ok:
-                QtWidgets.QMessageBox.information(self.ui, "Guardar letras", "Letras guardadas correctamente.")
-                return True
-            else:
-                QtWidgets.QMessageBox.critical(self.ui, "Guardar letras", "Error al guardar las letras. Consulte la consola para más detalles.")
+                lineas.append((ms, lyrc, self.model.palabras_at(i)))
+
+            # LyricTimeline ordena por tiempo de forma estable (las filas del mismo instante conservan su orden)
+            song.timeline = LyricTimeline(lineas)
+            if not getattr(song, "file_path", None):
+                QtWidgets.QMessageBox.warning(self.ui, "Guardar letras", "La canción no tiene ruta de archivo.")
                 return False
+            if not self.save_thread.enqueue(song.file_path, song.timeline):
+                return False
+            self._saving[song.file_path] = song
+            self._show_status(f"Guardando letras: {getattr(song, 'title', song.file_path)}...")
+            return True
         except Exception as e:
             QtWidgets.QMessageBox.critical(self.ui, "Error", f"Ocurrió un error al intentar guardar: {e}")
             if self.verbose:
                 print(f"Error en on_save_clicked: {e}")
             return False
 
+    def _on_save_finished(self, file_path: str, ok: bool, error: str):
+        """Resultado de un guardado en segundo plano (se ejecuta en el hilo de la GUI)."""
+        song = self._saving.get(file_path)
+        if not self.save_thread.is_pending(file_path):
+            self._saving.pop(file_path, None)
+        if not ok:
+            if self.verbose:
+                print(f"Error al guardar las letras en {file_path}: {error}")
+            QtWidgets.QMessageBox.critical(self.ui, "Guardar letras", f"Error al guardar las letras de {file_path}. {error}")
+            return
+        if self.verbose:
+            print(f"Letras guardadas correctamente en el archivo: {file_path}")
+        if song is not None:
+            try:
+                self.biblioteca_controller.biblioteca.registrar_guardado(song)
+                if hasattr(self.biblioteca_controller, "refresh_song"):
+                    self.biblioteca_controller.refresh_song(song)
+            except Exception:
+                pass
+        self._show_status("Letras guardadas correctamente.")
+
+    def _on_save_report(self, file_path: str, informe: dict):
+        if not self.verbose:
+            return
+        if informe.get("omitida"):
+            print(f"Guardado omitido (letras sin cambios): {file_path}")
+        else:
+            modo = "en el lugar" if informe.get("en_sitio") else "reescritura completa"
+            print(f"Guardado de {file_path}: {informe.get('bytes_escritos', 0)} bytes escritos ({modo})")
+
+    def _show_status(self, text: str):
+        try:
+            self.ui.statusBar().showMessage(text, 4000)
+        except Exception:
+            if self.verbose:
+                print(text)
+
+    def shutdown(self):
+        """Escribe los guardados pendientes y detiene el hilo (al cerrar la ventana)."""
+        pendientes = self.save_thread.pending_count()
+        if pendientes and self.verbose:
+            print(f"Esperando {pendientes} guardado(s) de letras pendiente(s)...")
+        self.save_thread.stop(drain=True)
+
     def _label_text_to_ms(self, txt: str) -> Optional[int]:
         return self.timing_service.parse_label_to_ms(txt)
 
@@ -197,11 +216,13 @@ class LyricsController:
         Si no hay marcadores vacíos muestra un diálogo informativo.
         """
         try:
-            # intentar leer tiempo directamente del player para evitar retrasos de UI
+            # intentar leer tiempo directamente del reloj de reproducción para evitar retrasos de UI
             ms = None
             try:
                 player = getattr(self.player_controller, 'player', None)
-                if player is not None and hasattr(player, 'get_time'):
+                if hasattr(self.player_controller, 'current_ms'):
+                    ms = int(self.player_controller.current_ms())  # type: ignore
+                elif player is not None and hasattr(player, 'get_time'):
                     try:
                         cur = int(player.get_time() or 0)
                         if cur >= 0:
@@ -222,19 +243,11 @@ class LyricsController:
                     return
 
             table = self.ui.tableWidgetLyrics
-            rows = table.rowCount()
-            if rows <= 0:
+            if self.model.rowCount() <= 0:
                 QtWidgets.QMessageBox.information(self.ui, "Asignar tiempo", "La tabla de letras está vacía.")
                 return
 
-            timestamps = []
-            for i in range(rows):
-                try:
-                    item = table.item(i, 0)
-                    txt = item.text() if item is not None else ''
-                except Exception:
-                    txt = ''
-                timestamps.append(txt)
+            timestamps = self.model.timestamps()
 
             sel = table.selectedIndexes()
             ref = sel[0].row() if sel else None
@@ -244,65 +257,41 @@ class LyricsController:
                 QtWidgets.QMessageBox.information(self.ui, "Asignar tiempo", "Todos los marcadores están llenos.")
                 return
 
-            best_row, ts_text = res
-            try:
-                item = table.item(best_row, 0)
-                if item is None:
-                    item = QtWidgets.QTableWidgetItem(ts_text)
-                    table.setItem(best_row, 0, item)
-                else:
-                    item.setText(ts_text)
-                table.scrollToItem(item)
-                table.clearSelection()
-                item.setSelected(True)
-            except Exception:
-                pass
+            best_row, _ts_text = res
+            self.model.set_start(best_row, ms)
+            self._select_marker(best_row)
 
         except Exception as e:
             if self.verbose:
                 print(f"Error en assign_label_time_to_nearest_empty: {e}")
 
+    def _select_marker(self, row: int):
+        """Selecciona y muestra la celda del marcador de `row`."""
+        try:
+            table = self.ui.tableWidgetLyrics
+            index = self.model.index(row, 0)
+            table.scrollTo(index)
+            table.selectionModel().select(index, QtCore.QItemSelectionModel.SelectionFlag.ClearAndSelect)
+        except Exception:
+            pass
+
     def remove_last_filled_marker(self):
         """Busca desde el final la última fila cuyo marcador (col 0) está lleno y lo borra.
 
         Si todos los marcadores están vacíos muestra un diálogo informando.
         """
         try:
-            table = self.ui.tableWidgetLyrics
-            rows = table.rowCount()
-            if rows <= 0:
+            if self.model.rowCount() <= 0:
                 QtWidgets.QMessageBox.information(self.ui, "Back Sync", "La tabla de letras está vacía.")
                 return
 
-            timestamps = []
-            for i in range(rows):
-                try:
-                    item = table.item(i, 0)
-                    txt = item.text() if item is not None else ''
-                except Exception:
-                    txt = ''
-                timestamps.append(txt)
-
-            idx = self.sync_service.remove_last_filled(timestamps)
+            idx = self.sync_service.remove_last_filled(self.model.timestamps())
             if idx is None:
                 QtWidgets.QMessageBox.information(self.ui, "Back Sync", "Todos los marcadores están vacíos.")
                 return
 
-            try:
-                item = table.item(idx, 0)
-                if item is None:
-                    new_item = QtWidgets.QTableWidgetItem('')
-                    table.setItem(idx, 0, new_item)
-                    table.scrollToItem(new_item)
-                    table.clearSelection()
-                    new_item.setSelected(True)
-                else:
-                    item.setText('')
-                    table.scrollToItem(item)
-                    table.clearSelection()
-                    item.setSelected(True)
-            except Exception:
-                pass
+            self.model.set_start(idx, None)
+            self._select_marker(idx)
 
         except Exception as e:
             if self.verbose:
@@ -0,0 +1,210 @@
+from array import array
+from bisect import bisect_right
+from typing import Iterable, List, Optional, Tuple
+
+from PyQt6 import QtCore, QtGui, QtWidgets
+
+from metadata.LRCCodec import formatear_ts, ts_a_ms
+from metadata.LyricTimeline import LyricTimeline, Palabras
+
+# Marca de tiempo vacía (línea importada aún sin sincronizar)
+SIN_MARCA = -1
+
+
+class LyricsTableModel(QtCore.QAbstractTableModel):
+    """Modelo de tabla para tableWidgetLyrics: columna 0 el inicio de la línea, columna 1 la letra.
+
+    Guarda los inicios en ms (array de enteros, SIN_MARCA = vacío) y los textos tal cual; el texto
+    "MM:SS.mmm" se genera cuando la vista pinta la celda. Cargar una canción es un único reset del
+    modelo sin objetos por fila. La línea activa es un solo valor (`active_row`) que pinta
+    LyricsHighlightDelegate: moverla sólo repinta la fila anterior y la nueva.
+    Editar la columna 0 acepta "M:SS.mmm" (o cualquier formato de ts_a_ms) o vacío; un tiempo
+    inválido se rechaza y la celda conserva su valor.
+    Las palabras con tiempo del LRC extendido (no se muestran) acompañan a cada fila para volver a
+    guardarlas: se desplazan con la marca de la fila y se descartan si se edita su texto.
+    """
+    COLUMNAS = ("Times:", "Lyrics")
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._starts = array("i")
+        self._texts: List[str] = []
+        self._palabras: List[Palabras] = []
+        self._active = -1
+        self._bounds = array("i")
+        self._sorted: Optional[bool] = True  # None = recalcular `_bounds` al buscar la fila activa
+
+    # --- Interfaz de QAbstractTableModel ---
+    def rowCount(self, parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._texts)
+
+    def columnCount(self, parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.COLUMNAS)
+
+    def data(self, index: QtCore.QModelIndex, role: int = QtCore.Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        if role in (QtCore.Qt.ItemDataRole.DisplayRole, QtCore.Qt.ItemDataRole.EditRole):
+            row = index.row()
+            if index.column() == 0:
+                ms = self._starts[row]
+                return formatear_ts(ms) if ms != SIN_MARCA else ""
+            return self._texts[row]
+        return None
+
+    def setData(self, index: QtCore.QModelIndex, value, role: int = QtCore.Qt.ItemDataRole.EditRole) -> bool:
+        if not index.isValid() or role != QtCore.Qt.ItemDataRole.EditRole:
+            return False
+        row = index.row()
+        texto = str(value or "").strip()
+        if index.column() == 0:
+            if texto:
+                ms = ts_a_ms(texto)
+                if ms is None:
+                    return False
+            else:
+                ms = None
+            self.set_start(row, ms)
+            return True
+        if texto != self._texts[row]:
+            self._texts[row] = texto
+            self._palabras[row] = ()
+            self.dataChanged.emit(index, index, [QtCore.Qt.ItemDataRole.DisplayRole, QtCore.Qt.ItemDataRole.EditRole])
+        return True
+
+    def flags(self, index: QtCore.QModelIndex):
+        if not index.isValid():
+            return QtCore.Qt.ItemFlag.NoItemFlags
+        return (QtCore.Qt.ItemFlag.ItemIsSelectable | QtCore.Qt.ItemFlag.ItemIsEnabled
+                | QtCore.Qt.ItemFlag.ItemIsEditable)
+
+    def headerData(self, section: int, orientation, role: int = QtCore.Qt.ItemDataRole.DisplayRole):
+        if orientation != QtCore.Qt.Orientation.Horizontal or not 0 <= section < len(self.COLUMNAS):
+            return None
+        if role == QtCore.Qt.ItemDataRole.DisplayRole:
+            return self.COLUMNAS[section]
+        if role == QtCore.Qt.ItemDataRole.FontRole:
+            font = QtGui.QFont()
+            font.setBold(True)
+            return font
+        return None
+
+    # --- Contenido ---
+    def set_timeline(self, timeline: LyricTimeline) -> None:
+        """Carga las letras de una canción (un único reset)."""
+        self._reset(array("i", timeline.starts), list(timeline.texts), list(timeline.palabras))
+
+    def set_lines(self, lines: Iterable[Tuple[Optional[int], str]]) -> None:
+        """Carga filas (ms o None, texto); None deja la marca vacía (importar letra sin tiempos)."""
+        starts = array("i")
+        texts: List[str] = []
+        for ms, texto in lines:
+            starts.append(SIN_MARCA if ms is None else max(0, int(ms)))
+            texts.append(texto)
+        self._reset(starts, texts, [()] * len(texts))
+
+    def clear(self) -> None:
+        self._reset(array("i"), [], [])
+
+    def _reset(self, starts: array, texts: List[str], palabras: List[Palabras]) -> None:
+        self.beginResetModel()
+        self._starts = starts
+        self._texts = texts
+        self._palabras = palabras
+        self._active = -1
+        self._sorted = None
+        self.endResetModel()
+
+    def start_at(self, row: int) -> Optional[int]:
+        """Inicio en ms de la fila (None si está vacía o fuera de rango)."""
+        if not 0 <= row < len(self._starts):
+            return None
+        ms = self._starts[row]
+        return None if ms == SIN_MARCA else ms
+
+    def text_at(self, row: int) -> str:
+        return self._texts[row] if 0 <= row < len(self._texts) else ""
+
+    def palabras_at(self, row: int) -> Palabras:
+        """Palabras con tiempo de la fila (LRC extendido), () si no tiene."""
+        return self._palabras[row] if 0 <= row < len(self._palabras) else ()
+
+    def set_start(self, row: int, ms: Optional[int]) -> None:
+        """Cambia (o vacía con None) la marca de la fila y repinta sólo esa celda.
+        Las palabras de la fila se desplazan lo mismo que su marca."""
+        if not 0 <= row < len(self._starts):
+            return
+        valor = SIN_MARCA if ms is None else max(0, int(ms))
+        previo = self._starts[row]
+        if previo == valor:
+            return
+        if self._palabras[row] and previo != SIN_MARCA and valor != SIN_MARCA:
+            delta = valor - previo
+            self._palabras[row] = tuple((max(0, t + delta), p) for t, p in self._palabras[row])
+        self._starts[row] = valor
+        self._sorted = None
+        idx = self.index(row, 0)
+        self.dataChanged.emit(idx, idx, [QtCore.Qt.ItemDataRole.DisplayRole, QtCore.Qt.ItemDataRole.EditRole])
+
+    def timestamps(self) -> List[str]:
+        """Textos de la columna de marcas ('' = vacía), para LyricsSyncService."""
+        return [formatear_ts(ms) if ms != SIN_MARCA else "" for ms in self._starts]
+
+    def rows(self) -> List[Tuple[Optional[int], str]]:
+        """Filas como (ms o None, texto), en el orden de la tabla."""
+        return [(None if ms == SIN_MARCA else ms, texto) for ms, texto in zip(self._starts, self._texts)]
+
+    # --- Línea activa ---
+    @property
+    def active_row(self) -> int:
+        return self._active
+
+    def set_active_row(self, row: Optional[int]) -> None:
+        """Marca la fila activa (None/-1 = ninguna) repintando sólo la anterior y la nueva."""
+        row = -1 if row is None else int(row)
+        if row == self._active:
+            return
+        previous, self._active = self._active, row
+        last = len(self.COLUMNAS) - 1
+        for r in (previous, row):
+            if 0 <= r < len(self._texts):
+                self.dataChanged.emit(self.index(r, 0), self.index(r, last),
+                                      [QtCore.Qt.ItemDataRole.ForegroundRole, QtCore.Qt.ItemDataRole.FontRole])
+
+    def row_at(self, ms: int) -> Optional[int]:
+        """Fila i con start_i <= ms < start_{i+1} (la última sin límite superior); las marcas
+        vacías cuentan como 0. Por bisección mientras los inicios estén ordenados."""
+        if self._sorted is None:
+            # Inicios efectivos (vacías = 0); se recalculan sólo tras cambiar alguna marca
+            self._bounds = array("i", (max(ms_i, 0) for ms_i in self._starts))
+            self._sorted = all(self._bounds[i] <= self._bounds[i + 1] for i in range(len(self._bounds) - 1))
+        starts = self._bounds
+        n = len(starts)
+        if self._sorted:
+            i = bisect_right(starts, ms) - 1
+            return i if i >= 0 else None
+        # Tabla a medio sincronizar (marcas vacías entre medias): recorrido lineal
+        for i in range(n):
+            start_i = starts[i]
+            if i + 1 < n:
+                if start_i <= ms < starts[i + 1]:
+                    return i
+            elif ms >= start_i:
+                return i
+        return None
+
+
+class LyricsHighlightDelegate(QtWidgets.QStyledItemDelegate):
+    """Pinta en rojo y negrita la fila activa de LyricsTableModel (el resto con el estilo de la vista)."""
+
+    def __init__(self, parent=None, color: str = 'red'):
+        super().__init__(parent)
+        self._brush = QtGui.QBrush(QtGui.QColor(color))
+
+    def initStyleOption(self, option, index):
+        super().initStyleOption(option, index)
+        model = index.model()
+        if model is not None and index.row() == getattr(model, 'active_row', -1):
+            option.font.setBold(True)
+            option.palette.setBrush(QtGui.QPalette.ColorRole.Text, self._brush)
+            option.palette.setBrush(QtGui.QPalette.ColorRole.HighlightedText, self._brush)
@@ -1,5 +1,5 @@
 from typing import Optional, List
-import re
+from metadata.LRCCodec import formatear_ts, ts_a_ms
 
 
 class LyricsTimingService:
@@ -16,30 +16,12 @@ class LyricsTimingService:
         """Parsea strings como M:SS.mmm o MM:SS.mmm a milisegundos. Devuelve None si inválido."""
         if not txt or not isinstance(txt, str):
             return None
-        m = re.match(r"^\s*(\d{1,2}):(\d{2})\.(\d{1,3})\s*$", txt)
-        if not m:
-            return None
-        try:
-            mins = int(m.group(1))
-            secs = int(m.group(2))
-            ms_str = m.group(3)
-            if len(ms_str) < 3:
-                ms_str = ms_str.ljust(3, '0')
-            else:
-                ms_str = ms_str[:3]
-            ms = int(ms_str)
-            total = (mins * 60 + secs) * 1000 + ms
-            return int(total)
-        except Exception:
-            return None
+        return ts_a_ms(txt)
 
     def format_ms(self, ms: int) -> str:
         """Formatea ms a M:SS.mmm (mins no forzado a 2 dígitos)."""
         try:
-            m = int(ms // 60000)
-            s = int((ms % 60000) // 1000)
-            ms_part = int(ms % 1000)
-            return f"{m}:{s:02d}.{ms_part:03d}"
+            return formatear_ts(ms, ancho_minutos=1)
         except Exception:
             return "0:00.000"
 
@@ -1,8 +1,14 @@
 from PyQt6 import QtCore
+import time
+from collections import deque
+from typing import Deque, List, Optional
 from player.VLCplayer import VLCPlayer
-from threads.TimeUpdaterThread import TimeUpdaterThread
+from player.PlaybackClock import PlaybackClock
 from controllers.VerticalSliderController import VerticalSliderController
 
+# Espera antes de precargar la canción seleccionada o bajo el ratón (ms)
+PREFETCH_DELAY_MS = 150
+
 
 class PlayerController:
 	"""Controlador simple que conecta UI mínima con VLCPlayer.
@@ -17,10 +23,28 @@ class PlayerController:
 		self.times_controller = None
 
 		self.player = VLCPlayer()
-		self.time_thread = None
 		self.slider_controller = None
 		self._total_ms = 0
 
+		# Posición por eventos de VLC + interpolación; no sondea libvlc ni trabaja en pausa
+		self.clock = PlaybackClock(self.player)
+		self.clock.timeUpdated.connect(self._on_time_updated)
+		self.clock.lengthUpdated.connect(self._on_length_updated)
+		self.player.on_seek = self.clock.seek_hint
+		self.player.on_duration = self.clock.duration_hint
+		self.clock.playbackStarted.connect(self._on_playback_started)
+
+		# Latencia desde la petición (doble clic) hasta que suena el audio, en ms
+		self._play_requested_at: Optional[float] = None
+		self.start_latencies: Deque[float] = deque(maxlen=50)
+
+		# Precarga de media: canción seleccionada y sus vecinas, y la que está bajo el ratón
+		self._prefetch_rows: List[int] = []
+		self._prefetch_timer = QtCore.QTimer()
+		self._prefetch_timer.setSingleShot(True)
+		self._prefetch_timer.timeout.connect(self._run_prefetch)
+		self._connect_prefetch()
+
 		if hasattr(self.ui, 'pushButtonPlay'):
 			self.ui.pushButtonPlay.setCheckable(True)
 			self.ui.pushButtonPlay.toggled.connect(self.on_play_toggled)
@@ -34,23 +58,59 @@ class PlayerController:
 			except Exception:
 				self.slider_controller = None
 
-	def _start_time_thread(self):
-		if self.time_thread is not None:
+	def _connect_prefetch(self):
+		view = getattr(self.ui, 'listViewBiblioteca', None)
+		if view is None:
+			return
+		try:
+			view.setMouseTracking(True)
+			view.entered.connect(lambda index: self._schedule_prefetch([index.row()]))
+		except Exception:
+			pass
+		try:
+			view.selectionModel().currentChanged.connect(
+				lambda current, _previous: self._schedule_prefetch([current.row(), current.row() + 1, current.row() - 1]))
+		except Exception:
+			pass
+
+	def _schedule_prefetch(self, rows: List[int]):
+		# Con espera corta: pasar el ratón por encima de la lista no precarga cada fila
+		self._prefetch_rows = [r for r in rows if r >= 0]
+		self._prefetch_timer.start(PREFETCH_DELAY_MS)
+
+	def _run_prefetch(self):
+		view = getattr(self.ui, 'listViewBiblioteca', None)
+		model = view.model() if view is not None else None
+		if model is None or not hasattr(model, 'key_at'):
 			return
-		self.time_thread = TimeUpdaterThread(self.player.get_time, self.player.get_length, interval_ms=100)
-		self.time_thread.timeUpdated.connect(self._on_time_updated)
-		self.time_thread.lengthUpdated.connect(self._on_length_updated)
-		self.time_thread.start()
-
-	def _stop_time_thread(self):
-		if self.time_thread:
-			self.time_thread.stop()
-			self.time_thread = None
-
-	def play_file(self, file_path: str) -> bool:
-		"""Inicia reproducción y sincroniza estado del botón Play. Devuelve True si OK."""
+		songs = getattr(getattr(self.biblioteca_controller, 'biblioteca', None), 'songs', {})
+		for row in self._prefetch_rows:
+			key = model.key_at(row)
+			if not key:
+				continue
+			song = songs.get(key)
+			self.player.prefetch(getattr(song, 'file_path', None) or key)
+		self._prefetch_rows = []
+
+	def current_ms(self) -> int:
+		"""Posición actual de reproducción en ms (interpolada, sin llamar a libvlc)."""
+		return self.clock.position()
+
+	def shutdown(self):
+		"""Detiene la reproducción y suelta los eventos de VLC (al cerrar la ventana)."""
+		self.clock.close()
+		self._prefetch_timer.stop()
+		self.player.stop()
+
+	def play_file(self, file_path: str, requested_at: Optional[float] = None) -> bool:
+		"""Inicia reproducción y sincroniza estado del botón Play. Devuelve True si OK.
+		No espera a VLC: la duración llega por lengthUpdated cuando el media termina de analizarse.
+		:param requested_at: time.perf_counter() del gesto que pidió la canción (para medir la latencia).
+		"""
 		if not file_path:
 			return False
+		self._play_requested_at = requested_at if requested_at is not None else time.perf_counter()
+		self.clock.reset()
 		ok = self.player.play(file_path)
 		if not ok:
 			if hasattr(self.ui, 'pushButtonPlay'):
@@ -68,15 +128,21 @@ class PlayerController:
 			btn.setText('Pause')
 			btn.blockSignals(False)
 
-		total = int(self.player.get_length() or 0)
+		# Sólo si el media ya estaba analizado; si no, se ajusta en _on_length_updated
+		total = self.player.media_duration()
 		if total > 0:
-			self._total_ms = total
-			if self.slider_controller:
-				self.slider_controller.set_total_ms(total)
-
-		self._start_time_thread()
+			self._on_length_updated(total)
 		return True
 
+	def _on_playback_started(self):
+		if self._play_requested_at is None:
+			return
+		latency = (time.perf_counter() - self._play_requested_at) * 1000.0
+		self._play_requested_at = None
+		self.start_latencies.append(latency)
+		print(f"Audio iniciado en {latency:.0f} ms (media de las últimas {len(self.start_latencies)}: "
+			  f"{sum(self.start_latencies) / len(self.start_latencies):.0f} ms)")
+
 	def on_play_toggled(self, checked: bool):
 		"""Toggle Play/Pause: checked True -> play/resume, False -> pause."""
 		if checked:
@@ -114,7 +180,6 @@ class PlayerController:
 
 	def on_stop_clicked(self):
 		self.player.stop()
-		self._stop_time_thread()
 		if hasattr(self.ui, 'verticalSliderPlayerBar'):
 			if self.slider_controller:
 				self.slider_controller.reset_to_total()
@@ -184,12 +249,14 @@ class PlayerController:
 
 	def _on_length_updated(self, total_ms: int):
 		t = max(1, int(total_ms))
+		if t == self._total_ms:
+			return
 		self._total_ms = t
-		if hasattr(self.ui, 'verticalSliderPlayerBar'):
+		if self.slider_controller:
+			self.slider_controller.set_total_ms(t)
+		elif hasattr(self.ui, 'verticalSliderPlayerBar'):
 			slider = self.ui.verticalSliderPlayerBar
 			slider.blockSignals(True)
 			slider.setRange(0, t)
 			slider.setValue(t)
 			slider.blockSignals(False)
-		else:
-			slider = self.ui.verticalSliderPlayerBar
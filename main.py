@@ -1,6 +1,7 @@
 from PyQt6 import QtWidgets, uic
 import sys
 import os
+import multiprocessing
 from controllers.BibliotecaController import BibliotecaController 
 from controllers.LyricsController import LyricsController        
 from controllers.ImportContoller import ImportContoller         
@@ -19,15 +20,15 @@ class MyWindow(QtWidgets.QMainWindow):
         ui_file = resource_path("gui", "LyricsGUI.ui")
         self.ui = uic.loadUi(ui_file, self)  # type: ignore
 
-       # Fija los anchos que quieres
-        self.ui.tableWidgetLyrics.setColumnWidth(0, 85)    # type: ignore
-        self.ui.tableWidgetLyrics.setColumnWidth(1, 528)    # type: ignore 
-
         self.biblioteca_controller = BibliotecaController(self.ui, parent=self)
    
         self.player_controller = PlayerController(self.ui, self.biblioteca_controller)
     
         self.lyrics_controller = LyricsController(self.ui, self.biblioteca_controller, player_controller=self.player_controller)
+
+       # Fija los anchos que quieres (las columnas existen una vez que LyricsController pone el modelo)
+        self.ui.tableWidgetLyrics.setColumnWidth(0, 85)    # type: ignore
+        self.ui.tableWidgetLyrics.setColumnWidth(1, 528)    # type: ignore 
         
         self.times_controller = TimesController(self.ui, player_controller=self.player_controller)
         
@@ -38,7 +39,30 @@ class MyWindow(QtWidgets.QMainWindow):
          
         self.import_controller = ImportContoller(self.ui, parent=self)
 
+    def closeEvent(self, event):
+        # Detener trabajos en segundo plano antes de destruir la ventana
+        try:
+            self.biblioteca_controller.stop_scan()
+        except Exception:
+            pass
+        try:
+            # Terminar de escribir las letras encoladas (las escrituras son atómicas)
+            self.lyrics_controller.shutdown()
+        except Exception:
+            pass
+        try:
+            self.player_controller.shutdown()
+        except Exception:
+            pass
+        try:
+            self.biblioteca_controller.save_index()
+        except Exception:
+            pass
+        super().closeEvent(event)
+
 if __name__ == "__main__":
+    # Necesario para el escaneo con procesos en el ejecutable de PyInstaller (Windows)
+    multiprocessing.freeze_support()
     app = QtWidgets.QApplication(sys.argv)
     window = MyWindow()
     window.show()
@@ -0,0 +1,246 @@
+"""
+Caché en memoria (LRU) de los metadatos extraídos y de la normalización de rutas.
+
+Volver a añadir una carpeta, abrir dos veces la misma canción o resolver la misma ruta desde
+Biblioteca.get_song reutilizan el resultado anterior en lugar de volver a parsear o a resolver
+en disco. Las entradas de metadatos se validan con (ruta normalizada, tamaño, mtime_ns): si el
+archivo cambió se vuelve a extraer. Las escrituras propias (MetadataExtractor.write_metadata)
+invalidan la entrada aunque el mtime no llegue a cambiar (misma resolución de reloj, escritura
+en el lugar del mismo tamaño).
+
+Cada entrada guarda también el hash de las letras que tiene el archivo (ver
+MetadataExtractorBase.letras_sin_cambios), validado con el mismo (tamaño, mtime_ns); tras una
+escritura la entrada se queda sólo con el hash nuevo.
+
+La memoria usada es una estimación (cadenas y letras) limitada por `configurar(max_bytes=...)`;
+al superarla se descartan las entradas usadas hace más tiempo.
+"""
+import os
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from .LyricTimeline import LyricTimeline
+
+# Presupuesto de memoria de los metadatos cacheados (0 desactiva la caché)
+MAX_BYTES = 16 * 1024 * 1024
+# Rutas resueltas que se recuerdan (os.path.realpath hace un lstat por componente; validar una
+# entrada recordada cuesta un solo lstat)
+MAX_RUTAS = 4096
+# Coste fijo estimado de una entrada (diccionario, tupla, claves) y de una entrada con sólo el hash
+_COSTE_ENTRADA = 600
+_COSTE_HASH = 200
+
+_lock = threading.Lock()
+# clave normalizada -> (tamaño, mtime_ns, con_letras, metadatos o None, coste, hash de las letras o None)
+_metadatos: "OrderedDict[str, Tuple[int, int, bool, Optional[Dict[str, Any]], int, Optional[bytes]]]" = OrderedDict()
+# ruta -> (ruta real, (st_dev, st_ino, st_mtime_ns) del lstat de la ruta al resolverla)
+_rutas: "OrderedDict[str, Tuple[str, Tuple[int, int, int]]]" = OrderedDict()
+_bytes = 0
+estadisticas: Dict[str, int] = {"aciertos": 0, "fallos": 0, "invalidaciones": 0, "descartes": 0,
+                                 "aciertos_rutas": 0, "fallos_rutas": 0}
+
+
+def configurar(max_bytes: Optional[int] = None, max_rutas: Optional[int] = None) -> None:
+    """Cambia los límites de la caché; si los nuevos son menores se descarta lo que sobre."""
+    global MAX_BYTES, MAX_RUTAS
+    with _lock:
+        if max_bytes is not None:
+            MAX_BYTES = max(0, int(max_bytes))
+        if max_rutas is not None:
+            MAX_RUTAS = max(0, int(max_rutas))
+        _recortar()
+
+
+def _firma_enlace(path: str) -> Optional[Tuple[int, int, int]]:
+    """Identidad de lo que hay en `path` sin seguir el último enlace: si un enlace simbólico (o una
+    unión de Windows) se vuelve a apuntar, o cambia un directorio intermedio, cambia el inodo."""
+    try:
+        st = os.lstat(path)
+    except OSError:
+        return None
+    return st.st_dev, st.st_ino, st.st_mtime_ns
+
+
+def resolver_ruta(path: str) -> str:
+    """Ruta real absoluta de `path` (os.path.realpath), recordando las ya resueltas mientras el
+    lstat de `path` no cambie."""
+    firma = _firma_enlace(path)
+    with _lock:
+        entrada = _rutas.get(path)
+        if entrada is not None and firma is not None and entrada[1] == firma:
+            _rutas.move_to_end(path)
+            estadisticas["aciertos_rutas"] += 1
+            return entrada[0]
+        estadisticas["fallos_rutas"] += 1
+    real = os.path.realpath(path)
+    with _lock:
+        if firma is None:
+            _rutas.pop(path, None)  # no existe: no se recuerda
+        elif MAX_RUTAS:
+            _rutas[path] = (real, firma)
+            _rutas.move_to_end(path)
+            while len(_rutas) > MAX_RUTAS:
+                _rutas.popitem(last=False)
+    return real
+
+
+def clave(path: str) -> str:
+    """Clave de la caché: ruta real, sin mayúsculas donde el sistema no las distingue."""
+    return os.path.normcase(resolver_ruta(path))
+
+
+def _coste(metadata: Dict[str, Any]) -> int:
+    coste = _COSTE_ENTRADA
+    for valor in metadata.values():
+        if isinstance(valor, str):
+            coste += sys.getsizeof(valor)
+        elif isinstance(valor, LyricTimeline):
+            coste += len(valor) * 12 + sum(sys.getsizeof(texto) for texto in valor.texts)
+            # Palabras del LRC extendido: tupla (ms, palabra) + cadena por palabra
+            coste += sum(120 * len(palabras) for palabras in valor.palabras if palabras)
+        elif isinstance(valor, list):
+            # lyrics como dicts {"ts", "lyrc"}: diccionario + dos cadenas por línea
+            coste += sum(300 + sum(sys.getsizeof(v) for v in linea.values()) if isinstance(linea, dict) else 64
+                         for linea in valor)
+    return coste
+
+
+def _copiar(metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """Copia independiente: quien la recibe puede modificar las letras sin alterar la caché."""
+    copia = dict(metadata)
+    timeline = copia.get("timeline")
+    if isinstance(timeline, LyricTimeline):
+        copia["timeline"] = timeline.copy()
+    lyrics = copia.get("lyrics")
+    if isinstance(lyrics, list):
+        copia["lyrics"] = [dict(linea) if isinstance(linea, dict) else linea for linea in lyrics]
+    return copia
+
+
+def _recortar() -> None:
+    """Descarta las entradas más antiguas hasta respetar los límites (con _lock tomado)."""
+    global _bytes
+    while _metadatos and _bytes > MAX_BYTES:
+        _, entrada = _metadatos.popitem(last=False)
+        _bytes -= entrada[4]
+        estadisticas["descartes"] += 1
+    while len(_rutas) > MAX_RUTAS:
+        _rutas.popitem(last=False)
+
+
+def obtener(path: str, size: int, mtime_ns: int, include_lyrics: bool = True) -> Optional[Dict[str, Any]]:
+    """
+    Metadatos cacheados de `path` si siguen siendo válidos para (size, mtime_ns), o None.
+    Una entrada extraída sin letras no sirve para una petición con letras.
+    """
+    k = clave(path)
+    with _lock:
+        entrada = _metadatos.get(k)
+        if (entrada is None or entrada[3] is None or entrada[0] != size or entrada[1] != mtime_ns
+                or (include_lyrics and not entrada[2])):
+            estadisticas["fallos"] += 1
+            return None
+        _metadatos.move_to_end(k)
+        estadisticas["aciertos"] += 1
+        metadata = entrada[3]
+    return _copiar(metadata)
+
+
+def guardar(path: str, size: int, mtime_ns: int, include_lyrics: bool, metadata: Dict[str, Any]) -> None:
+    """Recuerda los metadatos de `path` extraídos con el (size, mtime_ns) anterior a la lectura."""
+    global _bytes
+    if not MAX_BYTES:
+        return
+    metadata = _copiar(metadata)
+    coste = _coste(metadata)
+    if coste > MAX_BYTES:
+        return
+    k = clave(path)
+    with _lock:
+        previa = _metadatos.pop(k, None)
+        digest = None
+        if previa is not None:
+            _bytes -= previa[4]
+            if previa[0] == size and previa[1] == mtime_ns:
+                digest = previa[5]
+        _metadatos[k] = (size, mtime_ns, include_lyrics, metadata, coste, digest)
+        _bytes += coste
+        _recortar()
+
+
+def obtener_hash(path: str, size: int, mtime_ns: int) -> Optional[bytes]:
+    """Hash de las letras recordado para `path` si sigue siendo válido para (size, mtime_ns), o None."""
+    k = clave(path)
+    with _lock:
+        entrada = _metadatos.get(k)
+        if entrada is None or entrada[5] is None or entrada[0] != size or entrada[1] != mtime_ns:
+            return None
+        _metadatos.move_to_end(k)
+        return entrada[5]
+
+
+def firma_hash(path: str) -> Optional[Tuple[int, int, bytes]]:
+    """(tamaño, mtime_ns, hash) recordado para `path`, para enviarlo desde un proceso del escaneo."""
+    k = clave(path)
+    with _lock:
+        entrada = _metadatos.get(k)
+    if entrada is None or entrada[5] is None:
+        return None
+    return entrada[0], entrada[1], entrada[5]
+
+
+def guardar_hash(path: str, size: int, mtime_ns: int, digest: bytes) -> None:
+    """Recuerda el hash de las letras de `path` tal como está con (size, mtime_ns)."""
+    global _bytes
+    if not MAX_BYTES:
+        return
+    k = clave(path)
+    with _lock:
+        previa = _metadatos.pop(k, None)
+        if previa is not None:
+            _bytes -= previa[4]
+        if previa is not None and previa[3] is not None and previa[0] == size and previa[1] == mtime_ns:
+            entrada = previa[:5] + (digest,)
+        else:
+            if previa is not None and previa[3] is not None:
+                estadisticas["invalidaciones"] += 1  # el archivo cambió: sus metadatos ya no valen
+            entrada = (size, mtime_ns, False, None, _COSTE_HASH, digest)
+        _metadatos[k] = entrada
+        _bytes += entrada[4]
+        _recortar()
+
+
+def invalidar(path: str) -> None:
+    """Olvida los metadatos de `path` (tras escribir en él); el hash de las letras se conserva."""
+    global _bytes
+    k = clave(path)
+    with _lock:
+        previa = _metadatos.pop(k, None)
+        if previa is None:
+            return
+        _bytes -= previa[4]
+        if previa[3] is not None:
+            estadisticas["invalidaciones"] += 1
+        if previa[5] is not None:
+            _metadatos[k] = (previa[0], previa[1], False, None, _COSTE_HASH, previa[5])
+            _bytes += _COSTE_HASH
+
+
+def limpiar() -> None:
+    global _bytes
+    with _lock:
+        _metadatos.clear()
+        _rutas.clear()
+        _bytes = 0
+
+
+def resumen() -> Dict[str, int]:
+    """Estadísticas de aciertos/fallos más el uso actual (entradas, bytes estimados, rutas)."""
+    with _lock:
+        datos = dict(estadisticas)
+        datos.update(entradas=sum(1 for e in _metadatos.values() if e[3] is not None),
+                     hashes=sum(1 for e in _metadatos.values() if e[5] is not None),
+                     bytes=_bytes, max_bytes=MAX_BYTES, rutas=len(_rutas))
+    return datos
@@ -1,6 +1,7 @@
-from .MetadataExtractorBase import MetadataExtractorBase
+from .MetadataExtractorBase import MetadataExtractorBase, SinPaddingSuficiente
+from .LyricTimeline import LyricTimeline
 from mutagen.flac import FLAC
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Optional
 
 class FLACMetadataExtractor(MetadataExtractorBase):
     def _find_lyric_key(self, tags) -> Optional[str]:
@@ -13,14 +14,31 @@ class FLACMetadataExtractor(MetadataExtractorBase):
                 return k
         return None
 
-    def extract_metadata(self, file_path) -> Dict[str, Any]:
+    def _texto_de_tags(self, tags) -> Optional[str]:
+        """Texto crudo de la etiqueta LYRICS (o de la primera que parezca contener letras)."""
+        if tags and tags.get("LYRICS") is not None: # type: ignore
+            key = "LYRICS"
+        else:
+            key = self._find_lyric_key(tags)
+        if not key:
+            return None
+        val = tags.get(key) # type: ignore
+        if isinstance(val, (list, tuple)):
+            return "\n".join(val)
+        return str(val)
+
+    def texto_letras(self, file_path) -> Optional[str]:
+        return self._texto_de_tags(FLAC(file_path).tags or {})
+
+    def extract_metadata(self, file_path, include_lyrics: bool = True, fileobj=None) -> Dict[str, Any]:
         """
         Extrae metadatos de un archivo FLAC.
         :param file_path: Ruta del archivo FLAC.
+        :param include_lyrics: Si False no se leen ni formatean las letras.
         :return: Diccionario con los metadatos extraídos.
         """
         try:
-            audio = FLAC(file_path)
+            audio = FLAC(fileobj if fileobj is not None else file_path)
             tags = audio.tags or {}
 
             duration = audio.info.total_samples / audio.info.sample_rate if audio.info else 0.0
@@ -37,18 +55,9 @@ class FLACMetadataExtractor(MetadataExtractorBase):
                 "lyrics": []
             }
 
-            if tags and tags.get("LYRICS") is not None: # type: ignore
-                key = "LYRICS"
-            else:
-                key = self._find_lyric_key(tags)
-
-            if key:
-                val = tags.get(key) # type: ignore
-                if isinstance(val, (list, tuple)):
-                    lyrics_crudo = "\n".join(val)
-                else:
-                    lyrics_crudo = str(val)
-                metadata["lyrics"] = self.formatear_Lyrics(lyrics_crudo)
+            lyrics_crudo = self._texto_de_tags(tags) if include_lyrics else None
+            if lyrics_crudo is not None:
+                self.asignar_letras(metadata, self.formatear_timeline(lyrics_crudo))
 
             return metadata
         except Exception as e:
@@ -61,30 +70,7 @@ class FLACMetadataExtractor(MetadataExtractorBase):
                 "lyrics": []
             }
 
-    def formatear_Lyrics(self, lyrics_crudo) -> List[Dict[str, str]]:
-        """
-        Procesa las letras crudas provenientes de los metadatos y las formatea en una estructura limpia.
-        :param lyrics_crudo: Texto crudo de las letras con marcas de tiempo.
-        :return: Lista de diccionarios con las letras formateadas.
-        """
-        lyrics_limpio: List[Dict[str, str]] = []
-        try:
-            lineas = lyrics_crudo.splitlines()
-            for linea in lineas:
-                if "[" in linea and "]" in linea:
-                    ts_inicio = linea.find("[") + 1
-                    ts_fin = linea.find("]")
-                    timestamp = linea[ts_inicio:ts_fin].strip()
-                    letra = linea[ts_fin + 1:].strip()
-
-                    if timestamp and letra and not letra.isspace():
-                        letra = letra.replace("\r", "").replace("\n", "")
-                        lyrics_limpio.append({"ts": timestamp, "lyrc": letra})
-        except Exception as e:
-            print(f"Error al formatear las letras: {e}")
-        return lyrics_limpio
-
-    def write_metadata(self, file_path, metadataLyrics) -> bool:
+    def write_metadata(self, file_path, metadataLyrics, solo_en_sitio: bool = False) -> bool:
         """
         Escribe los metadatos en un archivo FLAC.
         """
@@ -103,33 +89,18 @@ class FLACMetadataExtractor(MetadataExtractorBase):
 
             if "lyrics" in metadataLyrics:
                 lyrics = metadataLyrics["lyrics"]
-                if isinstance(lyrics, list):
-                    groups = []
-                    current_ts = None
-                    current_group = []
-                    for entry in lyrics:
-                        if "ts" not in entry or "lyrc" not in entry:
-                            continue
-                        ts = entry["ts"]
-                        line = f"[{ts}] {entry['lyrc']}"
-                        if ts != current_ts:
-                            if current_group:
-                                groups.append(current_group)
-                            current_group = [line]
-                            current_ts = ts
-                        else:
-                            current_group.append(line)
-                    if current_group:
-                        groups.append(current_group)
-                    lyrics_text = "\n\n".join("\n".join(g) for g in groups)
+                if isinstance(lyrics, (list, LyricTimeline)):
+                    lyrics_text = self.lyrics_a_texto(lyrics)
                     audio.tags["LYRICS"] = [lyrics_text] # type: ignore
                 else:
                     print("Error: El campo 'lyrics' debe ser una lista de diccionarios.")
                     return False
 
-            audio.save()
-            print(f"Letras sincronizadas guardadas correctamente en el archivo FLAC: {file_path}")
+            self._guardar_con_padding(file_path, lambda f, padding: audio.save(f, padding=padding), solo_en_sitio)
+            self.informar_guardado("FLAC", file_path)
             return True
+        except SinPaddingSuficiente:
+            raise
         except Exception as e:
             print(f"Error al guardar las letras sincronizadas en el archivo FLAC: {e}")
             return False
@@ -0,0 +1,198 @@
+import re
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+# "mm:ss", "mm:ss.x", "mm:ss.xx", "mm:ss.xxx" (o más dígitos, se truncan) y la variante "mm:ss:xx"
+_TS = re.compile(r"\s*(\d+):(\d{1,2})(?:[.:](\d+))?\s*$")
+# Línea LRC (todo el texto en un solo findall). Primera alternativa, el caso habitual: una sola
+# marca "[mm:ss.xx]texto" -> (min, seg, fracción, texto). Segunda: bloque de corchetes "[..][..]"
+# (varias marcas o etiquetas [ar:...]) y el resto de la línea.
+_LINEA = re.compile(
+    r"^[ \t]*(?:\[(\d+):(\d{1,2})(?:[.:](\d+))?\](?!\[)([^\r\n]*)|((?:\[[^\]\r\n]*\])+)([^\r\n]*))",
+    re.MULTILINE,
+)
+# Marca de palabra del formato LRC extendido: <mm:ss.xx>
+_PALABRA = re.compile(r"<(\d+):(\d{1,2})(?:[.:](\d+))?>")
+# Etiqueta de identificación: [ar:Artista], [ti:Título], [offset:+250]...
+_ID = re.compile(r"([A-Za-z#]+)\s*:(.*)$", re.DOTALL)
+# Multiplicador de la fracción según sus dígitos: ".9" = 900 ms, ".95" = 950 ms, ".953" = 953 ms
+_ESCALA_FRACCION = (0, 100, 10, 1)
+
+
+class LineaLRC(NamedTuple):
+    """Línea de letra con su inicio en ms y, si el LRC es extendido, el inicio de cada palabra."""
+    ms: int
+    texto: str
+    palabras: Tuple[Tuple[int, str], ...] = ()
+
+
+class DocumentoLRC(NamedTuple):
+    lineas: List[LineaLRC]
+    etiquetas: Dict[str, str]  # ar, ti, al, by, offset... (claves en minúsculas)
+    offset_ms: int
+
+
+def _fraccion_a_ms(frac: str) -> int:
+    return int(frac[:3]) * _ESCALA_FRACCION[min(len(frac), 3)]
+
+
+def ts_a_ms(ts: Any) -> Optional[int]:
+    """Convierte "M:SS", "MM:SS.mmm", "MM:SS.xx" o "MM:SS:xx" a milisegundos (None si no es válido).
+    La fracción se interpreta como decimales: ".9" son 900 ms y "9234" se trunca a 923 ms."""
+    if ts is None:
+        return None
+    m = _TS.match(ts if isinstance(ts, str) else str(ts))
+    if not m:
+        return None
+    mins, secs, frac = m.groups()
+    return (int(mins) * 60 + int(secs)) * 1000 + (_fraccion_a_ms(frac) if frac else 0)
+
+
+def formatear_ts(ms: int, ancho_minutos: int = 2) -> str:
+    """Formatea milisegundos como "MM:SS.mmm" (con ancho_minutos=1: "M:SS.mmm")."""
+    ms = max(0, int(ms))
+    return f"{ms // 60000:0{ancho_minutos}d}:{(ms // 1000) % 60:02d}.{ms % 1000:03d}"
+
+
+def _palabras(texto: str, ms_linea: int) -> Tuple[str, Tuple[Tuple[int, str], ...]]:
+    """Separa las marcas <mm:ss.xx> de una línea: (texto limpio, ((ms, palabra), ...)).
+    El texto anterior a la primera marca empieza con la línea (`ms_linea`); así las palabras unidas
+    reproducen siempre el texto limpio y la línea se puede volver a escribir sin perder nada."""
+    partes = _PALABRA.split(texto)
+    # partes = [antes, min1, seg1, frac1, palabra1, min2, seg2, frac2, palabra2, ...]
+    palabras = [(ms_linea, partes[0])] if partes[0].strip() else []
+    for i in range(1, len(partes), 4):
+        mins, secs, frac = partes[i:i + 3]
+        ms = (int(mins) * 60 + int(secs)) * 1000 + (_fraccion_a_ms(frac) if frac else 0)
+        palabras.append((ms, partes[i + 3]))
+    limpio = (partes[0] + "".join(partes[4::4])).strip()
+    return limpio, tuple(palabras)
+
+
+def texto_extendido(texto: str, palabras: Sequence[Tuple[int, str]]) -> str:
+    """
+    Texto de la línea con sus marcas de palabra ("<00:01.000>Hola <00:01.500>mundo").
+    Si no hay palabras, o ya no corresponden al texto (la línea se editó), devuelve `texto` tal cual.
+    """
+    if palabras and "".join(p for _, p in palabras).strip() == texto:
+        return "".join(f"<{formatear_ts(ms)}>{p}" for ms, p in palabras)
+    return texto
+
+
+def _desplazar(linea: LineaLRC, offset_ms: int) -> LineaLRC:
+    palabras = tuple((max(0, ms - offset_ms), p) for ms, p in linea.palabras)
+    return LineaLRC(max(0, linea.ms - offset_ms), linea.texto, palabras)
+
+
+def parsear(texto: str, aplicar_offset: bool = True, conservar_vacias: bool = False) -> DocumentoLRC:
+    """
+    Parsea un LRC en una sola pasada.
+    - Una línea puede tener varias marcas ("[00:12.00][01:30.50]Estribillo"): se genera una línea
+      por marca y el resultado se ordena por tiempo (orden estable: las líneas con el mismo
+      tiempo conservan el orden del archivo).
+    - Las etiquetas de identificación ([ar:], [ti:], [offset:]...) se devuelven aparte;
+      con aplicar_offset el offset se resta a todos los tiempos (un offset positivo adelanta la letra).
+    - Las marcas de palabra <mm:ss.xx> se quitan del texto y se devuelven en `palabras`.
+    - Las líneas sin marca de tiempo (y, salvo conservar_vacias, las que no tienen texto) se omiten.
+    """
+    etiquetas: Dict[str, str] = {}
+    lineas: List[LineaLRC] = []
+    multiples = False
+    nueva = tuple.__new__  # construir LineaLRC sin el coste de su __new__ con argumentos por nombre
+    escala = _ESCALA_FRACCION
+    for mins, secs, frac, resto, bloque, resto_bloque in _LINEA.findall(texto or ""):
+        if mins:
+            # Caso habitual: una sola marca de tiempo
+            ms = (int(mins) * 60 + int(secs)) * 1000
+            if frac:
+                ms += int(frac[:3]) * escala[len(frac)] if len(frac) < 4 else int(frac[:3])
+            tiempos: Sequence[int] = (ms,)
+        else:
+            # Varias marcas, etiquetas de identificación o corchetes que no son marcas
+            resto = resto_bloque
+            tiempos = []
+            contenidos = bloque[1:-1].split("][")
+            consumidas = 0
+            for contenido in contenidos:
+                ms_marca = ts_a_ms(contenido)
+                if ms_marca is not None:
+                    tiempos.append(ms_marca)
+                else:
+                    m_id = None if tiempos else _ID.match(contenido)
+                    if m_id is None:
+                        break
+                    etiquetas[m_id.group(1).lower()] = m_id.group(2).strip()
+                consumidas += 1
+            if not tiempos:
+                continue
+            if consumidas < len(contenidos):
+                # El primer corchete que no es marca forma parte del texto ("[00:01.00][Coro] ...")
+                resto = "[" + "][".join(contenidos[consumidas:]) + "]" + resto
+            multiples = multiples or len(tiempos) > 1
+
+        letra = resto.strip()
+        palabras: Tuple[Tuple[int, str], ...] = ()
+        if "<" in letra:
+            letra, palabras = _palabras(letra, tiempos[0])
+        if not letra and not conservar_vacias:
+            continue
+        for ms in tiempos:
+            lineas.append(nueva(LineaLRC, (ms, letra, palabras)))
+
+    offset_ms = 0
+    if "offset" in etiquetas:
+        try:
+            offset_ms = int(etiquetas["offset"])
+        except ValueError:
+            offset_ms = 0
+    if aplicar_offset and offset_ms:
+        lineas = [_desplazar(l, offset_ms) for l in lineas]
+    if multiples:
+        lineas.sort(key=lambda l: l.ms)
+    return DocumentoLRC(lineas, etiquetas, offset_ms)
+
+
+def a_lyrics(lineas: Iterable[LineaLRC]) -> List[Dict[str, str]]:
+    """Convierte líneas parseadas a la lista {"ts": "MM:SS.mmm", "lyrc": texto} que usa Song.lyrics."""
+    return [{"ts": f"{ms // 60000:02d}:{(ms // 1000) % 60:02d}.{ms % 1000:03d}", "lyrc": texto}
+            for ms, texto, _ in lineas]
+
+
+def parsear_lyrics(texto: str) -> List[Dict[str, str]]:
+    """Atajo: texto LRC de una etiqueta -> lista de Song.lyrics."""
+    return a_lyrics(parsear(texto).lineas)
+
+
+def serializar(lyrics: Iterable[Union[Dict[str, Any], LineaLRC]], etiquetas: Optional[Dict[str, str]] = None) -> str:
+    """
+    Genera el texto LRC que se guarda en las etiquetas: "[ts] letra" por línea y las líneas
+    consecutivas con el mismo timestamp agrupadas en un bloque; los bloques se separan con una
+    línea en blanco. Acepta dicts {"ts", "lyrc"} (se omiten los incompletos) o LineaLRC; las
+    palabras con tiempo (LineaLRC.palabras o la clave "palabras" del dict) se escriben como
+    marcas <mm:ss.xx> (ver texto_extendido).
+    """
+    bloques: List[str] = []
+    actual: List[str] = []
+    ts_actual: Any = None
+    for entrada in lyrics:
+        if isinstance(entrada, LineaLRC):
+            ts = formatear_ts(entrada.ms)
+            letra = texto_extendido(entrada.texto, entrada.palabras)
+        else:
+            if "ts" not in entrada or "lyrc" not in entrada:
+                continue
+            ts, letra = entrada["ts"], entrada["lyrc"]
+            if entrada.get("palabras"):
+                letra = texto_extendido(letra, entrada["palabras"])
+        if ts != ts_actual:
+            if actual:
+                bloques.append("\n".join(actual))
+            actual = []
+            ts_actual = ts
+        actual.append(f"[{ts}] {letra}")
+    if actual:
+        bloques.append("\n".join(actual))
+    texto = "\n\n".join(bloques)
+    if etiquetas:
+        cabecera = "\n".join(f"[{k}:{v}]" for k, v in etiquetas.items())
+        texto = f"{cabecera}\n{texto}" if texto else cabecera
+    return texto
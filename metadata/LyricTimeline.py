@@ -0,0 +1,159 @@
+from array import array
+from collections.abc import Mapping
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from .LRCCodec import LineaLRC, formatear_ts, ts_a_ms
+
+# Palabras con tiempo de una línea del LRC extendido: ((ms, palabra), ...)
+Palabras = Tuple[Tuple[int, str], ...]
+
+
+class LyricTimeline:
+    """Letras sincronizadas como arrays paralelos ordenados por tiempo.
+
+    - `starts`: `array('i')` con el inicio de cada línea en milisegundos (ordenado).
+    - `texts`: lista con el texto de cada línea.
+    - `palabras`: lista con las palabras con tiempo de cada línea (LRC extendido, `()` si no tiene);
+      se conservan para volver a escribir las marcas <mm:ss.xx> al guardar.
+    Las búsquedas por tiempo son O(log n) con bisect y los tiempos se convierten a entero una
+    sola vez (al parsear el LRC), no en cada tick de reproducción. Las inserciones son estables:
+    una línea nueva va detrás de las que tienen el mismo inicio (p. ej. línea original + romaji).
+    `from_lyrics`/`to_lyrics` convierten desde/hacia la lista [{"ts", "lyrc"}, ...] histórica
+    (con la clave "palabras" en las líneas que las tienen).
+    """
+    __slots__ = ("_starts", "_texts", "_palabras")
+
+    def __init__(self, lines: Iterable[Sequence[Any]] = ()):
+        """:param lines: (ms, texto) o (ms, texto, palabras) por línea."""
+        filas = [(int(linea[0]), "" if linea[1] is None else str(linea[1]),
+                  _a_palabras(linea[2]) if len(linea) > 2 else ()) for linea in lines]
+        if any(filas[i][0] > filas[i + 1][0] for i in range(len(filas) - 1)):
+            filas.sort(key=lambda f: f[0])  # sort estable: se conserva el orden de los empates
+        self._starts = array("i", (max(0, f[0]) for f in filas))
+        self._texts: List[str] = [f[1] for f in filas]
+        self._palabras: List[Palabras] = [f[2] for f in filas]
+
+    # --- Conversión ---
+    @classmethod
+    def from_lyrics(cls, lyrics: Optional[Iterable[Mapping]]) -> "LyricTimeline":
+        """Crea la línea de tiempo desde [{"ts": "MM:SS.mmm", "lyrc": ...}]; omite las entradas sin timestamp válido."""
+        if isinstance(lyrics, LyricTimeline):
+            return lyrics.copy()
+        pares = []
+        for entrada in lyrics or []:
+            if not isinstance(entrada, Mapping):  # dicts o las vistas de sólo lectura de Song.lyrics
+                continue
+            ms = ts_a_ms(entrada.get("ts"))
+            if ms is not None:
+                pares.append((ms, entrada.get("lyrc", "") or "", entrada.get("palabras") or ()))
+        return cls(pares)
+
+    @classmethod
+    def from_lrc(cls, lineas: Iterable[LineaLRC]) -> "LyricTimeline":
+        return cls(lineas)
+
+    def to_lyrics(self) -> List[Dict[str, Any]]:
+        lyrics: List[Dict[str, Any]] = []
+        for ms, texto, palabras in zip(self._starts, self._texts, self._palabras):
+            entrada: Dict[str, Any] = {"ts": formatear_ts(ms), "lyrc": texto}
+            if palabras:
+                entrada["palabras"] = palabras
+            lyrics.append(entrada)
+        return lyrics
+
+    def to_lrc(self) -> List[LineaLRC]:
+        return [LineaLRC(ms, texto, palabras) for ms, texto, palabras in zip(self._starts, self._texts, self._palabras)]
+
+    def copy(self) -> "LyricTimeline":
+        nueva = LyricTimeline.__new__(LyricTimeline)
+        nueva._starts = array("i", self._starts)
+        nueva._texts = list(self._texts)
+        nueva._palabras = list(self._palabras)  # tuplas inmutables: basta copiar la lista
+        return nueva
+
+    # --- Secuencia ---
+    @property
+    def starts(self) -> array:
+        """Inicios en ms (sólo lectura: modificar con insert/remove para mantener el orden)."""
+        return self._starts
+
+    @property
+    def texts(self) -> List[str]:
+        return self._texts
+
+    @property
+    def palabras(self) -> List[Palabras]:
+        return self._palabras
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def __iter__(self) -> Iterator[Tuple[int, str]]:
+        return zip(self._starts, self._texts)
+
+    def __getitem__(self, index: int) -> Tuple[int, str]:
+        return self._starts[index], self._texts[index]
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, LyricTimeline):
+            return NotImplemented
+        return self._starts == other._starts and self._texts == other._texts and self._palabras == other._palabras
+
+    def __repr__(self) -> str:
+        return f"LyricTimeline({len(self)} líneas)"
+
+    # --- Consultas por tiempo ---
+    def index_at(self, ms: int) -> int:
+        """Índice de la última línea que empieza en o antes de `ms` (-1 antes de la primera).
+        Con varias líneas en el mismo instante devuelve la última del grupo."""
+        return bisect_right(self._starts, ms) - 1
+
+    def line_at(self, ms: int) -> Optional[Tuple[int, str]]:
+        """(inicio_ms, texto) de la línea activa en `ms`, o None antes de la primera."""
+        i = self.index_at(ms)
+        return (self._starts[i], self._texts[i]) if i >= 0 else None
+
+    def group_at(self, ms: int) -> range:
+        """Índices de todas las líneas que comparten el inicio de la línea activa en `ms`."""
+        i = self.index_at(ms)
+        if i < 0:
+            return range(0)
+        return range(bisect_left(self._starts, self._starts[i]), i + 1)
+
+    def end_of(self, index: int) -> Optional[int]:
+        """Inicio de la siguiente línea con tiempo mayor (fin de `index`), o None si es la última."""
+        j = bisect_right(self._starts, self._starts[index])
+        return self._starts[j] if j < len(self._starts) else None
+
+    def indices_between(self, start_ms: int, end_ms: int) -> range:
+        """Índices de las líneas que empiezan en [start_ms, end_ms)."""
+        return range(bisect_left(self._starts, start_ms), bisect_left(self._starts, end_ms))
+
+    def lines_between(self, start_ms: int, end_ms: int) -> List[Tuple[int, str]]:
+        return [(self._starts[i], self._texts[i]) for i in self.indices_between(start_ms, end_ms)]
+
+    # --- Edición ---
+    def insert(self, ms: int, text: str, palabras: Sequence[Tuple[int, str]] = ()) -> int:
+        """Inserta una línea manteniendo el orden (detrás de las del mismo instante); devuelve su índice."""
+        ms = max(0, int(ms))
+        i = bisect_right(self._starts, ms)
+        self._starts.insert(i, ms)
+        self._texts.insert(i, text)
+        self._palabras.insert(i, _a_palabras(palabras))
+        return i
+
+    def remove(self, index: int) -> Tuple[int, str]:
+        """Quita la línea `index` y devuelve (inicio_ms, texto)."""
+        ms = self._starts.pop(index)
+        self._palabras.pop(index)
+        return ms, self._texts.pop(index)
+
+
+def _a_palabras(palabras: Optional[Iterable[Sequence[Any]]]) -> Palabras:
+    """Normaliza las palabras de una línea a ((ms, palabra), ...); vacías -> () compartida."""
+    if not palabras:
+        return ()
+    if type(palabras) is tuple:
+        return palabras  # ya normalizadas (LRCCodec.parsear, to_lyrics)
+    return tuple((max(0, int(p[0])), str(p[1])) for p in palabras)
@@ -1,16 +1,18 @@
 import mutagen.mp4
-from .MetadataExtractorBase import MetadataExtractorBase  # Importación corregida
-from typing import Any, Dict, List
+from .MetadataExtractorBase import MetadataExtractorBase, SinPaddingSuficiente  # Importación corregida
+from .LyricTimeline import LyricTimeline
+from typing import Any, Dict
 
 class M4AMetadataExtractor(MetadataExtractorBase):
-    def extract_metadata(self, file_path) -> Dict[str, Any]:
+    def extract_metadata(self, file_path, include_lyrics: bool = True, fileobj=None) -> Dict[str, Any]:
         """
         Extrae metadatos de un archivo M4A.
         :param file_path: Ruta del archivo M4A.
+        :param include_lyrics: Si False no se leen ni formatean las letras.
         :return: Diccionario con los metadatos extraídos.
         """
         try:
-            audio = mutagen.mp4.MP4(file_path)
+            audio = mutagen.mp4.MP4(fileobj if fileobj is not None else file_path)
             tags = audio.tags
             
             duration = audio.info.length if audio.info else 0.0
@@ -27,20 +29,17 @@ class M4AMetadataExtractor(MetadataExtractorBase):
                 "lyrics": [] 
             }
 
+            if not include_lyrics:
+                return metadata
+
             if tags and tags.get("©lyr") is not None:  # type: ignore[reportOperatorIssue]
                 lyrics_crudo = "\n".join(tags["©lyr"])  # type: ignore[reportOperatorIssue]
-                metadata["lyrics"] = self.formatear_Lyrics(lyrics_crudo)
+                self.asignar_letras(metadata, self.formatear_timeline(lyrics_crudo))
 
             if tags and not metadata["lyrics"]:
-                for key in list(tags.keys()):
-                    lk = key.lower()
-                    if "lyr" in lk or "lyric" in lk or "unsync" in lk or "cmt" in lk or "comment" in lk:
-                        try:
-                            lyrics_crudo = "\n".join(tags[key])  # type: ignore[reportOperatorIssue]
-                        except Exception:
-                            lyrics_crudo = str(tags[key])  # type: ignore[reportOperatorIssue]
-                        metadata["lyrics"] = self.formatear_Lyrics(lyrics_crudo)
-                        break
+                lyrics_crudo = self._texto_otra_clave(tags)
+                if lyrics_crudo is not None:
+                    self.asignar_letras(metadata, self.formatear_timeline(lyrics_crudo))
 
             return metadata
         except Exception as e:
@@ -53,30 +52,26 @@ class M4AMetadataExtractor(MetadataExtractorBase):
                 "lyrics": []
             }
 
-    def formatear_Lyrics(self, lyrics_crudo) -> List[Dict[str, str]]:
-        """
-        Procesa las letras crudas provenientes de los metadatos y las formatea en una estructura limpia.
-        :param lyrics_crudo: Texto crudo de las letras con marcas de tiempo.
-        :return: Lista de diccionarios con las letras formateadas.
-        """
-        lyrics_limpio: List[Dict[str, str]] = []
-        try:
-            lineas = lyrics_crudo.splitlines()
-            for linea in lineas:
-                if "[" in linea and "]" in linea:
-                    ts_inicio = linea.find("[") + 1
-                    ts_fin = linea.find("]")
-                    timestamp = linea[ts_inicio:ts_fin].strip()
-                    letra = linea[ts_fin + 1:].strip()
+    def _texto_otra_clave(self, tags):
+        """Texto de la primera clave que parezca contener letras (cuando no hay ©lyr)."""
+        for key in list(tags.keys()):
+            lk = key.lower()
+            if "lyr" in lk or "lyric" in lk or "unsync" in lk or "cmt" in lk or "comment" in lk:
+                try:
+                    return "\n".join(tags[key])  # type: ignore[reportOperatorIssue]
+                except Exception:
+                    return str(tags[key])  # type: ignore[reportOperatorIssue]
+        return None
 
-                    if timestamp and letra and not letra.isspace():
-                        letra = letra.replace("\r", "").replace("\n", "")
-                        lyrics_limpio.append({"ts": timestamp, "lyrc": letra})
-        except Exception as e:
-            print(f"Error al formatear las letras: {e}")
-        return lyrics_limpio
+    def texto_letras(self, file_path):
+        tags = mutagen.mp4.MP4(file_path).tags
+        if not tags:
+            return None
+        if tags.get("©lyr") is not None:  # type: ignore[reportOperatorIssue]
+            return "\n".join(tags["©lyr"])  # type: ignore[reportOperatorIssue]
+        return self._texto_otra_clave(tags)
 
-    def write_metadata(self, file_path, metadataLyrics) -> bool:
+    def write_metadata(self, file_path, metadataLyrics, solo_en_sitio: bool = False) -> bool:
         """
         Escribe los metadatos en un archivo M4A.
         """
@@ -97,33 +92,18 @@ class M4AMetadataExtractor(MetadataExtractorBase):
                 
             if "lyrics" in metadataLyrics:
                 lyrics = metadataLyrics["lyrics"]
-                if isinstance(lyrics, list):
-                    groups = []
-                    current_ts = None
-                    current_group = []
-                    for entry in lyrics:
-                        if "ts" not in entry or "lyrc" not in entry:
-                            continue
-                        ts = entry["ts"]
-                        line = f"[{ts}] {entry['lyrc']}"
-                        if ts != current_ts:
-                            if current_group:
-                                groups.append(current_group)
-                            current_group = [line]
-                            current_ts = ts
-                        else:
-                            current_group.append(line)
-                    if current_group:
-                        groups.append(current_group)
-                    lyrics_text = "\n\n".join("\n".join(g) for g in groups)
+                if isinstance(lyrics, (list, LyricTimeline)):
+                    lyrics_text = self.lyrics_a_texto(lyrics)
                     audio["©lyr"] = [lyrics_text]
                 else:
                     print("Error: El campo 'lyrics' debe ser una lista de diccionarios.")
                     return False
 
-            audio.save()
-            print(f"Letras sincronizadas guardadas correctamente en el archivo M4A: {file_path}")
+            self._guardar_con_padding(file_path, lambda f, padding: audio.save(f, padding=padding), solo_en_sitio)
+            self.informar_guardado("M4A", file_path)
             return True
+        except SinPaddingSuficiente:
+            raise
         except Exception as e:
             print(f"Error al guardar las letras sincronizadas en el archivo M4A: {e}")
             return False
\ No newline at end of file
@@ -1,13 +1,80 @@
-from .MetadataExtractorBase import MetadataExtractorBase
-from mutagen import File # type: ignore
+from .MetadataExtractorBase import MetadataExtractorBase, SinPaddingSuficiente
+from .LyricTimeline import LyricTimeline
+from mutagen import MutagenError # type: ignore
+from mutagen.mp3 import MP3 # type: ignore
 from mutagen.id3 import ID3, USLT, ID3NoHeaderError # type: ignore
-from typing import Any, Dict
+from typing import Any, Dict, Optional
+import struct
+import threading
+from contextlib import nullcontext
+
+# Tablas de la cabecera de frame MPEG (sólo lo necesario para estimar la duración)
+_VERSIONES = {0: 2.5, 2: 2, 3: 1}
+_SAMPLE_RATES = {1: (44100, 48000, 32000), 2: (22050, 24000, 16000), 2.5: (11025, 12000, 8000)}
+_BITRATES_L3 = {
+    1: (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    2: (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+
+
+class _LectorContado:
+    """Envuelve un archivo abierto y cuenta los bytes leídos (para medir el I/O real por archivo)."""
+    def __init__(self, fileobj):
+        self._f = fileobj
+        self.bytes_leidos = 0
+
+    def read(self, n: int = -1) -> bytes:
+        data = self._f.read(n)
+        self.bytes_leidos += len(data)
+        return data
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        return self._f.seek(offset, whence)
+
+    def tell(self) -> int:
+        return self._f.tell()
+
+    def __getattr__(self, name):
+        return getattr(self._f, name)
+
 
 class MP3MetadataExtractor(MetadataExtractorBase):
-    def extract_metadata(self, file_path) -> Dict[str, Any]:
+    # Si True la duración se calcula con la cabecera Xing/Info/VBRI (o el bitrate CBR) del primer frame,
+    # sin que mutagen sincronice y valide frames de audio. Puede cambiarse globalmente o por instancia.
+    estimar_duracion: bool = False
+
+    # Estadísticas acumuladas de lectura (todas las instancias)
+    estadisticas: Dict[str, int] = {"archivos": 0, "bytes_leidos": 0}
+    _stats_lock = threading.Lock()
+
+    def __init__(self, estimar_duracion: Optional[bool] = None):
+        if estimar_duracion is not None:
+            self.estimar_duracion = estimar_duracion
+        self.last_bytes_read = 0
+
+    def extract_metadata(self, file_path, include_lyrics: bool = True, fileobj=None) -> Dict[str, Any]:
         try:
-            audio = File(file_path)
-            duration = audio.info.length if audio and getattr(audio, "info", None) else 0.0
+            # Una sola apertura y un solo parseo: MP3() entrega a la vez la info del stream y las tramas ID3
+            with (open(file_path, "rb") if fileobj is None else nullcontext(fileobj)) as f:
+                f.seek(0)
+                lector = _LectorContado(f)
+                duration: Optional[float] = None
+                id3 = None
+                if self.estimar_duracion:
+                    id3 = self._leer_id3(lector)
+                    duration = self._estimar_duracion(lector, getattr(id3, "size", 0) if id3 else 0)
+                if duration is None:
+                    lector.seek(0)
+                    try:
+                        audio = MP3(lector)
+                        duration = audio.info.length if getattr(audio, "info", None) else 0.0
+                        id3 = audio.tags
+                    except MutagenError:
+                        # Frames de audio dañados (HeaderNotFoundError...): las etiquetas ID3 se
+                        # leen igualmente, sin duración
+                        duration = 0.0
+                        id3 = self._leer_id3(lector)
+            self._registrar_lectura(lector.bytes_leidos)
 
             minutes = int(duration // 60)
             seconds = int(duration % 60)
@@ -19,14 +86,10 @@ class MP3MetadataExtractor(MetadataExtractorBase):
                 "artist": "Desconocido",
                 "album": "Desconocido",
                 "duration": formatted_duration,
-                "lyrics": []
+                "lyrics": [],
+                "bytes_read": lector.bytes_leidos
             }
 
-            try:
-                id3 = ID3(file_path)
-            except ID3NoHeaderError:
-                id3 = None
-
             if id3:
                 if "TIT2" in id3:
                     metadata["title"] = id3["TIT2"].text[0]
@@ -35,13 +98,15 @@ class MP3MetadataExtractor(MetadataExtractorBase):
                 if "TALB" in id3:
                     metadata["album"] = id3["TALB"].text[0]
 
+            if id3 and include_lyrics:
                 uslts = id3.getall("USLT")
                 if uslts:
                     lyrics_crudo = "\n".join(u.text for u in uslts)
-                    metadata["lyrics"] = self.formatear_Lyrics(lyrics_crudo)
+                    self.asignar_letras(metadata, self.formatear_timeline(lyrics_crudo))
 
                 sylt_frames = id3.getall("SYLT")
                 if sylt_frames and not metadata["lyrics"]:
+                    lineas = []
                     for frame in sylt_frames:
                         for entry in getattr(frame, "text", []):
                             text = None
@@ -68,14 +133,8 @@ class MP3MetadataExtractor(MetadataExtractorBase):
                                 except Exception:
                                     text = text.decode("latin-1", errors="replace")
 
-                            s = int(time_ms // 1000)
-                            ms = int(time_ms % 1000)
-                            timestamp = f"{s//60:02d}:{s%60:02d}.{ms:03d}"
-
-                            metadata["lyrics"].append({
-                                "ts": timestamp,
-                                "lyrc": text.strip()
-                            })
+                            lineas.append((max(0, time_ms), text.strip()))
+                    self.asignar_letras(metadata, LyricTimeline(lineas))
 
             return metadata
         except Exception:
@@ -87,30 +146,87 @@ class MP3MetadataExtractor(MetadataExtractorBase):
                 "lyrics": []
             }
 
-    def formatear_Lyrics(self, lyrics_crudo):
+    @staticmethod
+    def _leer_id3(lector):
+        """Etiqueta ID3 desde el principio del archivo, o None si no tiene."""
+        lector.seek(0)
+        try:
+            return ID3(lector)
+        except ID3NoHeaderError:
+            return None
+
+    def _registrar_lectura(self, n: int) -> None:
+        self.last_bytes_read = n
+        with self._stats_lock:
+            MP3MetadataExtractor.estadisticas["archivos"] += 1
+            MP3MetadataExtractor.estadisticas["bytes_leidos"] += n
+
+    def _estimar_duracion(self, lector, inicio_audio: int, ventana: int = 16384) -> Optional[float]:
         """
-        Procesa las letras crudas provenientes de los metadatos y las formatea en una estructura limpia.
-        :param lyrics_crudo: Texto crudo de las letras con marcas de tiempo.
-        :return: Lista de diccionarios con las letras formateadas.
+        Estima la duración a partir del primer frame MPEG Layer III tras la etiqueta ID3:
+        número de frames de la cabecera Xing/Info o VBRI si existe, o tamaño/bitrate si es CBR.
+        Devuelve None si no encuentra un frame válido (se usará el parseo completo de mutagen).
         """
-        lyrics_limpio = []
         try:
-            lineas = lyrics_crudo.splitlines()
-            for linea in lineas:
-                if "[" in linea and "]" in linea:
-                    ts_inicio = linea.find("[") + 1
-                    ts_fin = linea.find("]")
-                    timestamp = linea[ts_inicio:ts_fin].strip()
-                    letra = linea[ts_fin + 1:].strip()
-
-                    if timestamp and letra and not letra.isspace():
-                        letra = letra.replace("\r", "").replace("\n", "")
-                        lyrics_limpio.append({"ts": timestamp, "lyrc": letra})
-        except Exception as e:
-            print(f"Error al formatear las letras: {e}")
-        return lyrics_limpio
+            lector.seek(0, 2)
+            tam_archivo = lector.tell()
+            lector.seek(inicio_audio)
+            bloque = lector.read(ventana)
+        except OSError:
+            return None
+
+        pos = bloque.find(b"\xff")
+        while 0 <= pos <= len(bloque) - 4:
+            cabecera = struct.unpack(">I", bloque[pos:pos + 4])[0]
+            frame = self._leer_cabecera(cabecera)
+            if frame is not None:
+                version, sample_rate, bitrate, muestras, mono = frame
+                # Cabecera Xing/Info: tras la información lateral (depende de versión y canales)
+                if version == 1:
+                    off_xing = 4 + (17 if mono else 32)
+                else:
+                    off_xing = 4 + (9 if mono else 17)
+                xing = bloque[pos + off_xing:pos + off_xing + 12]
+                if xing[:4] in (b"Xing", b"Info") and len(xing) == 12:
+                    flags = struct.unpack(">I", xing[4:8])[0]
+                    if flags & 0x1:
+                        n_frames = struct.unpack(">I", xing[8:12])[0]
+                        return n_frames * muestras / float(sample_rate)
+                vbri = bloque[pos + 36:pos + 36 + 18]
+                if vbri[:4] == b"VBRI" and len(vbri) == 18:
+                    n_frames = struct.unpack(">I", vbri[14:18])[0]
+                    return n_frames * muestras / float(sample_rate)
+                # CBR: bytes de audio / bitrate
+                bytes_audio = max(0, tam_archivo - (inicio_audio + pos))
+                return bytes_audio * 8.0 / (bitrate * 1000.0)
+            pos = bloque.find(b"\xff", pos + 1)
+        return None
+
+    @staticmethod
+    def _leer_cabecera(cabecera: int):
+        """Decodifica una cabecera de frame MPEG Layer III; None si no es válida."""
+        if (cabecera >> 21) & 0x7FF != 0x7FF:
+            return None
+        version = _VERSIONES.get((cabecera >> 19) & 0x3)
+        capa = (cabecera >> 17) & 0x3
+        idx_bitrate = (cabecera >> 12) & 0xF
+        idx_rate = (cabecera >> 10) & 0x3
+        if version is None or capa != 1 or idx_bitrate in (0, 15) or idx_rate == 3:
+            return None
+        bitrate = _BITRATES_L3[1 if version == 1 else 2][idx_bitrate]
+        sample_rate = _SAMPLE_RATES[version][idx_rate]
+        muestras = 1152 if version == 1 else 576
+        mono = ((cabecera >> 6) & 0x3) == 3
+        return version, sample_rate, bitrate, muestras, mono
+
+    def texto_letras(self, file_path) -> Optional[str]:
+        try:
+            uslts = ID3(file_path).getall("USLT")
+        except ID3NoHeaderError:
+            return None
+        return "\n".join(u.text for u in uslts) if uslts else None
 
-    def write_metadata(self, file_path, metadataLyrics) -> bool:
+    def write_metadata(self, file_path, metadataLyrics, solo_en_sitio: bool = False) -> bool:
         """
         Escribe los metadatos en un archivo MP3.
         Actualmente, solo se admite la escritura de letras (USLT).
@@ -145,33 +261,18 @@ class MP3MetadataExtractor(MetadataExtractorBase):
 
             if "lyrics" in metadataLyrics:
                 lyrics = metadataLyrics["lyrics"]
-                if isinstance(lyrics, list):
-                    groups = []
-                    current_ts = None
-                    current_group = []
-                    for entry in lyrics:
-                        if "ts" not in entry or "lyrc" not in entry:
-                            continue
-                        ts = entry["ts"]
-                        line = f"[{ts}] {entry['lyrc']}"
-                        if ts != current_ts:
-                            if current_group:
-                                groups.append(current_group)
-                            current_group = [line]
-                            current_ts = ts
-                        else:
-                            current_group.append(line)
-                    if current_group:
-                        groups.append(current_group)
-                    lyrics_text = "\n\n".join("\n".join(g) for g in groups)
+                if isinstance(lyrics, (list, LyricTimeline)):
+                    lyrics_text = self.lyrics_a_texto(lyrics)
                     audio.add(USLT(encoding=3, lang="eng", desc="Lyrics", text=lyrics_text))
                 else:
                     print("Error: El campo 'lyrics' debe ser una lista de diccionarios.")
                     return False
 
-            audio.save(file_path, v2_version=3)
-            print(f"Letras sincronizadas guardadas correctamente en el archivo MP3: {file_path}")
+            self._guardar_con_padding(file_path, lambda f, padding: audio.save(f, v2_version=3, padding=padding), solo_en_sitio)
+            self.informar_guardado("MP3", file_path)
             return True
+        except SinPaddingSuficiente:
+            raise
         except Exception as e:
             print(f"Error al guardar las letras sincronizadas en el archivo MP3: {e}")
             return False
@@ -1,28 +1,71 @@
-from .MP3MetadataExtractor import MP3MetadataExtractor  
-from .M4AMetadataExtractor import M4AMetadataExtractor  
-from .FLACMetadataExtractor import FLACMetadataExtractor  
+from .LyricTimeline import LyricTimeline
+from .MetadataExtractorBase import MetadataExtractorBase, SinPaddingSuficiente
+from . import CacheMetadatos, RegistroFormatos, SidecarLRC
+from typing import Any, Dict, Optional
+import os
+import shutil
+
+# Copia temporal de las escrituras atómicas (su extensión no es de audio: el escaneo la ignora)
+SUFIJO_TEMPORAL = ".guardando"
 
 
 class MetadataExtractor:
     @staticmethod
-    def get_extractor(file_path):
+    def get_extractor(file_path, fileobj=None):
+        """
+        Extractor para el archivo según su firma (primeros bytes), no su extensión; si la firma no
+        es concluyente, el archivo no se puede leer o el formato detectado no tiene extractor (p. ej.
+        Ogg/Opus o WAV renombrados) se usa la extensión (sin distinguir mayúsculas).
+        Los formatos y extractores disponibles están en RegistroFormatos.
+        :param fileobj: Archivo ya abierto en binario; se reutiliza para leer la firma.
+        """
+        formato = None
         try:
-            if file_path.endswith(".mp3"):
-                return MP3MetadataExtractor()
-            elif file_path.endswith(".flac"):
-                return FLACMetadataExtractor()
-            elif file_path.endswith(".m4a"):
-                return M4AMetadataExtractor()
+            if fileobj is not None:
+                formato = RegistroFormatos.detectar_formato_archivo(fileobj)
             else:
-                raise ValueError("Formato de archivo no soportado")
-        except Exception as e:
-            raise
+                with open(file_path, "rb") as f:
+                    formato = RegistroFormatos.detectar_formato_archivo(f)
+        except OSError:
+            formato = None
+        if not RegistroFormatos.tiene_extractor(formato):
+            # Si la extensión tampoco tiene extractor el error nombra el formato detectado
+            formato = RegistroFormatos.formato_por_extension(file_path) or formato
+        return RegistroFormatos.crear_extractor(formato)
 
     @staticmethod
-    def extract_metadata(file_path):
+    def extract_metadata(file_path, include_lyrics: bool = True, sidecar: Optional[str] = None):
+        """
+        Extrae los metadatos del archivo. Si se piden las letras y hay un .lrc junto al audio con
+        letras, éstas sustituyen a las de las etiquetas (ver SidecarLRC) y metadata["fuente_letras"]
+        vale "sidecar" (si no, "etiquetas").
+        Los resultados se recuerdan en CacheMetadatos mientras el archivo no cambie (tamaño y mtime);
+        el diccionario devuelto es siempre una copia que se puede modificar.
+        :param sidecar: Ruta del .lrc si ya se conoce (escaneo), "" si se sabe que no hay,
+                        None para comprobarlo en disco.
+        """
         try:
-            extractor = MetadataExtractor.get_extractor(file_path)
-            return extractor.extract_metadata(file_path)
+            # El stat previo a la lectura valida la entrada de la caché: si el archivo cambia mientras
+            # se parsea, la siguiente consulta ya no coincide y se vuelve a extraer
+            st = os.stat(file_path)
+            metadata = CacheMetadatos.obtener(file_path, st.st_size, st.st_mtime_ns, include_lyrics)
+            if metadata is None:
+                # Una sola apertura: la firma se lee del mismo archivo que luego parsea el extractor
+                with open(file_path, "rb") as f:
+                    extractor = MetadataExtractor.get_extractor(file_path, fileobj=f)
+                    metadata = extractor.extract_metadata(file_path, include_lyrics=include_lyrics, fileobj=f)
+                if isinstance(metadata.get("timeline"), LyricTimeline):
+                    # Letras tal como están en el archivo: permite omitir un guardado que no cambia nada
+                    MetadataExtractorBase.recordar_letras(file_path, metadata["timeline"])
+                CacheMetadatos.guardar(file_path, st.st_size, st.st_mtime_ns, include_lyrics, metadata)
+            if include_lyrics:
+                metadata["fuente_letras"] = "etiquetas"
+                timeline = MetadataExtractor._leer_sidecar(file_path, sidecar)
+                if timeline is not None:
+                    metadata["timeline"] = timeline
+                    metadata["lyrics"] = timeline.to_lyrics()
+                    metadata["fuente_letras"] = "sidecar"
+            return metadata
         except Exception as e:
             return {
                 "title": "Desconocido",
@@ -34,17 +77,148 @@ class MetadataExtractor:
             }
 
     @staticmethod
-    def write_metadata(file_path, metadata):
+    def extract_lyrics(file_path):
+        """
+        Lee únicamente las letras de un archivo (carga diferida de Song.timeline).
+        :return: Lista de diccionarios {"ts", "lyrc"}; vacía si no hay letras o el formato no es soportado.
+        """
+        lyrics = MetadataExtractor.extract_metadata(file_path).get("lyrics", [])
+        return lyrics if isinstance(lyrics, list) else []
+
+    @staticmethod
+    def _leer_sidecar(file_path, sidecar: Optional[str] = None) -> Optional[LyricTimeline]:
+        """Letras del .lrc de `file_path` si existe y tiene alguna línea; None en otro caso."""
+        ruta = SidecarLRC.buscar(file_path) if sidecar is None else sidecar
+        if not ruta:
+            return None
+        timeline = SidecarLRC.leer(ruta)
+        return timeline if timeline else None
+
+    @staticmethod
+    def extract_timeline(file_path, sidecar: Optional[str] = None) -> LyricTimeline:
+        """
+        Como extract_lyrics pero devuelve un LyricTimeline (carga diferida de Song.timeline).
+        Si hay un .lrc con letras se usa sin abrir el audio.
+        :return: LyricTimeline vacío si no hay letras o el formato no es soportado.
+        """
+        timeline = MetadataExtractor._leer_sidecar(file_path, sidecar)
+        if timeline is not None:
+            return timeline
+        metadata = MetadataExtractor.extract_metadata(file_path, sidecar="")
+        timeline = metadata.get("timeline")
+        if isinstance(timeline, LyricTimeline):
+            return timeline
+        lyrics = metadata.get("lyrics", [])
+        return LyricTimeline.from_lyrics(lyrics) if isinstance(lyrics, list) else LyricTimeline()
+
+    @staticmethod
+    def write_metadata(file_path, metadata, atomico: bool = False, forzar: bool = False,
+                       informe: Optional[Dict[str, Any]] = None, sidecar: Optional[bool] = None) -> bool:
         """
         Escribe los metadatos en el archivo utilizando el extractor correspondiente.
+        Las etiquetas se actualizan en el lugar cuando caben en el padding existente (padding ID3,
+        bloque PADDING de FLAC, átomo `free` de M4A); si no caben, o el padding restante supera
+        PADDING_MAXIMO, se reescribe el archivo dejando PADDING_GENEROSO de margen para que los
+        siguientes guardados sí quepan y sigan siendo pequeños.
         :param file_path: Ruta del archivo de audio.
         :param metadata: Diccionario con los metadatos a escribir.
+        :param atomico: Si True, cuando hace falta reescribir el archivo entero se escribe sobre una copia
+                        junto al archivo ("<ruta>.guardando") y se reemplaza el original con os.replace:
+                        si la aplicación se cierra a mitad de la escritura el archivo queda en su versión
+                        anterior. Las actualizaciones en el lugar sólo tocan la región de etiquetas.
+        :param forzar: Si False y las letras son iguales a las que ya tiene el archivo no se escribe nada
+                       (ni se cambia su mtime); ver estadisticas_escritura().
+        :param informe: Diccionario opcional que se rellena con {"omitida", "en_sitio", "bytes_escritos", "sidecar"}.
+        :param sidecar: Dónde se escriben las letras: True en el .lrc junto al audio (se crea si no existe;
+                        el audio no se toca), False en las etiquetas, None (por defecto) en el .lrc si ya
+                        existe (sus letras ganan al leer) y si no en las etiquetas.
+        :return: True si el extractor pudo escribir (o no hacía falta).
         """
+        if informe is None:
+            informe = {}
+        informe.update(omitida=False, en_sitio=False, bytes_escritos=0, sidecar=False)
+        lyrics = metadata.get("lyrics")
+        ruta_lrc = SidecarLRC.ruta_sidecar(file_path) if sidecar else (SidecarLRC.buscar(file_path) if sidecar is None else None)
+        if ruta_lrc and isinstance(lyrics, (list, LyricTimeline)):
+            return MetadataExtractor._escribir_sidecar(ruta_lrc, lyrics, forzar, informe)
         try:
             extractor = MetadataExtractor.get_extractor(file_path)
-            extractor.write_metadata(file_path, metadata)
+            if not forzar and lyrics is not None and extractor.letras_sin_cambios(file_path, lyrics):
+                MetadataExtractorBase.contar_escritura(omitida=True)
+                informe["omitida"] = True
+                print(f"Letras sin cambios, no se reescribe el archivo: {file_path}")
+                return True
+            if not atomico:
+                ok = bool(extractor.write_metadata(file_path, metadata))
+                informe.update(extractor.ultima_escritura)
+            else:
+                try:
+                    # Primero en el lugar: si la etiqueta no cabe se aborta antes de escribir nada
+                    ok = bool(extractor.write_metadata(file_path, metadata, solo_en_sitio=True))
+                    informe.update(extractor.ultima_escritura)
+                except SinPaddingSuficiente:
+                    temporal = file_path + SUFIJO_TEMPORAL
+                    # Tamaño del original antes de copiarlo: lo que escribe la copia
+                    copiados = os.path.getsize(file_path)
+                    try:
+                        shutil.copy2(file_path, temporal)
+                        extractor.ruta_informe = file_path
+                        ok = bool(extractor.write_metadata(temporal, metadata))
+                        if ok:
+                            os.replace(temporal, file_path)
+                    finally:
+                        extractor.ruta_informe = None
+                        if os.path.exists(temporal):
+                            os.remove(temporal)
+                    # La copia y la reescritura de la copia producen un único archivo nuevo: se cuenta
+                    # la copia más lo que la reescritura añade (el padding nuevo), no las dos enteras
+                    reescritos = extractor.ultima_escritura["bytes_escritos"]
+                    escritos = copiados + max(0, reescritos - copiados)
+                    with MetadataExtractorBase._lock_hashes:
+                        MetadataExtractorBase.estadisticas_escritura["bytes_escritos"] += escritos - reescritos
+                    informe.update(en_sitio=False, bytes_escritos=escritos)
+            if ok:
+                MetadataExtractorBase.contar_escritura(omitida=False)
+                if isinstance(lyrics, (list, LyricTimeline)):
+                    MetadataExtractorBase.recordar_letras(file_path, lyrics)
+            return ok
         except Exception as e:
             print(f"Error al escribir los metadatos en el archivo {file_path}: {e}")
             raise
-        
-   
\ No newline at end of file
+        finally:
+            # También si falló a medias: la próxima lectura debe ver lo que haya en disco
+            if not informe["omitida"]:
+                CacheMetadatos.invalidar(file_path)
+
+    @staticmethod
+    def _escribir_sidecar(ruta_lrc: str, lyrics, forzar: bool, informe: Dict[str, Any]) -> bool:
+        timeline = lyrics if isinstance(lyrics, LyricTimeline) else LyricTimeline.from_lyrics(lyrics)
+        informe["sidecar"] = True
+        if not forzar and SidecarLRC.leer(ruta_lrc) == timeline:
+            MetadataExtractorBase.contar_escritura(omitida=True)
+            informe["omitida"] = True
+            print(f"Letras sin cambios, no se reescribe el archivo: {ruta_lrc}")
+            return True
+        try:
+            escritos = SidecarLRC.escribir(ruta_lrc, timeline)
+        except OSError as e:
+            print(f"Error al escribir las letras en {ruta_lrc}: {e}")
+            return False
+        informe["bytes_escritos"] = escritos
+        MetadataExtractorBase.contar_escritura(omitida=False)
+        with MetadataExtractorBase._lock_hashes:
+            MetadataExtractorBase.estadisticas_escritura["bytes_escritos"] += escritos
+        print(f"Letras sincronizadas guardadas correctamente en {ruta_lrc} ({escritos} bytes escritos)")
+        return True
+
+    @staticmethod
+    def estadisticas_cache():
+        """Aciertos, fallos, invalidaciones y memoria estimada de la caché de metadatos (ver CacheMetadatos)."""
+        return CacheMetadatos.resumen()
+
+    @staticmethod
+    def estadisticas_escritura():
+        """Escrituras de letras desde el inicio de la aplicación: realizadas, omitidas por no haber cambios,
+        en el lugar, reescrituras completas y bytes escritos."""
+        with MetadataExtractorBase._lock_hashes:
+            return dict(MetadataExtractorBase.estadisticas_escritura)
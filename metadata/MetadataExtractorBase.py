@@ -1,21 +1,203 @@
+import hashlib
+import os
+import threading
 from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Union
+
+from . import CacheMetadatos, LRCCodec
+from .LyricTimeline import LyricTimeline
+
+# Padding que se reserva cuando la etiqueta no cabe y hay que reescribir el archivo entero:
+# deja sitio para que los próximos guardados de letras se hagan en el lugar.
+PADDING_GENEROSO = 64 * 1024
+# Padding máximo que se conserva al guardar en el lugar: mutagen vuelve a escribir todo el padding en
+# cada guardado, así que uno mayor (p. ej. tras quitar una etiqueta grande) se recorta a PADDING_GENEROSO
+PADDING_MAXIMO = 2 * PADDING_GENEROSO
+
+
+class SinPaddingSuficiente(Exception):
+    """La etiqueta nueva no cabe en el padding actual (o éste es excesivo y hay que recortarlo):
+    guardarla obliga a mover el audio."""
+
+
+class ArchivoContado:
+    """Envuelve un archivo abierto en "r+b" y cuenta los bytes que mutagen escribe en él con write().
+    Los movimientos de datos de mutagen (mmap sobre fileno()) no pasan por aquí: ver _guardar_con_padding."""
+    def __init__(self, fileobj):
+        self._f = fileobj
+        self.bytes_escritos = 0
+
+    def write(self, data) -> int:
+        n = self._f.write(data)
+        self.bytes_escritos += len(data) if n is None else n
+        return n
+
+    def __getattr__(self, name):
+        return getattr(self._f, name)
+
 
 class MetadataExtractorBase(ABC):
+    # Escrituras de letras (todas las instancias): realizadas, omitidas porque las letras no cambiaron,
+    # hechas en el lugar (sólo la región de etiquetas), reescrituras completas y bytes escritos
+    estadisticas_escritura: Dict[str, int] = {"realizadas": 0, "omitidas": 0, "en_sitio": 0,
+                                              "reescrituras": 0, "bytes_escritos": 0}
+    _lock_hashes = threading.Lock()
+    # Resultado de la última escritura de esta instancia: {"bytes_escritos": int, "en_sitio": bool}
+    ultima_escritura: Dict[str, Any] = {"bytes_escritos": 0, "en_sitio": False}
+    # Ruta que muestran los mensajes de guardado cuando se escribe sobre una copia temporal
+    # (escritura atómica): la del archivo final, no la de la copia
+    ruta_informe: Optional[str] = None
+
     @abstractmethod
-    def extract_metadata(self, file_path):
+    def extract_metadata(self, file_path, include_lyrics: bool = True, fileobj=None):
         """
         Extrae los metadatos de un archivo de audio.
         :param file_path: Ruta del archivo de audio.
+        :param include_lyrics: Si False sólo se leen título, artista, álbum y duración (lyrics queda vacío).
+        :param fileobj: Archivo ya abierto en binario (p. ej. el que se usó para detectar el formato);
+                        si se pasa se parsea desde él en lugar de volver a abrir `file_path`.
         :return: Diccionario con los metadatos.
         """
         pass
 
     @abstractmethod
-    def write_metadata(self, file_path, metadataLyrics):
+    def write_metadata(self, file_path, metadataLyrics, solo_en_sitio: bool = False):
         """
         Escribe los metadatos en un archivo de audio.
         :param file_path: Ruta del archivo de audio.
         :param metadataLyrics: Diccionario con los metadatos a escribir.
+        :param solo_en_sitio: Si True lanza SinPaddingSuficiente (sin haber escrito nada) cuando la
+                              etiqueta no cabe en el padding actual.
+        El resultado de la última escritura queda en `self.ultima_escritura` (ver _guardar_con_padding).
         """
         pass
-    
\ No newline at end of file
+
+    def _politica_padding(self, solo_en_sitio: bool):
+        """
+        Callback `padding=` de mutagen: si la etiqueta cabe y el padding restante no pasa de
+        PADDING_MAXIMO se conserva el tamaño de la región (sólo se reescriben las etiquetas); si no,
+        se deja PADDING_GENEROSO (como mucho PADDING_MAXIMO) para los próximos guardados, o se aborta
+        antes de escribir si solo_en_sitio.
+        """
+        def politica(info) -> int:
+            if 0 <= info.padding <= PADDING_MAXIMO:
+                self.ultima_escritura["en_sitio"] = True
+                return info.padding
+            if solo_en_sitio:
+                raise SinPaddingSuficiente()
+            self.ultima_escritura["en_sitio"] = False
+            return min(max(PADDING_GENEROSO, info.get_default_padding()), PADDING_MAXIMO)
+        return politica
+
+    def _guardar_con_padding(self, file_path, guardar, solo_en_sitio: bool) -> None:
+        """
+        Llama a `guardar(fileobj, padding)` (el save de mutagen) sobre el archivo abierto en "r+b"
+        y contando los bytes escritos. Deja en `self.ultima_escritura` {"bytes_escritos", "en_sitio"}.
+        En el lugar se cuentan las escrituras de la región de etiquetas; en una reescritura completa
+        mutagen mueve el audio con mmap (sin pasar por ArchivoContado) desde la región hasta el final,
+        así que se cuenta el tamaño final del archivo.
+        """
+        self.ultima_escritura = {"bytes_escritos": 0, "en_sitio": True}
+        with open(file_path, "r+b") as f:
+            contado = ArchivoContado(f)
+            guardar(contado, self._politica_padding(solo_en_sitio))
+            f.flush()
+            tamano = os.fstat(f.fileno()).st_size
+        escritos = contado.bytes_escritos
+        if not self.ultima_escritura["en_sitio"]:
+            escritos = max(escritos, tamano)
+        self.ultima_escritura["bytes_escritos"] = escritos
+        with self._lock_hashes:
+            est = MetadataExtractorBase.estadisticas_escritura
+            est["en_sitio" if self.ultima_escritura["en_sitio"] else "reescrituras"] += 1
+            est["bytes_escritos"] += escritos
+
+    def informar_guardado(self, formato: str, file_path) -> None:
+        """Mensaje de guardado correcto con los bytes escritos y el modo de la última escritura."""
+        modo = "en el lugar" if self.ultima_escritura["en_sitio"] else "reescribiendo el archivo"
+        print(f"Letras sincronizadas guardadas correctamente en el archivo {formato}: {self.ruta_informe or file_path} "
+              f"({self.ultima_escritura['bytes_escritos']} bytes escritos, {modo})")
+
+    def formatear_Lyrics(self, lyrics_crudo) -> List[Dict[str, str]]:
+        """
+        Procesa las letras crudas provenientes de los metadatos y las formatea en una estructura limpia.
+        :param lyrics_crudo: Texto crudo de las letras con marcas de tiempo (LRC).
+        :return: Lista de diccionarios {"ts": "MM:SS.mmm", "lyrc": texto}.
+        """
+        try:
+            return LRCCodec.parsear_lyrics(lyrics_crudo)
+        except Exception as e:
+            print(f"Error al formatear las letras: {e}")
+            return []
+
+    def formatear_timeline(self, lyrics_crudo) -> LyricTimeline:
+        """Como formatear_Lyrics pero devuelve un LyricTimeline (tiempos ya en ms, sin pasar por "MM:SS.mmm")."""
+        try:
+            return LyricTimeline.from_lrc(LRCCodec.parsear(lyrics_crudo).lineas)
+        except Exception as e:
+            print(f"Error al formatear las letras: {e}")
+            return LyricTimeline()
+
+    def asignar_letras(self, metadata: Dict[str, Any], timeline: LyricTimeline) -> None:
+        """Guarda las letras en el diccionario de metadatos: "timeline" y la lista histórica "lyrics"."""
+        metadata["timeline"] = timeline
+        metadata["lyrics"] = timeline.to_lyrics()
+
+    def lyrics_a_texto(self, lyrics: Union[LyricTimeline, List[Dict[str, Any]]]) -> str:
+        """Texto LRC que se escribe en la etiqueta de letras (ver LRCCodec.serializar)."""
+        if isinstance(lyrics, LyricTimeline):
+            return LRCCodec.serializar(lyrics.to_lrc())
+        return LRCCodec.serializar(lyrics)
+
+    def texto_letras(self, file_path) -> Optional[str]:
+        """Texto de la etiqueta de letras tal como está en el archivo (None si no tiene)."""
+        return None
+
+    @staticmethod
+    def hash_letras(lyrics: Union[LyricTimeline, List[Dict[str, Any]]]) -> bytes:
+        """Hash del contenido de las letras (tiempos en ms, textos y palabras con tiempo del LRC extendido),
+        independiente del formato de la etiqueta."""
+        timeline = lyrics if isinstance(lyrics, LyricTimeline) else LyricTimeline.from_lyrics(lyrics)
+        h = hashlib.blake2b(timeline.starts.tobytes(), digest_size=16)
+        # Texto tal como se escribirá (con las marcas <mm:ss.xx> si las tiene): cambiar sólo una
+        # palabra también cuenta como cambio
+        textos = (LRCCodec.texto_extendido(texto, palabras) if palabras else texto
+                  for texto, palabras in zip(timeline.texts, timeline.palabras))
+        h.update("\x00".join(textos).encode("utf-8"))
+        return h.digest()
+
+    @classmethod
+    def recordar_letras(cls, file_path, lyrics: Union[LyricTimeline, List[Dict[str, Any]]]) -> None:
+        """Recuerda el hash de las letras que tiene ahora el archivo (tras leerlas o escribirlas).
+        Se guarda en CacheMetadatos, con el mismo límite de memoria que los metadatos."""
+        try:
+            st = os.stat(file_path)
+        except OSError:
+            return
+        CacheMetadatos.guardar_hash(file_path, st.st_size, st.st_mtime_ns, cls.hash_letras(lyrics))
+
+    def letras_sin_cambios(self, file_path, lyrics: Union[LyricTimeline, List[Dict[str, Any]]]) -> bool:
+        """
+        True si `lyrics` coincide con las letras que ya tiene el archivo, para no reescribirlo.
+        Usa el hash recordado si el archivo no cambió desde entonces (mismo tamaño y mtime);
+        si no, lee la etiqueta actual y compara su contenido.
+        """
+        if not isinstance(lyrics, (list, LyricTimeline)):
+            return False
+        try:
+            st = os.stat(file_path)
+        except OSError:
+            return False
+        nuevo = self.hash_letras(lyrics)
+        previo = CacheMetadatos.obtener_hash(file_path, st.st_size, st.st_mtime_ns)
+        if previo is not None:
+            return previo == nuevo
+        # Sin hash recordado o el archivo cambió fuera de la aplicación: comparar con la etiqueta
+        actual = self.hash_letras(self.formatear_timeline(self.texto_letras(file_path) or ""))
+        CacheMetadatos.guardar_hash(file_path, st.st_size, st.st_mtime_ns, actual)
+        return actual == nuevo
+
+    @classmethod
+    def contar_escritura(cls, omitida: bool) -> None:
+        with cls._lock_hashes:
+            cls.estadisticas_escritura["omitidas" if omitida else "realizadas"] += 1
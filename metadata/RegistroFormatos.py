@@ -0,0 +1,146 @@
+"""
+Registro de formatos de audio: qué extractor corresponde a cada archivo.
+
+El formato se detecta por los primeros bytes del archivo (firma), no por la extensión; la
+extensión sólo se usa si la firma no es concluyente (o el archivo aún no existe) y para que el
+escaneo sepa qué archivos considerar. Los extractores se registran como clase o como cadena
+"modulo:Clase"; en el segundo caso el módulo (y mutagen) sólo se importa al usarlo por primera vez.
+"""
+import importlib
+import os
+import threading
+from typing import Callable, Dict, List, Optional, Tuple, Type, Union
+
+# Bytes que se leen para detectar el formato (MP4 necesita 12, Ogg/Opus 36)
+TAM_CABECERA = 64
+
+Detector = Callable[[bytes], bool]
+ExtractorRegistrado = Union[Type, str]
+
+_lock = threading.Lock()
+_firmas: List[Tuple[str, Detector]] = []
+_extractores: Dict[str, ExtractorRegistrado] = {}
+_extensiones: Dict[str, str] = {}  # ".mp3" -> "mp3"
+
+
+def registrar_firma(formato: str, detector: Detector, primero: bool = False) -> None:
+    """Añade un detector (cabecera -> bool) para `formato`; con primero=True tiene prioridad sobre los existentes."""
+    with _lock:
+        if primero:
+            _firmas.insert(0, (formato, detector))
+        else:
+            _firmas.append((formato, detector))
+
+
+def registrar_extractor(formato: str, extractor: Optional[ExtractorRegistrado] = None, extensiones: Tuple[str, ...] = ()):
+    """
+    Registra el extractor de `formato` y las extensiones que el escaneo debe aceptar para él.
+    `extractor` puede ser la clase o "paquete.modulo:Clase" (importación diferida).
+    Sin `extractor` devuelve un decorador de clase:
+
+        @registrar_extractor("ogg", extensiones=(".ogg", ".oga"))
+        class OggMetadataExtractor(MetadataExtractorBase): ...
+    """
+    def registrar(clase: ExtractorRegistrado) -> ExtractorRegistrado:
+        with _lock:
+            _extractores[formato] = clase
+            for ext in extensiones:
+                _extensiones[ext.lower()] = formato
+        return clase
+    if extractor is None:
+        return registrar
+    return registrar(extractor)
+
+
+def extensiones_registradas() -> frozenset:
+    """Extensiones (en minúsculas, con punto) de los formatos que tienen extractor."""
+    with _lock:
+        return frozenset(ext for ext, formato in _extensiones.items() if formato in _extractores)
+
+
+def _tam_id3(cabecera: bytes) -> int:
+    """Tamaño total de una etiqueta ID3v2 al inicio de `cabecera` (cabecera + cuerpo + pie)."""
+    cuerpo = (cabecera[6] << 21) | (cabecera[7] << 14) | (cabecera[8] << 7) | cabecera[9]
+    pie = 10 if cabecera[5] & 0x10 else 0
+    return 10 + cuerpo + pie
+
+
+def detectar_formato(cabecera: bytes) -> Optional[str]:
+    """Formato según los primeros bytes del archivo, o None si ninguna firma coincide."""
+    with _lock:
+        firmas = list(_firmas)
+    for formato, detector in firmas:
+        try:
+            if detector(cabecera):
+                return formato
+        except IndexError:
+            continue
+    return None
+
+
+def detectar_formato_archivo(fileobj) -> Optional[str]:
+    """
+    Detecta el formato leyendo del archivo abierto (en binario) y lo deja posicionado al inicio.
+    Si empieza con una etiqueta ID3 se mira también lo que hay detrás (FLAC con ID3 delante).
+    """
+    fileobj.seek(0)
+    cabecera = fileobj.read(TAM_CABECERA)
+    formato = detectar_formato(cabecera)
+    if formato == "mp3" and cabecera[:3] == b"ID3" and len(cabecera) >= 10:
+        fileobj.seek(_tam_id3(cabecera))
+        detras = detectar_formato(fileobj.read(TAM_CABECERA))
+        if detras is not None and detras != "mp3":
+            formato = detras
+    fileobj.seek(0)
+    return formato
+
+
+def tiene_extractor(formato: Optional[str]) -> bool:
+    """True si `formato` tiene un extractor registrado (sin importarlo)."""
+    with _lock:
+        return formato in _extractores
+
+
+def formato_por_extension(file_path: str) -> Optional[str]:
+    with _lock:
+        return _extensiones.get(os.path.splitext(file_path)[1].lower())
+
+
+def crear_extractor(formato: Optional[str]):
+    """Instancia el extractor registrado para `formato` (importando su módulo si hace falta)."""
+    with _lock:
+        extractor = _extractores.get(formato) if formato else None
+    if extractor is None:
+        raise ValueError(f"Formato de archivo no soportado: {formato or 'desconocido'}")
+    if isinstance(extractor, str):
+        modulo, _, nombre = extractor.partition(":")
+        clase = getattr(importlib.import_module(modulo), nombre)
+        with _lock:
+            if _extractores.get(formato) == extractor:
+                _extractores[formato] = clase
+        extractor = clase
+    return extractor()
+
+
+# --- Firmas conocidas ---
+def _es_mpeg(c: bytes) -> bool:
+    # Sincronía de frame (11 bits a 1) y capa distinta de 00 (00 = AAC ADTS, no MP3)
+    return c[0] == 0xFF and (c[1] & 0xE0) == 0xE0 and (c[1] & 0x06) != 0
+
+
+def _es_opus(c: bytes) -> bool:
+    return c[:4] == b"OggS" and c[28:36] == b"OpusHead"
+
+
+registrar_firma("mp3", lambda c: c[:3] == b"ID3")
+registrar_firma("flac", lambda c: c[:4] == b"fLaC")
+registrar_firma("mp4", lambda c: c[4:8] == b"ftyp")
+registrar_firma("opus", _es_opus)
+registrar_firma("ogg", lambda c: c[:4] == b"OggS")
+registrar_firma("wav", lambda c: c[:4] == b"RIFF" and c[8:12] == b"WAVE")
+registrar_firma("mp3", _es_mpeg)
+
+# --- Extractores incluidos (importación diferida) ---
+registrar_extractor("mp3", "metadata.MP3MetadataExtractor:MP3MetadataExtractor", (".mp3",))
+registrar_extractor("flac", "metadata.FLACMetadataExtractor:FLACMetadataExtractor", (".flac",))
+registrar_extractor("mp4", "metadata.M4AMetadataExtractor:M4AMetadataExtractor", (".m4a",))
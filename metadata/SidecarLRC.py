@@ -0,0 +1,160 @@
+"""
+Letras en archivos .lrc junto al audio ("Canción.lrc" al lado de "Canción.mp3").
+
+Regla de prioridad: si existe un .lrc con al menos una línea con tiempo, sus letras ganan sobre
+las de las etiquetas del audio; un .lrc vacío o sin marcas de tiempo se ignora. Por coherencia,
+al guardar unas letras que se leyeron de un .lrc se escribe en el .lrc (ver
+MetadataExtractor.write_metadata), porque si no la próxima lectura volvería a mostrar el .lrc.
+
+Las lecturas se cachean por (ruta, mtime_ns, tamaño); los archivos grandes se leen con mmap.
+"""
+import mmap
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Tuple
+
+from . import LRCCodec
+from .LyricTimeline import LyricTimeline
+
+EXTENSION = ".lrc"
+# A partir de este tamaño el archivo se mapea en memoria en lugar de leerse con read()
+UMBRAL_MMAP = 64 * 1024
+# Entradas de la caché de .lrc parseados (las más antiguas se descartan)
+MAX_CACHE = 512
+
+_lock = threading.Lock()
+_cache: "OrderedDict[str, Tuple[int, int, LyricTimeline]]" = OrderedDict()
+estadisticas: Dict[str, int] = {"lecturas": 0, "aciertos_cache": 0, "mmap": 0, "escrituras": 0}
+
+
+def ruta_sidecar(audio_path: str) -> str:
+    """Ruta del .lrc que correspondería a `audio_path` (exista o no)."""
+    return os.path.splitext(audio_path)[0] + EXTENSION
+
+
+def buscar(audio_path: str) -> Optional[str]:
+    """Ruta del .lrc de `audio_path` si existe (un stat); fuera del escaneo, que ya lo sabe por el listado."""
+    ruta = ruta_sidecar(audio_path)
+    return ruta if os.path.isfile(ruta) else None
+
+
+def emparejar(audios: Iterable[str], lrcs: Iterable[str]) -> Dict[str, str]:
+    """
+    Empareja los audios de una carpeta con los .lrc de la misma carpeta por nombre sin extensión
+    (sin stats: sólo nombres del listado). Si no hay coincidencia exacta se acepta la que sólo
+    difiere en mayúsculas ("Canción.LRC", "canción.lrc").
+    :return: {ruta_audio: ruta_lrc}
+    """
+    exactos: Dict[str, str] = {}
+    sin_mayusculas: Dict[str, str] = {}
+    for ruta in lrcs:
+        base = os.path.splitext(ruta)[0]
+        exactos[base] = ruta
+        sin_mayusculas.setdefault(base.lower(), ruta)
+    if not exactos:
+        return {}
+    pares: Dict[str, str] = {}
+    for audio in audios:
+        base = os.path.splitext(audio)[0]
+        ruta = exactos.get(base) or sin_mayusculas.get(base.lower())
+        if ruta is not None:
+            pares[audio] = ruta
+    return pares
+
+
+def _leer_texto(ruta: str, tam: int) -> str:
+    """Texto del .lrc; los archivos grandes se decodifican directamente desde el mapeo, sin copiarlos
+    antes a un bytes."""
+    with open(ruta, "rb") as f:
+        if tam >= UMBRAL_MMAP:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+                with _lock:
+                    estadisticas["mmap"] += 1
+                with memoryview(m) as datos:
+                    return _decodificar(datos)
+        return _decodificar(f.read())
+
+
+def _decodificar(datos) -> str:
+    """Decodifica bytes o un buffer (memoryview de un mmap): UTF-8 (con o sin BOM) o, si no lo es, latin-1."""
+    try:
+        return str(datos, "utf-8-sig")
+    except UnicodeDecodeError:
+        return str(datos, "latin-1")
+
+
+def leer(ruta: str) -> Optional[LyricTimeline]:
+    """
+    Letras del .lrc `ruta` como LyricTimeline (con el [offset:] ya aplicado), o None si no existe
+    o no se puede leer. El parseo se reutiliza mientras el archivo no cambie (mtime y tamaño).
+    """
+    try:
+        st = os.stat(ruta)
+    except OSError:
+        return None
+    with _lock:
+        previo = _cache.get(ruta)
+        if previo is not None and previo[0] == st.st_mtime_ns and previo[1] == st.st_size:
+            _cache.move_to_end(ruta)
+            estadisticas["aciertos_cache"] += 1
+            return previo[2].copy()
+    try:
+        texto = _leer_texto(ruta, st.st_size)
+    except (OSError, ValueError) as e:
+        print(f"Error al leer el archivo de letras {ruta}: {e}")
+        return None
+    timeline = LyricTimeline.from_lrc(LRCCodec.parsear(texto).lineas)
+    with _lock:
+        estadisticas["lecturas"] += 1
+    _recordar(ruta, st, timeline)
+    return timeline.copy()  # la copia en caché no debe verse afectada si se edita la devuelta
+
+
+def _recordar(ruta: str, st: os.stat_result, timeline: LyricTimeline) -> None:
+    with _lock:
+        _cache[ruta] = (st.st_mtime_ns, st.st_size, timeline)
+        _cache.move_to_end(ruta)
+        while len(_cache) > MAX_CACHE:
+            _cache.popitem(last=False)
+
+
+def _etiquetas_existentes(ruta: str) -> Dict[str, str]:
+    """Etiquetas [ar:], [ti:]... del .lrc actual, para conservarlas al reescribirlo (sin [offset:],
+    que ya está aplicado a los tiempos)."""
+    try:
+        with open(ruta, "rb") as f:
+            inicio = f.read(4096)
+        # Cortar en el último salto de línea para no partir un carácter multibyte
+        corte = inicio.rfind(b"\n")
+        etiquetas = LRCCodec.parsear(_decodificar(inicio[:corte + 1] if corte >= 0 else inicio)).etiquetas
+    except OSError:
+        return {}
+    etiquetas.pop("offset", None)
+    return etiquetas
+
+
+def escribir(ruta: str, timeline: LyricTimeline) -> int:
+    """
+    Escribe las letras en el .lrc `ruta` (UTF-8) de forma atómica: archivo temporal + os.replace.
+    Se conservan las etiquetas de identificación que tuviera. Devuelve los bytes escritos.
+    """
+    texto = LRCCodec.serializar(timeline.to_lrc(), _etiquetas_existentes(ruta)) + "\n"
+    datos = texto.encode("utf-8")
+    temporal = ruta + ".guardando"
+    try:
+        with open(temporal, "wb") as f:
+            f.write(datos)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporal, ruta)
+    finally:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+    with _lock:
+        estadisticas["escrituras"] += 1
+    try:
+        _recordar(ruta, os.stat(ruta), timeline.copy())
+    except OSError:
+        pass
+    return len(datos)
@@ -0,0 +1,104 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+class MediaPool:
+    """Pool LRU de `vlc.Media` ya creados y analizados, por ruta de archivo.
+
+    Al cambiar de canción se reutiliza el media precargado (el archivo ya está sondeado y su
+    duración es conocida) en lugar de crear y analizar uno nuevo. Cada entrada se valida con el
+    mtime y el tamaño del archivo: si cambió (p. ej. al guardar letras que reescriben el archivo)
+    se crea de nuevo. Los media descartados se liberan, salvo el que está en uso por el player,
+    que se libera cuando deja de estarlo.
+    """
+
+    def __init__(self, create: Callable[[str], Any], capacity: int = 8):
+        """:param create: Crea el media de una ruta y lanza su análisis en segundo plano."""
+        self._create = create
+        self.capacity = max(1, int(capacity))
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[Any, int, int]]" = OrderedDict()  # ruta -> (media, mtime_ns, tamaño)
+        self._in_use = None
+        self.estadisticas: Dict[str, int] = {"aciertos": 0, "fallos": 0, "precargas": 0, "descartes": 0}
+
+    @staticmethod
+    def _firma(file_path: str) -> Optional[Tuple[int, int]]:
+        try:
+            st = os.stat(file_path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def _get(self, file_path: str, prefetch: bool):
+        firma = self._firma(file_path)
+        if firma is None:
+            return None
+        with self._lock:
+            entry = self._entries.get(file_path)
+            if entry is not None and entry[1:] == firma:
+                self._entries.move_to_end(file_path)
+                if not prefetch:
+                    self.estadisticas["aciertos"] += 1
+                return entry[0]
+        # Crear fuera del lock: media_new no bloquea, pero no hace falta serializarlo
+        media = self._create(file_path)
+        if media is None:
+            return None
+        descartados = []
+        with self._lock:
+            self.estadisticas["precargas" if prefetch else "fallos"] += 1
+            previa = self._entries.pop(file_path, None)
+            if previa is not None:
+                descartados.append(previa[0])
+            self._entries[file_path] = (media,) + firma
+            while len(self._entries) > self.capacity:
+                _, (viejo, _, _) = self._entries.popitem(last=False)
+                descartados.append(viejo)
+                self.estadisticas["descartes"] += 1
+        for viejo in descartados:
+            self._release(viejo)
+        return media
+
+    def prefetch(self, file_path: str) -> None:
+        """Crea y analiza el media de `file_path` si no está ya en el pool (no bloquea)."""
+        if file_path:
+            self._get(file_path, prefetch=True)
+
+    def acquire(self, file_path: str):
+        """Media para reproducir `file_path` (del pool si es válido); queda marcado como en uso."""
+        media = self._get(file_path, prefetch=False)
+        with self._lock:
+            anterior, self._in_use = self._in_use, media
+            suelto = anterior is not None and anterior is not media and not self._contains(anterior)
+        if suelto:
+            self._release(anterior)
+        return media
+
+    def _contains(self, media) -> bool:
+        return any(entry[0] is media for entry in self._entries.values())
+
+    def _release(self, media) -> None:
+        with self._lock:
+            if media is self._in_use:
+                return  # lo libera acquire() cuando el player cambie de media
+        try:
+            media.release()
+        except Exception:
+            pass
+
+    def clear(self) -> None:
+        with self._lock:
+            medias = [entry[0] for entry in self._entries.values()]
+            self._entries.clear()
+        for media in medias:
+            self._release(media)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def __contains__(self, file_path: str) -> bool:
+        with self._lock:
+            return file_path in self._entries
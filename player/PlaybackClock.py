@@ -0,0 +1,181 @@
+from PyQt6 import QtCore
+import time
+from typing import Optional
+
+try:
+    import vlc  # type: ignore
+except Exception:
+    vlc = None  # type: ignore
+
+
+class PlaybackClock(QtCore.QObject):
+    """Reloj de reproducción guiado por los eventos de VLC (sustituye al sondeo de TimeUpdaterThread).
+    - TimeChanged/LengthChanged y los cambios de estado llegan por el event manager de libvlc; entre
+      dos eventos la posición se interpola con time.monotonic() (VLC sólo avisa cada ~250 ms).
+    - El QTimer que emite timeUpdated sólo corre mientras se reproduce: en pausa o parado no hay
+      llamadas a libvlc ni trabajo periódico.
+    - timeUpdated sólo se emite si el valor cambió y no retrocede por el desfase normal entre la
+      interpolación y el siguiente evento (sí cuando se salta hacia atrás con un seek).
+    Señales (las mismas que TimeUpdaterThread): timeUpdated(ms:int), lengthUpdated(ms:int),
+                                                stateChanged(estado:str)  # "playing", "paused", "stopped", "ended", "error"
+                                                playbackStarted()
+    """
+    timeUpdated = QtCore.pyqtSignal(int)
+    lengthUpdated = QtCore.pyqtSignal(int)
+    stateChanged = QtCore.pyqtSignal(str)
+    # Primer TimeChanged con tiempo > 0 tras reset(): el audio ya está sonando
+    playbackStarted = QtCore.pyqtSignal()
+    # Los callbacks de libvlc se ejecutan en un hilo de VLC: sólo emiten esta señal y el resto
+    # se procesa en el hilo del reloj (el de la GUI) mediante una conexión en cola
+    _vlcEvent = QtCore.pyqtSignal(str, int)
+
+    # Retroceso máximo que se considera desfase de la interpolación y no un seek
+    JITTER_MS = 300
+
+    def __init__(self, player, interval_ms: int = 30, parent: Optional[QtCore.QObject] = None):
+        """:param player: VLCPlayer cuyo media player se escucha."""
+        super().__init__(parent)
+        self.player = player
+        self._anchor_ms = 0
+        self._anchor_t = time.monotonic()
+        self._rate = 1.0
+        self._playing = False
+        self._length = 0
+        self._last_emitted = -1
+        self._started = False
+        self._awaiting_play = False  # tras reset(): ignorar eventos del media anterior hasta Playing
+        self._attached = []
+
+        self._timer = QtCore.QTimer(self)
+        self._timer.setInterval(max(10, int(interval_ms)))
+        self._timer.setTimerType(QtCore.Qt.TimerType.PreciseTimer)
+        self._timer.timeout.connect(self._tick)
+        self._vlcEvent.connect(self._on_vlc_event, QtCore.Qt.ConnectionType.QueuedConnection)
+        self._attach()
+
+    # --- Eventos de VLC ---
+    def _attach(self):
+        manager = self.player.event_manager() if hasattr(self.player, 'event_manager') else None
+        if manager is None or vlc is None:
+            return
+        eventos = {
+            vlc.EventType.MediaPlayerTimeChanged: "time",
+            vlc.EventType.MediaPlayerLengthChanged: "length",
+            vlc.EventType.MediaPlayerPlaying: "playing",
+            vlc.EventType.MediaPlayerPaused: "paused",
+            vlc.EventType.MediaPlayerStopped: "stopped",
+            vlc.EventType.MediaPlayerEndReached: "ended",
+            vlc.EventType.MediaPlayerEncounteredError: "error",
+        }
+        for tipo, nombre in eventos.items():
+            try:
+                manager.event_attach(tipo, self._on_vlc_callback, nombre)
+                self._attached.append((manager, tipo))
+            except Exception:
+                pass
+
+    def _on_vlc_callback(self, event, nombre):
+        # Hilo de libvlc: no tocar el player (interbloqueo) ni la GUI
+        valor = 0
+        try:
+            if nombre == "time":
+                valor = int(event.u.new_time)
+            elif nombre == "length":
+                valor = int(event.u.new_length)
+        except Exception:
+            return
+        self._vlcEvent.emit(nombre, valor)
+
+    def _on_vlc_event(self, nombre: str, valor: int):
+        if nombre == "time":
+            self._anchor(valor)
+            if valor > 0 and not self._started and not self._awaiting_play:
+                self._started = True
+                self.playbackStarted.emit()
+            if not self._playing:
+                self._emit_time(valor, force=True)
+        elif nombre == "length":
+            if valor > 0 and valor != self._length:
+                self._length = valor
+                self.lengthUpdated.emit(valor)
+        elif nombre == "playing":
+            self._awaiting_play = False
+            try:
+                self._rate = float(self.player.player.get_rate() or 1.0)
+            except Exception:
+                self._rate = 1.0
+            self._anchor(self.position())
+            self._playing = True
+            if not self._timer.isActive():
+                self._timer.start()
+            self.stateChanged.emit(nombre)
+        else:
+            # Pausa, parada, fin o error: congelar la posición y parar el temporizador
+            self._anchor(self.position())
+            self._playing = False
+            self._timer.stop()
+            if nombre in ("stopped", "ended", "error"):
+                self._anchor(0)
+                self._last_emitted = -1
+            self._emit_time(self._anchor_ms, force=True)
+            self.stateChanged.emit(nombre)
+
+    # --- Posición ---
+    def _anchor(self, ms: int):
+        self._anchor_ms = max(0, int(ms))
+        self._anchor_t = time.monotonic()
+
+    def position(self) -> int:
+        """Posición actual en ms (interpolada mientras se reproduce); no llama a libvlc."""
+        ms = self._anchor_ms
+        if self._playing:
+            ms += int((time.monotonic() - self._anchor_t) * 1000.0 * self._rate)
+        if self._length > 0:
+            ms = min(ms, self._length)
+        return ms
+
+    def length(self) -> int:
+        return self._length
+
+    def is_playing(self) -> bool:
+        return self._playing
+
+    def seek_hint(self, ms: int):
+        """Re-ancla tras un seek pedido por la aplicación, sin esperar al TimeChanged de VLC."""
+        self._anchor(ms)
+        self._last_emitted = -1
+        self._emit_time(self._anchor_ms, force=True)
+
+    def reset(self, length_ms: int = 0):
+        """Nuevo media: posición a cero y duración conocida (o 0 hasta el LengthChanged)."""
+        self._anchor(0)
+        self._last_emitted = -1
+        self._started = False
+        self._awaiting_play = True
+        self._length = max(0, int(length_ms))
+
+    def duration_hint(self, ms: int):
+        """Duración conocida por el análisis del media; se puede llamar desde cualquier hilo."""
+        self._vlcEvent.emit("length", int(ms))
+
+    def _tick(self):
+        self._emit_time(self.position())
+
+    def _emit_time(self, ms: int, force: bool = False):
+        if ms == self._last_emitted:
+            return
+        if not force and 0 <= ms < self._last_emitted and self._last_emitted - ms <= self.JITTER_MS:
+            return
+        self._last_emitted = ms
+        self.timeUpdated.emit(ms)
+
+    def close(self):
+        """Suelta los callbacks de VLC y para el temporizador."""
+        self._timer.stop()
+        for manager, tipo in self._attached:
+            try:
+                manager.event_detach(tipo)
+            except Exception:
+                pass
+        self._attached.clear()
+        self._playing = False
@@ -1,32 +1,131 @@
-from metadata.MetadataExtractor import MetadataExtractor  
-from typing import Any, Dict, List, Optional
+import sys
+from types import MappingProxyType
+from metadata.MetadataExtractor import MetadataExtractor
+from metadata.LyricTimeline import LyricTimeline
+from typing import Any, Dict, List, Mapping, Optional, Tuple, Union
+
+def duracion_a_ms(duration: Any) -> int:
+    """
+    Convierte una duración a milisegundos enteros.
+    Acepta int (ms), float (segundos) o cadena "MM:SS:mmm" / "MM:SS.mmm" como la que generan los extractores.
+    """
+    if duration is None or isinstance(duration, bool):
+        return 0
+    if isinstance(duration, int):
+        return max(0, duration)
+    if isinstance(duration, float):
+        return max(0, int(round(duration * 1000)))
+    try:
+        partes = str(duration).strip().replace(".", ":").split(":")
+        if len(partes) == 3:
+            mins, secs, ms = partes
+            return (int(mins) * 60 + int(secs)) * 1000 + int(ms.ljust(3, "0")[:3])
+        if len(partes) == 2:
+            return (int(partes[0]) * 60 + int(partes[1])) * 1000
+    except ValueError:
+        pass
+    return 0
+
+
+def formatear_duracion(ms: int) -> str:
+    """Formatea milisegundos como "MM:SS:mmm" (formato histórico de Song.duration)."""
+    s, ms_part = divmod(int(ms), 1000)
+    return f"{s // 60:02d}:{s % 60:02d}:{ms_part:03d}"
+
+
+def _intern(valor: Any) -> Any:
+    """Interna cadenas muy repetidas (artista, álbum) para que todas las canciones compartan el mismo objeto."""
+    return sys.intern(valor) if type(valor) is str else valor
+
+
+def _a_timeline(lyrics: Any) -> LyricTimeline:
+    """Acepta LyricTimeline (se usa tal cual) o la lista histórica de dicts; cualquier otra cosa da letras vacías."""
+    if isinstance(lyrics, LyricTimeline):
+        return lyrics
+    if isinstance(lyrics, (list, tuple)):
+        return LyricTimeline.from_lyrics(lyrics)
+    return LyricTimeline()
+
 
 class Song:
-    def __init__(self, title: str, artist: str, album: str, duration: Any, lyrics: Optional[List[Dict[str, Any]]] = None, file_path: Optional[str] = None):
+    # Sin __dict__ por instancia: en bibliotecas de 100k+ canciones el ahorro es considerable
+    __slots__ = ("title", "artist", "album", "duration_ms", "_lyrics", "file_path")
+
+    def __init__(self, title: str, artist: str, album: str, duration: Any, lyrics: Union[LyricTimeline, List[Dict[str, Any]], None] = None, file_path: Optional[str] = None, lazy_lyrics: bool = False):
         """
         Inicializa una instancia de Song.
-        - duration: puede ser cadena formateada ("MM:SS:MS") o float segundos según tu extractor.
-        - lyrics: lista de diccionarios con {"ts": "...", "lyrc":"..."} o estructura equivalente.
+        - duration: cadena formateada ("MM:SS:MS"), float segundos o int milisegundos; se guarda como ms enteros.
+        - lyrics: LyricTimeline o lista de diccionarios {"ts": "...", "lyrc":"..."}; se guarda como LyricTimeline.
+        - lazy_lyrics: si True (y no se pasan lyrics) las letras se leen del archivo en el primer acceso.
         """
         self.title = title
-        self.artist = artist
-        self.album = album
-        self.duration = duration
-        self.lyrics = lyrics if isinstance(lyrics, list) else []  
+        self.artist = _intern(artist)
+        self.album = _intern(album)
+        self.duration_ms: int = duracion_a_ms(duration)
+        # None = letras aún no leídas del archivo (carga diferida)
+        self._lyrics: Optional[LyricTimeline] = None if (lazy_lyrics and lyrics is None) else _a_timeline(lyrics)
         self.file_path = file_path
 
+    @property
+    def duration(self) -> str:
+        """Duración formateada "MM:SS:mmm" (se almacena como `duration_ms`)."""
+        return formatear_duracion(self.duration_ms)
+
+    @duration.setter
+    def duration(self, value: Any) -> None:
+        self.duration_ms = duracion_a_ms(value)
+
+    @property
+    def timeline(self) -> LyricTimeline:
+        """Letras como LyricTimeline (ms enteros ordenados); si no se leyeron durante el escaneo se cargan ahora y quedan en caché."""
+        if self._lyrics is None:
+            timeline = LyricTimeline()
+            if self.file_path:
+                try:
+                    timeline = MetadataExtractor.extract_timeline(self.file_path)
+                except Exception as e:
+                    print(f"Error al leer las letras de {self.file_path}: {e}")
+            self._lyrics = timeline
+        return self._lyrics
+
+    @timeline.setter
+    def timeline(self, value: Union[LyricTimeline, List[Dict[str, Any]], None]) -> None:
+        self._lyrics = _a_timeline(value)
+
+    @property
+    def lyrics(self) -> Tuple[Mapping[str, Any], ...]:
+        """Letras como {"ts": "MM:SS.mmm", "lyrc": ...} ordenadas por tiempo, sólo lectura.
+        Es una instantánea de `timeline` (que es donde están las letras): modificarla en el lugar
+        (`append`, `lyrics[i]["ts"] = ...`) lanza un error en vez de perderse sin aviso. Para cambiar
+        las letras se edita `timeline` o se asigna `song.timeline = ...`/`song.lyrics = [...]`."""
+        return tuple(MappingProxyType(entrada) for entrada in self.timeline.to_lyrics())
+
+    @lyrics.setter
+    def lyrics(self, value: Union[LyricTimeline, List[Dict[str, Any]], None]) -> None:
+        self._lyrics = _a_timeline(value)
+
+    @property
+    def lyrics_loaded(self) -> bool:
+        """True si las letras ya están en memoria (no provoca lectura del archivo)."""
+        return self._lyrics is not None
+
     @classmethod
-    def from_file(cls, file_path: str):
+    def from_file(cls, file_path: str, include_lyrics: bool = True, sidecar: Optional[str] = None):
         """
         Crea una instancia de Song a partir de un archivo de audio.
+        :param include_lyrics: Si False sólo se leen las cabeceras (título, artista, álbum, duración)
+                               y las letras se cargan al acceder por primera vez a `timeline`.
+        :param sidecar: Ruta del .lrc junto al audio si ya se conoce ("" = no hay; None = comprobarlo).
         """
         try:
-            metadata = MetadataExtractor.extract_metadata(file_path)
+            metadata = MetadataExtractor.extract_metadata(file_path, include_lyrics=include_lyrics, sidecar=sidecar)
             title = metadata.get("title", "Desconocido")
             artist = metadata.get("artist", "Desconocido")
             album = metadata.get("album", "Desconocido")
-            duration = metadata.get("duration", "00:00:000") 
-            lyrics = metadata.get("lyrics", []) or []
+            duration = metadata.get("duration", "00:00:000")
+            if not include_lyrics:
+                return cls(title=title, artist=artist, album=album, duration=duration, file_path=file_path, lazy_lyrics=True)
+            lyrics = metadata.get("timeline") or metadata.get("lyrics", []) or []
             return cls(title=title, artist=artist, album=album, duration=duration, lyrics=lyrics, file_path=file_path)
         except Exception as e:
             print(f"Error al procesar el archivo {file_path}: {e}")
@@ -40,12 +139,9 @@ class Song:
             print("No se puede guardar los metadatos porque no se especificó la ruta del archivo.")
             return False
 
-        if not isinstance(self.lyrics, list):
-            print("Las letras deben ser una lista antes de guardar.")
-            return False
-
         try:
-            MetadataExtractor.write_metadata(self.file_path, {"lyrics": self.lyrics})
+            if not MetadataExtractor.write_metadata(self.file_path, {"lyrics": self.timeline}):
+                return False
             print(f"Letras guardadas correctamente en el archivo: {self.file_path}")
             return True
         except Exception as e:
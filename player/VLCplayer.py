@@ -1,6 +1,7 @@
 import os
 import threading
-import time
+
+from player.MediaPool import MediaPool
 
 # Intento robusto de cargar python-vlc en Windows añadiendo rutas de VLC
 _vlc_import_error = None
@@ -32,9 +33,17 @@ except Exception as e:
     _vlc_import_error = str(e)
 
 
+# Límite del análisis en segundo plano de cada media (sólo metadatos locales, sin red)
+PARSE_TIMEOUT_MS = 5000
+# Media precargados que se conservan (LRU)
+MEDIA_POOL_SIZE = 8
+
+
 class VLCPlayer:
     """Pequeño wrapper alrededor de python-vlc para reproducir archivos.
-    Métodos: play(file_path), stop(), set_volume(int), get_time(), get_length(), set_position(ms)
+    Métodos: play(file_path), stop(), set_volume(int), get_time(), get_length(), set_position(ms),
+             event_manager(), media_duration(), prefetch(file_path)
+    play() no bloquea: el media se analiza en segundo plano y la duración llega por `on_duration`.
     """
     def __init__(self):
         # Construir la instancia con posibles flags útiles
@@ -53,6 +62,21 @@ class VLCPlayer:
         self.player = self.instance.media_player_new() if self.instance else None
         self._media = None
         self._lock = threading.RLock()
+        # Media precargados por ruta (canciones vecinas, seleccionadas o bajo el ratón)
+        self.pool = MediaPool(self._create_media, capacity=MEDIA_POOL_SIZE) if self.instance else None
+        # Se llama con los ms destino tras cada set_position (p. ej. PlaybackClock.seek_hint)
+        self.on_seek = None
+        # Se llama con la duración en ms cuando el análisis del media la conoce (desde un hilo de VLC)
+        self.on_duration = None
+
+    def event_manager(self):
+        """Event manager de libvlc del media player (None si python-vlc no está disponible)."""
+        if self.player:
+            try:
+                return self.player.event_manager()
+            except Exception:
+                return None
+        return None
 
     def play(self, file_path: str) -> bool:
         if not vlc or not self.instance or not self.player:
@@ -63,16 +87,78 @@ class VLCPlayer:
             raise RuntimeError(msg)
         with self._lock:
             try:
-                # Asegura cadena de ruta simple (no URI) para Windows
-                self._media = self.instance.media_new(str(file_path)) # type: ignore
+                # Media del pool si se precargó (ya analizado); si no, se crea y analiza ahora
+                media = self.pool.acquire(str(file_path)) if self.pool is not None else None
+                self._media = media if media is not None else self._create_media(str(file_path))
                 self.player.set_media(self._media) # type: ignore
+                # play() sólo encola la orden: el inicio real llega como evento MediaPlayerPlaying
                 self.player.play() # type: ignore
-                time.sleep(0.05)
                 return True
             except Exception as e:
                 print(f"Error al reproducir {file_path}: {e}")
                 return False
 
+    def prefetch(self, file_path: str):
+        """Precarga en el pool el media de `file_path` (creación + análisis en segundo plano)."""
+        if self.pool is not None and file_path:
+            try:
+                self.pool.prefetch(str(file_path))
+            except Exception:
+                pass
+
+    def _create_media(self, file_path: str):
+        # Asegura cadena de ruta simple (no URI) para Windows
+        media = self.instance.media_new(file_path)  # type: ignore
+        self._parse_async(media)
+        return media
+
+    def _parse_async(self, media):
+        """Analiza el media en segundo plano (duración, pistas) sin bloquear al llamante.
+        Cuando libvlc conoce la duración se llama a `on_duration(ms)` desde un hilo de VLC."""
+        try:
+            manager = media.event_manager()
+            manager.event_attach(vlc.EventType.MediaDurationChanged, self._on_media_duration, media)  # type: ignore
+            manager.event_attach(vlc.EventType.MediaParsedChanged, self._on_media_parsed, media)  # type: ignore
+        except Exception:
+            pass
+        try:
+            if hasattr(media, 'parse_with_options'):
+                media.parse_with_options(vlc.MediaParseFlag.local, PARSE_TIMEOUT_MS)  # type: ignore
+        except Exception:
+            pass
+
+    def _on_media_duration(self, event, media):
+        # Hilo de libvlc: sólo avisar; los media anteriores (canción ya cambiada) se ignoran
+        try:
+            ms = int(event.u.new_duration)
+        except Exception:
+            return
+        self._notify_duration(media, ms)
+
+    def _on_media_parsed(self, event, media):
+        try:
+            ms = int(media.get_duration())
+        except Exception:
+            return
+        self._notify_duration(media, ms)
+
+    def _notify_duration(self, media, ms: int):
+        if ms > 0 and media is self._media and self.on_duration is not None:
+            try:
+                self.on_duration(ms)
+            except Exception:
+                pass
+
+    def media_duration(self) -> int:
+        """Duración del media actual en ms si ya se conoce (0 si aún se está analizando). No bloquea."""
+        media = self._media
+        if media is None:
+            return 0
+        try:
+            return max(0, int(media.get_duration() or 0))
+        except Exception:
+            return 0
+
     def stop(self):
         if self.player:
             try:
@@ -186,5 +272,7 @@ class VLCPlayer:
                 if total > 0:
                     pos = float(ms) / float(total)
                     self.player.set_position(max(0.0, min(1.0, pos)))
+                    if self.on_seek is not None:
+                        self.on_seek(max(0, min(total, int(ms))))
             except Exception:
                 pass
@@ -0,0 +1,66 @@
+import sys
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+# Agregar el directorio raíz del proyecto al sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.EscanerArchivos import iterar_archivos
+
+FORMATOS_VALIDOS = {".mp3", ".flac", ".m4a"}
+N_ARCHIVOS = 200_000
+ARCHIVOS_POR_ALBUM = 20
+# Por cada álbum: pistas de audio mezcladas con carátulas, letras y otros archivos que el escaneo debe descartar
+EXTENSIONES = [".flac", ".mp3", ".m4a", ".jpg", ".lrc", ".cue", ".log", ".txt", ".png", ".nfo"]
+
+
+def crear_arbol(base: str, n_archivos: int) -> None:
+    """Crea Artista/Album/archivo vacíos (el coste medido es sólo el del recorrido, no el de parsear etiquetas)."""
+    n_albums = max(1, n_archivos // ARCHIVOS_POR_ALBUM)
+    for a in range(n_albums):
+        carpeta = os.path.join(base, f"Artista {a // 10:04d}", f"Album {a:05d}")
+        os.makedirs(carpeta, exist_ok=True)
+        for i in range(ARCHIVOS_POR_ALBUM):
+            ext = EXTENSIONES[i % len(EXTENSIONES)]
+            open(os.path.join(carpeta, f"{i:02d} - Pista{ext}"), "wb").close()
+
+
+def recorrido_rglob(base: str):
+    """Recorrido anterior de Biblioteca: Path.rglob + is_file() + resolve() por archivo."""
+    rutas = []
+    for f in Path(base).rglob("*"):
+        if not f.is_file():
+            continue
+        if f.suffix.lower() not in FORMATOS_VALIDOS:
+            continue
+        rutas.append((str(f.resolve()), f.stat().st_size, f.stat().st_mtime_ns))
+    return rutas
+
+
+def recorrido_scandir(base: str):
+    return list(iterar_archivos(base, FORMATOS_VALIDOS))
+
+
+def medir(nombre: str, funcion, base: str, n_entradas: int, repeticiones: int = 3) -> None:
+    mejor = float("inf")
+    encontrados = 0
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        encontrados = len(funcion(base))
+        mejor = min(mejor, time.perf_counter() - inicio)
+    print(f"{nombre:<28} {mejor:8.3f} s  {encontrados} archivos de audio  ({n_entradas / mejor:,.0f} entradas/s)")
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else N_ARCHIVOS
+    base = tempfile.mkdtemp(prefix="lyricsapp_bench_")
+    try:
+        print(f"Creando árbol sintético de {n} archivos en {base}...")
+        crear_arbol(base, n)
+        medir("Path.rglob + resolve()", recorrido_rglob, base, n)
+        medir("os.scandir (EscanerArchivos)", recorrido_scandir, base, n)
+    finally:
+        shutil.rmtree(base, ignore_errors=True)
@@ -0,0 +1,64 @@
+import sys
+import os
+import threading
+import time
+
+# Agregar el directorio raíz del proyecto al sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from player.VLCplayer import VLCPlayer, vlc
+
+# Uso: python test/BenchInicioAudio.py cancion1.mp3 cancion2.flac ...
+ESPERA_MAX_S = 5.0
+
+
+def medir(player: VLCPlayer, file_path: str):
+    """(ms que bloquea play(), ms hasta conocer la duración, ms hasta el primer TimeChanged > 0)."""
+    sonando = threading.Event()
+    duracion = threading.Event()
+    marcas = {}
+
+    def on_time(event):
+        if event.u.new_time > 0 and not sonando.is_set():
+            marcas["audio"] = time.perf_counter()
+            sonando.set()
+
+    def on_duration(ms):
+        if not duracion.is_set():
+            marcas["duracion"] = time.perf_counter()
+            duracion.set()
+
+    manager = player.event_manager()
+    manager.event_attach(vlc.EventType.MediaPlayerTimeChanged, on_time)
+    player.on_duration = on_duration
+    try:
+        inicio = time.perf_counter()
+        player.play(file_path)
+        bloqueo = (time.perf_counter() - inicio) * 1000
+        sonando.wait(ESPERA_MAX_S)
+        duracion.wait(ESPERA_MAX_S)
+    finally:
+        manager.event_detach(vlc.EventType.MediaPlayerTimeChanged)
+        player.on_duration = None
+        player.stop()
+
+    def ms(clave):
+        return (marcas[clave] - inicio) * 1000 if clave in marcas else float("nan")
+    return bloqueo, ms("duracion"), ms("audio")
+
+
+def main():
+    archivos = sys.argv[1:]
+    if not archivos or vlc is None:
+        print("Uso: BenchInicioAudio.py <archivos de audio> (requiere python-vlc)")
+        return
+    player = VLCPlayer()
+    player.set_volume(0)
+    print(f"{'archivo':<40} {'play() ms':>10} {'duración ms':>12} {'audio ms':>10}")
+    for file_path in archivos:
+        bloqueo, duracion, audio = medir(player, file_path)
+        print(f"{os.path.basename(file_path)[:40]:<40} {bloqueo:>10.1f} {duracion:>12.1f} {audio:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
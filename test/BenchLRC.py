@@ -0,0 +1,110 @@
+import sys
+import os
+import random
+import time
+
+# Agregar el directorio raíz del proyecto al sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from metadata import LRCCodec
+
+N_LINEAS = 200_000
+REPETICIONES = 5
+
+
+def formatear_lyrics_legacy(lyrics_crudo):
+    """Réplica del formatear_Lyrics que estaba copiado en los tres extractores (una marca por línea)."""
+    lyrics_limpio = []
+    for linea in lyrics_crudo.splitlines():
+        if "[" in linea and "]" in linea:
+            ts_inicio = linea.find("[") + 1
+            ts_fin = linea.find("]")
+            timestamp = linea[ts_inicio:ts_fin].strip()
+            letra = linea[ts_fin + 1:].strip()
+            if timestamp and letra and not letra.isspace():
+                letra = letra.replace("\r", "").replace("\n", "")
+                lyrics_limpio.append({"ts": timestamp, "lyrc": letra})
+    return lyrics_limpio
+
+
+def parse_timestamp_legacy(ts):
+    """Réplica de TimesController._parse_timestamp_to_ms (segunda pasada, por fila)."""
+    parts = ts.strip().split(':')
+    if len(parts) != 2:
+        return None
+    mins = int(parts[0])
+    secs_str, ms_str = parts[1].split('.', 1) if '.' in parts[1] else (parts[1], "0")
+    ms_str = ms_str.ljust(3, '0')[:3]
+    return (mins * 60 + int(secs_str)) * 1000 + int(ms_str)
+
+
+def serializar_legacy(lyrics):
+    """Réplica del bucle de agrupación duplicado en los tres write_metadata."""
+    groups = []
+    current_ts = None
+    current_group = []
+    for entry in lyrics:
+        if "ts" not in entry or "lyrc" not in entry:
+            continue
+        ts = entry["ts"]
+        line = f"[{ts}] {entry['lyrc']}"
+        if ts != current_ts:
+            if current_group:
+                groups.append(current_group)
+            current_group = [line]
+            current_ts = ts
+        else:
+            current_group.append(line)
+    if current_group:
+        groups.append(current_group)
+    return "\n\n".join("\n".join(g) for g in groups)
+
+
+def generar_lrc(n: int, extendido: bool) -> str:
+    random.seed(1234)
+    lineas = ["[ar:Artista]", "[ti:Título]", "[al:Álbum]", "[offset:0]"]
+    palabras = ["corazón", "noche", "luz", "camino", "lluvia", "memoria", "tiempo", "viento"]
+    ms = 0
+    for _ in range(n):
+        ms += random.randint(800, 4000)
+        ts = f"{ms // 60000:02d}:{(ms // 1000) % 60:02d}.{(ms % 1000) // 10:02d}"
+        texto = [random.choice(palabras) for _ in range(random.randint(3, 8))]
+        if extendido:
+            t = ms
+            partes = []
+            for p in texto:
+                partes.append(f"<{t // 60000:02d}:{(t // 1000) % 60:02d}.{(t % 1000) // 10:02d}>{p} ")
+                t += 250
+            lineas.append(f"[{ts}]" + "".join(partes).rstrip())
+        else:
+            lineas.append(f"[{ts}]" + " ".join(texto))
+    return "\n".join(lineas)
+
+
+def medir(nombre: str, funcion, n_lineas: int) -> float:
+    mejor = float("inf")
+    for _ in range(REPETICIONES):
+        inicio = time.perf_counter()
+        funcion()
+        mejor = min(mejor, time.perf_counter() - inicio)
+    print(f"{nombre:<52} {mejor * 1000:9.1f} ms  ({n_lineas / mejor:,.0f} líneas/s)")
+    return mejor
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else N_LINEAS
+    simple = generar_lrc(n, extendido=False)
+    extendido = generar_lrc(n, extendido=True)
+    print(f"{n} líneas LRC ({len(simple) / 1e6:.1f} MB simple, {len(extendido) / 1e6:.1f} MB extendido)")
+
+    # Antes: parseo de la etiqueta + segunda conversión del texto "ts" a ms al usar cada fila
+    medir("Antes: formatear_Lyrics + _parse_timestamp_to_ms",
+          lambda: [parse_timestamp_legacy(e["ts"]) for e in formatear_lyrics_legacy(simple)], n)
+    medir("Después: LRCCodec.parsear (ms en el parseo)", lambda: LRCCodec.parsear(simple), n)
+    medir("Después: LRCCodec.parsear_lyrics (dicts ts/lyrc)", lambda: LRCCodec.parsear_lyrics(simple), n)
+    medir("Después: LRCCodec.parsear, LRC extendido", lambda: LRCCodec.parsear(extendido), n)
+
+    lyrics = LRCCodec.parsear_lyrics(simple)
+    assert serializar_legacy(lyrics) == LRCCodec.serializar(lyrics)
+    medir("Antes: agrupación de write_metadata", lambda: serializar_legacy(lyrics), n)
+    medir("Después: LRCCodec.serializar", lambda: LRCCodec.serializar(lyrics), n)
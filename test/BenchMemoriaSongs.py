@@ -0,0 +1,98 @@
+import sys
+import os
+import gc
+import tracemalloc
+
+# Agregar el directorio raíz del proyecto al sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from player.Song import Song
+from utils.BibliotecaColumnar import BibliotecaColumnar
+
+N_CANCIONES = 100_000
+N_ARTISTAS = 2_000
+N_ALBUMS = 8_000
+LINEAS_POR_LETRA = 40
+
+
+class SongLegacy:
+    """Réplica de la Song original: __dict__ por instancia, duración en texto y letras como lista de dicts."""
+    def __init__(self, title, artist, album, duration, lyrics=None, file_path=None):
+        self.title = title
+        self.artist = artist
+        self.album = album
+        self.duration = duration
+        self.lyrics = lyrics if isinstance(lyrics, list) else []
+        self.file_path = file_path
+
+
+def _texto(prefijo: str, i: int) -> str:
+    # Cadena nueva en cada llamada, igual que la que devuelve mutagen al leer cada archivo
+    return "".join([prefijo, " ", str(i)])
+
+
+def _datos(i: int):
+    ruta = f"C:\\Musica\\Artista {i % N_ARTISTAS}\\Album {i % N_ALBUMS}\\{i:06d} - Cancion.flac"
+    ms = 180_000 + (i * 7919) % 120_000
+    duracion = f"{ms // 60000:02d}:{(ms // 1000) % 60:02d}:{ms % 1000:03d}"
+    return ruta, _texto("Cancion", i), _texto("Artista", i % N_ARTISTAS), _texto("Album", i % N_ALBUMS), duracion
+
+
+def _letras(i: int):
+    return [{"ts": f"{(j * 4) // 60:02d}:{(j * 4) % 60:02d}.{(i + j) % 1000:03d}", "lyrc": _texto("linea de la letra", j)}
+            for j in range(LINEAS_POR_LETRA)]
+
+
+def medir(nombre: str, construir) -> float:
+    gc.collect()
+    tracemalloc.start()
+    antes = tracemalloc.get_traced_memory()[0]
+    contenedor = construir()
+    gc.collect()
+    despues = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    por_cancion = (despues - antes) / N_CANCIONES
+    print(f"{nombre:<48} {por_cancion:>10.1f} bytes/canción  ({(despues - antes) / 1e6:8.1f} MB)")
+    del contenedor
+    return por_cancion
+
+
+def legacy_con_letras():
+    songs = {}
+    for i in range(N_CANCIONES):
+        ruta, titulo, artista, album, duracion = _datos(i)
+        songs[ruta] = SongLegacy(titulo, artista, album, duracion, lyrics=_letras(i), file_path=ruta)
+    return songs
+
+
+def legacy_sin_letras():
+    songs = {}
+    for i in range(N_CANCIONES):
+        ruta, titulo, artista, album, duracion = _datos(i)
+        songs[ruta] = SongLegacy(titulo, artista, album, duracion, lyrics=[], file_path=ruta)
+    return songs
+
+
+def slots_letras_diferidas():
+    songs = {}
+    for i in range(N_CANCIONES):
+        ruta, titulo, artista, album, duracion = _datos(i)
+        songs[ruta] = Song(titulo, artista, album, duracion, file_path=ruta, lazy_lyrics=True)
+    return songs
+
+
+def columnar_letras_diferidas():
+    songs = BibliotecaColumnar()
+    for i in range(N_CANCIONES):
+        ruta, titulo, artista, album, duracion = _datos(i)
+        songs[ruta] = Song(titulo, artista, album, duracion, file_path=ruta, lazy_lyrics=True)
+    return songs
+
+
+if __name__ == "__main__":
+    print(f"{N_CANCIONES} canciones, {N_ARTISTAS} artistas, {N_ALBUMS} álbumes, {LINEAS_POR_LETRA} líneas de letra")
+    antes = medir("Antes: Song con __dict__ + letras escaneadas", legacy_con_letras)
+    medir("Antes: Song con __dict__, sin letras", legacy_sin_letras)
+    slots = medir("Después: Song con __slots__, letras diferidas", slots_letras_diferidas)
+    columnar = medir("Después: BibliotecaColumnar, letras diferidas", columnar_letras_diferidas)
+    print(f"Reducción con __slots__: {antes / slots:.1f}x, con almacén columnar: {antes / columnar:.1f}x")
@@ -0,0 +1,102 @@
+import sys
+import os
+import time
+
+# Agregar el directorio raíz del proyecto al sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt6 import QtGui, QtWidgets
+
+from controllers.LyricsTableModel import LyricsHighlightDelegate, LyricsTableModel
+from controllers.TimesController import TimesController
+from metadata.LRCCodec import formatear_ts, ts_a_ms
+from metadata.LyricTimeline import LyricTimeline
+
+FILAS = (50, 300, 1000, 3000)
+TICKS = 600          # un minuto de reproducción a 10 ticks/s
+PASO_MS = 100
+LINEA_MS = 2500      # duración de cada línea (dos filas por marca: letra bilingüe)
+
+
+class _Ui:
+    def __init__(self, table):
+        self.tableWidgetLyrics = table
+
+
+def crear_vista(filas: int) -> QtWidgets.QTableView:
+    """Tabla actual: QTableView sobre LyricsTableModel con el delegate de resaltado."""
+    view = QtWidgets.QTableView()
+    model = LyricsTableModel(view)
+    model.set_timeline(LyricTimeline([((i // 2) * LINEA_MS, f"Línea {i}") for i in range(filas)]))
+    view.setModel(model)
+    view.setItemDelegate(LyricsHighlightDelegate(view))
+    return view
+
+
+def crear_tabla(filas: int) -> QtWidgets.QTableWidget:
+    """Tabla anterior: QTableWidget con dos QTableWidgetItem por línea."""
+    table = QtWidgets.QTableWidget(filas, 2)
+    for i in range(filas):
+        table.setItem(i, 0, QtWidgets.QTableWidgetItem(formatear_ts((i // 2) * LINEA_MS)))
+        table.setItem(i, 1, QtWidgets.QTableWidgetItem(f"Línea {i}"))
+    return table
+
+
+def update_highlight_legacy(table, ms, original_styles):
+    """Réplica del update_highlight original: parsea todas las filas, búsqueda lineal y re-estila todas."""
+    rows = table.rowCount()
+    starts = []
+    for i in range(rows):
+        item = table.item(i, 0)
+        starts.append(int(ts_a_ms(item.text() if item is not None else '') or 0))
+    active_index = None
+    for i in range(rows):
+        end_i = starts[i + 1] if i + 1 < rows else None
+        if (end_i is None and ms >= starts[i]) or (end_i is not None and starts[i] <= ms < end_i):
+            active_index = i
+            break
+    red_brush = QtGui.QBrush(QtGui.QColor('red'))
+    for i in range(rows):
+        item_ts = table.item(i, 0)
+        item_ly = table.item(i, 1)
+        if i not in original_styles:
+            original_styles[i] = (QtGui.QBrush(item_ts.foreground()), QtGui.QFont(item_ts.font()),
+                                  QtGui.QBrush(item_ly.foreground()), QtGui.QFont(item_ly.font()))
+        if i == active_index:
+            for item in (item_ts, item_ly):
+                item.setForeground(red_brush)
+                f = item.font()
+                f.setBold(True)
+                item.setFont(f)
+        else:
+            ts_brush, ts_font, ly_brush, ly_font = original_styles[i]
+            item_ts.setForeground(ts_brush)
+            item_ts.setFont(QtGui.QFont(ts_font))
+            item_ly.setForeground(ly_brush)
+            item_ly.setFont(QtGui.QFont(ly_font))
+
+
+def medir(func) -> float:
+    """Microsegundos por tick recorriendo TICKS posiciones consecutivas."""
+    inicio = time.perf_counter()
+    for t in range(TICKS):
+        func(t * PASO_MS)
+    return (time.perf_counter() - inicio) / TICKS * 1e6
+
+
+def main():
+    app = QtWidgets.QApplication(sys.argv)  # noqa: F841 (los widgets necesitan la aplicación)
+    print(f"{'filas':>6} {'QTableWidget µs/tick':>21} {'modelo µs/tick':>15} {'mejora':>8}")
+    for filas in FILAS:
+        tabla_legacy = crear_tabla(filas)
+        estilos = {}
+        legacy = medir(lambda ms: update_highlight_legacy(tabla_legacy, ms, estilos))
+
+        controller = TimesController(_Ui(crear_vista(filas)))
+        nuevo = medir(controller.update_highlight)
+        print(f"{filas:>6} {legacy:>21.1f} {nuevo:>15.1f} {legacy / nuevo:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+import sys
+import os
+import shutil
+import tempfile
+
+# Agregar el directorio raíz del proyecto al sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from metadata import LRCCodec, SidecarLRC
+from metadata.LyricTimeline import LyricTimeline
+
+# Uso: python test/PruebaPalabrasLRC.py [cancion.mp3]
+# Con un archivo de audio también se prueba la ida y vuelta por sus etiquetas (sobre una copia).
+LRC_EXTENDIDO = "\n".join([
+    "[00:01.00]<00:01.00>Hola <00:01.50>mundo",
+    "[00:03.00]Sin marca <00:03.40>inicial",
+    "[00:05.00]Línea normal",
+])
+
+
+def comprobar(timeline: LyricTimeline, origen: str):
+    assert timeline.texts == ["Hola mundo", "Sin marca inicial", "Línea normal"], timeline.texts
+    assert timeline.palabras[0] == ((1000, "Hola "), (1500, "mundo")), timeline.palabras[0]
+    assert timeline.palabras[1] == ((3000, "Sin marca "), (3400, "inicial")), timeline.palabras[1]
+    assert timeline.palabras[2] == (), timeline.palabras[2]
+    print(f"OK: palabras con tiempo conservadas ({origen})")
+
+
+def prueba_codec():
+    timeline = LyricTimeline.from_lrc(LRCCodec.parsear(LRC_EXTENDIDO).lineas)
+    comprobar(timeline, "parseo")
+    texto = LRCCodec.serializar(timeline.to_lrc())
+    assert "<00:01.000>Hola <00:01.500>mundo" in texto, texto
+    comprobar(LyricTimeline.from_lrc(LRCCodec.parsear(texto).lineas), "serializar -> parsear")
+    # La lista histórica de dicts (Song.lyrics) también las lleva
+    comprobar(LyricTimeline.from_lyrics(timeline.to_lyrics()), "to_lyrics -> from_lyrics")
+    assert "<00:01.000>" in LRCCodec.serializar(timeline.to_lyrics())
+
+    # Si se edita el texto de la línea las marcas ya no corresponden y se escribe el texto nuevo
+    editada = LyricTimeline([(1000, "Adiós mundo", timeline.palabras[0])])
+    assert LRCCodec.serializar(editada.to_lrc()) == "[00:01.000] Adiós mundo"
+    print("OK: una línea editada se guarda sin las marcas antiguas")
+
+
+def prueba_sidecar():
+    carpeta = tempfile.mkdtemp()
+    try:
+        ruta = os.path.join(carpeta, "cancion.lrc")
+        with open(ruta, "w", encoding="utf-8") as f:
+            f.write(LRC_EXTENDIDO)
+        timeline = SidecarLRC.leer(ruta)
+        comprobar(timeline, ".lrc")
+        SidecarLRC.escribir(ruta, timeline)
+        SidecarLRC._cache.clear()
+        comprobar(SidecarLRC.leer(ruta), ".lrc reescrito")
+    finally:
+        shutil.rmtree(carpeta, ignore_errors=True)
+
+
+def prueba_audio(audio_path: str):
+    from metadata.MetadataExtractor import MetadataExtractor
+
+    carpeta = tempfile.mkdtemp()
+    try:
+        copia = os.path.join(carpeta, os.path.basename(audio_path))
+        shutil.copy2(audio_path, copia)
+        timeline = LyricTimeline.from_lrc(LRCCodec.parsear(LRC_EXTENDIDO).lineas)
+        assert MetadataExtractor.write_metadata(copia, {"lyrics": timeline}, sidecar=False, forzar=True)
+        leida = MetadataExtractor.extract_timeline(copia)
+        comprobar(leida, "etiquetas del audio")
+        # Cambiar sólo el tiempo de una palabra también es un cambio que hay que guardar
+        cambiada = LyricTimeline([(1000, "Hola mundo", ((1000, "Hola "), (1600, "mundo")))] + list(zip(leida.starts, leida.texts, leida.palabras))[1:])
+        informe = {}
+        assert MetadataExtractor.write_metadata(copia, {"lyrics": cambiada}, sidecar=False, informe=informe)
+        assert not informe["omitida"], informe
+        assert MetadataExtractor.extract_timeline(copia).palabras[0] == ((1000, "Hola "), (1600, "mundo"))
+        print("OK: un cambio sólo en las palabras no se omite")
+    finally:
+        shutil.rmtree(carpeta, ignore_errors=True)
+
+
+def prueba_hash():
+    from metadata.MetadataExtractorBase import MetadataExtractorBase
+
+    timeline = LyricTimeline.from_lrc(LRCCodec.parsear(LRC_EXTENDIDO).lineas)
+    plano = LyricTimeline(zip(timeline.starts, timeline.texts))
+    movida = LyricTimeline([(1000, "Hola mundo", ((1000, "Hola "), (1600, "mundo")))])
+    original = LyricTimeline([(1000, "Hola mundo", timeline.palabras[0])])
+    assert MetadataExtractorBase.hash_letras(timeline) != MetadataExtractorBase.hash_letras(plano)
+    assert MetadataExtractorBase.hash_letras(movida) != MetadataExtractorBase.hash_letras(original)
+    assert MetadataExtractorBase.hash_letras(timeline) == MetadataExtractorBase.hash_letras(timeline.to_lyrics())
+    print("OK: el hash de las letras cambia al añadir o mover palabras")
+
+
+if __name__ == "__main__":
+    prueba_codec()
+    prueba_sidecar()
+    prueba_hash()
+    if len(sys.argv) > 1:
+        prueba_audio(sys.argv[1])
@@ -0,0 +1,62 @@
+import sys
+import os
+import shutil
+import tempfile
+
+# Agregar el directorio raíz del proyecto al sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.Biblioteca import Biblioteca
+from utils.BibliotecaCache import BibliotecaCache
+from utils.LyricsSearchIndex import LyricsSearchIndex
+
+
+def crear_arbol(base: str):
+    """raiz/x.mp3 y raiz/a/b/y.FLAC (archivos vacíos: basta con que el escaneo los liste)."""
+    os.makedirs(os.path.join(base, "a", "b"))
+    x = os.path.join(base, "x.mp3")
+    y = os.path.join(base, "a", "b", "y.FLAC")
+    for ruta in (x, y):
+        open(ruta, "wb").close()
+    return os.path.realpath(x), os.path.realpath(y)
+
+
+def prueba_reescaneo_con_excluir():
+    carpeta = tempfile.mkdtemp()
+    try:
+        raiz = os.path.join(carpeta, "musica")
+        os.makedirs(raiz)
+        x, y = crear_arbol(raiz)
+        cache = BibliotecaCache(os.path.join(carpeta, "biblioteca.db"))
+        indice = LyricsSearchIndex()
+        biblioteca = Biblioteca(cache=cache, indice=indice)
+
+        biblioteca.cargar_desde_carpeta(raiz, verbose=False)
+        assert set(cache.cargar_carpeta(os.path.realpath(raiz))) == {x, y}
+        indice.indexar_cancion(y, [{"ts": "00:01.000", "lyrc": "letra de y"}])
+
+        # Reescanear excluyendo a/b: y.FLAC sigue en disco, no se puede dar por eliminada
+        biblioteca.cargar_desde_carpeta(raiz, verbose=False, excluir=["a/b"])
+        assert biblioteca.ultimo_escaneo["eliminadas"] == 0, biblioteca.ultimo_escaneo
+        assert y in cache.cargar_carpeta(os.path.realpath(raiz)), "el cache perdió el archivo excluido"
+        assert indice.contiene(y), "el índice perdió el archivo excluido"
+        print("OK: reescanear con excluir conserva el cache y el índice del archivo excluido")
+
+        # Sin recursión tampoco
+        biblioteca.cargar_desde_carpeta(raiz, verbose=False, recursive=False)
+        assert y in cache.cargar_carpeta(os.path.realpath(raiz)) and indice.contiene(y)
+        print("OK: reescanear sin recursión conserva el archivo de la subcarpeta")
+
+        # Un archivo borrado de verdad sí se purga
+        os.remove(y)
+        biblioteca.cargar_desde_carpeta(raiz, verbose=False)
+        assert biblioteca.ultimo_escaneo["eliminadas"] == 1, biblioteca.ultimo_escaneo
+        assert y not in cache.cargar_carpeta(os.path.realpath(raiz)) and not indice.contiene(y)
+        print("OK: un archivo borrado se purga del cache y del índice")
+        cache.cerrar()
+    finally:
+        shutil.rmtree(carpeta, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    prueba_reescaneo_con_excluir()
@@ -0,0 +1,69 @@
+from PyQt6 import QtCore
+import threading
+
+
+class LibraryScanThread(QtCore.QThread):
+    """Hilo que escanea una carpeta de música fuera del hilo de la GUI.
+    Las canciones se entregan por lotes para que la lista se vaya llenando mientras dura el escaneo.
+    Si la biblioteca tiene índice de letras, al terminar el escaneo se indexan las canciones que
+    faltan (progressUpdated vuelve a empezar para esa fase) y el índice se guarda en disco.
+    Señales: batchReady(list[(ruta, Song)]), progressUpdated(procesados:int, total:int),
+             scanFinished(cargadas:int, cancelado:bool)
+    """
+    batchReady = QtCore.pyqtSignal(list)
+    progressUpdated = QtCore.pyqtSignal(int, int)
+    scanFinished = QtCore.pyqtSignal(int, bool)
+
+    def __init__(self, biblioteca, folder_path: str, recursive: bool = True, workers: int = 0,
+                 modo: str = "hilos", batch_size: int = 200, header_only: bool = False, verbose: bool = False):
+        super().__init__()
+        self.biblioteca = biblioteca
+        self.folder_path = folder_path
+        self.recursive = recursive
+        self.workers = workers
+        self.modo = modo
+        self.batch_size = max(1, int(batch_size))
+        self.header_only = header_only
+        self.verbose = verbose
+        self._cancel = threading.Event()
+
+    def run(self):
+        cargadas = 0
+        rutas = []
+        try:
+            for procesados, total, lote in self.biblioteca.escanear_carpeta(
+                    self.folder_path, recursive=self.recursive, verbose=self.verbose,
+                    workers=self.workers, modo=self.modo, tam_lote=self.batch_size,
+                    cancelado=self._cancel.is_set, solo_cabeceras=self.header_only):
+                if lote:
+                    cargadas += len(lote)
+                    rutas.extend(ruta for ruta, _ in lote)
+                    self.batchReady.emit(lote)
+                self.progressUpdated.emit(procesados, total)
+            self._indexar_letras(rutas)
+        except Exception as e:
+            print(f"Error durante el escaneo de {self.folder_path}: {e}")
+        self.scanFinished.emit(cargadas, self._cancel.is_set())
+
+    def _indexar_letras(self, rutas):
+        indice = getattr(self.biblioteca, "indice", None)
+        if indice is None or self._cancel.is_set():
+            return
+        self.biblioteca.indexar_pendientes(rutas, workers=self.workers, modo="hilos",
+                                           cancelado=self._cancel.is_set,
+                                           progreso=self.progressUpdated.emit)
+        if indice.modificado:
+            try:
+                indice.guardar()
+            except Exception as e:
+                print(f"Error al guardar el índice de letras: {e}")
+
+    def cancel(self):
+        self._cancel.set()
+
+    def stop(self):
+        self.cancel()
+        try:
+            self.wait(5000)
+        except Exception:
+            pass
@@ -0,0 +1,98 @@
+from PyQt6 import QtCore
+import threading
+from typing import Dict, Optional
+
+from metadata.LyricTimeline import LyricTimeline
+from metadata.MetadataExtractor import MetadataExtractor
+
+
+class SaveLyricsThread(QtCore.QThread):
+    """Hilo que escribe las letras en los archivos fuera del hilo de la GUI.
+    - `enqueue(ruta, timeline)` guarda una copia de las letras y vuelve enseguida.
+    - Si un archivo ya tiene un guardado pendiente se sustituye por la versión nueva (sólo se
+      escribe la última); si se está escribiendo, la versión nueva se escribe a continuación.
+    - Si la etiqueta cabe en el padding se actualiza en el lugar; si hay que reescribir el archivo
+      la escritura es atómica (copia temporal + os.replace): cerrar la aplicación a mitad de un
+      guardado deja el archivo en su versión anterior.
+    Señales: saveStarted(ruta:str), saveFinished(ruta:str, ok:bool, error:str),
+             saveReport(ruta:str, informe:dict)  # {"omitida", "en_sitio", "bytes_escritos"}
+    """
+    saveStarted = QtCore.pyqtSignal(str)
+    saveFinished = QtCore.pyqtSignal(str, bool, str)
+    saveReport = QtCore.pyqtSignal(str, dict)
+
+    def __init__(self, atomic: bool = True):
+        super().__init__()
+        self.atomic = atomic
+        self._pendientes: Dict[str, LyricTimeline] = {}  # orden de llegada; la versión más reciente por ruta
+        self._en_curso: Optional[str] = None
+        self._detener = False
+        self._cond = threading.Condition()
+        # Estadísticas: trabajos recibidos, escrituras realizadas, guardados combinados y errores
+        self.estadisticas: Dict[str, int] = {"recibidos": 0, "escritos": 0, "combinados": 0, "errores": 0}
+
+    def enqueue(self, file_path: str, timeline: LyricTimeline) -> bool:
+        """Encola el guardado de `timeline` en `file_path`; False si el hilo ya se está deteniendo."""
+        copia = timeline.copy()  # la Song puede seguir editándose mientras se escribe
+        with self._cond:
+            if self._detener:
+                return False
+            self.estadisticas["recibidos"] += 1
+            if file_path in self._pendientes:
+                self.estadisticas["combinados"] += 1
+            self._pendientes[file_path] = copia
+            self._cond.notify()
+        return True
+
+    def pending_count(self) -> int:
+        """Guardados pendientes, incluido el que se está escribiendo."""
+        with self._cond:
+            return len(self._pendientes) + (1 if self._en_curso is not None else 0)
+
+    def is_pending(self, file_path: str) -> bool:
+        with self._cond:
+            return file_path in self._pendientes or file_path == self._en_curso
+
+    def run(self):
+        while True:
+            with self._cond:
+                while not self._pendientes and not self._detener:
+                    self._cond.wait()
+                if not self._pendientes:
+                    return
+                ruta = next(iter(self._pendientes))
+                timeline = self._pendientes.pop(ruta)
+                self._en_curso = ruta
+            self.saveStarted.emit(ruta)
+            ok, error = self._guardar(ruta, timeline)
+            with self._cond:
+                self._en_curso = None
+                self.estadisticas["escritos" if ok else "errores"] += 1
+                self._cond.notify_all()
+            self.saveFinished.emit(ruta, ok, error)
+
+    def _guardar(self, file_path: str, timeline: LyricTimeline):
+        informe = {}
+        try:
+            if MetadataExtractor.write_metadata(file_path, {"lyrics": timeline}, atomico=self.atomic, informe=informe):
+                self.saveReport.emit(file_path, informe)
+                return True, ""
+            return False, "El extractor no pudo escribir las letras."
+        except Exception as e:
+            return False, str(e)
+
+    def stop(self, drain: bool = True, timeout_ms: int = -1) -> bool:
+        """Detiene el hilo. Con drain=True escribe antes los guardados pendientes (al cerrar la ventana);
+        con drain=False se descartan, pero el que está en curso siempre termina.
+        Devuelve False si el hilo sigue vivo al agotarse timeout_ms (-1 = esperar sin límite)."""
+        with self._cond:
+            self._detener = True
+            if not drain:
+                self._pendientes.clear()
+            self._cond.notify_all()
+        if not self.isRunning():
+            return True
+        try:
+            return bool(self.wait() if timeout_ms < 0 else self.wait(timeout_ms))
+        except Exception:
+            return False
@@ -1,69 +1,611 @@
+import os
+import time
+from functools import partial
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Any, Callable, Dict, Iterable, Iterator, List, MutableMapping, NamedTuple, Optional, Set, Tuple
+from metadata import CacheMetadatos
+from metadata.LyricTimeline import LyricTimeline
+from metadata.RegistroFormatos import extensiones_registradas
 from player.Song import Song  # Importación corregida
+from utils.BibliotecaCache import BibliotecaCache
+from utils.BibliotecaColumnar import BibliotecaColumnar
+from utils.EscanerArchivos import iterar_archivos
+from utils.LyricsSearchIndex import LyricsSearchIndex, ResultadoBusqueda
+
+MODOS_ESCANEO = ("hilos", "procesos")
+# Extensiones de los formatos incluidos; el escaneo usa las registradas en RegistroFormatos en ese momento
+FORMATOS_VALIDOS = extensiones_registradas()
+# En sistemas que no distinguen mayúsculas (Windows) "C:\\Musica" y "c:\\musica" deben ser la misma clave
+_RUTAS_SIN_MAYUSCULAS = os.path.normcase("A") != "A"
+
+
+def normalizar_ruta(path: str) -> str:
+    """Ruta real absoluta, comparable entre raíces (sin mayúsculas donde el sistema no las distingue)."""
+    return CacheMetadatos.clave(path)
+
+
+# (tamaño, mtime_ns, hash) de las letras leídas por un trabajador (ver CacheMetadatos.firma_hash)
+FirmaLetras = Optional[Tuple[int, int, bytes]]
+
+
+def _leer_letras(file_path: str) -> Tuple[str, Optional[LyricTimeline], Optional[BaseException], FirmaLetras]:
+    """Lee sólo las letras de un archivo (para indexarlas) y devuelve (ruta, letras, error, firma)."""
+    try:
+        from metadata.MetadataExtractor import MetadataExtractor
+        timeline = MetadataExtractor.extract_timeline(file_path)
+        return file_path, timeline, None, CacheMetadatos.firma_hash(file_path)
+    except Exception as e:
+        return file_path, None, e, None
+
+
+def _recordar_firma(file_path: str, firma: FirmaLetras) -> None:
+    """Recuerda en este proceso el hash de letras calculado por un trabajador (en un
+    ProcessPoolExecutor su CacheMetadatos no es el nuestro)."""
+    if firma is not None:
+        CacheMetadatos.guardar_hash(file_path, *firma)
+
+
+class ResultadoGuardado(NamedTuple):
+    path: str
+    ok: bool
+    omitida: bool         # las letras no cambiaron: no se tocó el archivo
+    en_sitio: bool        # sólo se reescribió la región de etiquetas
+    bytes_escritos: int
+    segundos: float
+    error: Optional[str]
+
+
+def _guardar_letras(file_path: str, timeline: LyricTimeline, atomico: bool = True, forzar: bool = False) -> ResultadoGuardado:
+    """Escribe las letras de un archivo (en un hilo del pool) y devuelve su resultado."""
+    from metadata.MetadataExtractor import MetadataExtractor
+    informe: Dict[str, Any] = {}
+    inicio = time.perf_counter()
+    try:
+        ok = MetadataExtractor.write_metadata(file_path, {"lyrics": timeline}, atomico=atomico, forzar=forzar, informe=informe)
+        error = None if ok else "El extractor no pudo escribir las letras."
+    except Exception as e:
+        ok, error = False, str(e)
+    return ResultadoGuardado(file_path, bool(ok), bool(informe.get("omitida")), bool(informe.get("en_sitio")),
+                             int(informe.get("bytes_escritos", 0)), time.perf_counter() - inicio, error)
+
+
+def _cargar_cancion(file_path: str, sidecar: Optional[str] = None,
+                    include_lyrics: bool = True) -> Tuple[str, Optional[Song], Optional[BaseException], FirmaLetras]:
+    """
+    Carga una canción y devuelve (ruta, song, error, firma) sin propagar excepciones; `firma` es el
+    hash de las letras del archivo (o None) para recordarlo en el proceso principal.
+    Está a nivel de módulo para que pueda serializarse hacia un ProcessPoolExecutor.
+    :param sidecar: .lrc del audio según el listado del escaneo ("" si no tiene).
+    """
+    try:
+        song = Song.from_file(file_path, include_lyrics=include_lyrics, sidecar=sidecar)
+        return file_path, song, None, CacheMetadatos.firma_hash(file_path)
+    except Exception as e:
+        return file_path, None, e, None
+
 
 class Biblioteca:
-    def __init__(self):
-        self.songs: Dict[str, Song] = {}  # Diccionario para almacenar las canciones con file_path normalizada como clave
+    def __init__(self, cache: Optional[BibliotecaCache] = None, compacta: bool = False,
+                 indice: Optional[LyricsSearchIndex] = None):
+        # Diccionario para almacenar las canciones con file_path normalizada como clave.
+        # Con compacta=True se usa un almacén columnar con la misma interfaz (menos memoria en bibliotecas enormes).
+        self.songs: MutableMapping[str, Song] = BibliotecaColumnar() if compacta else {}
+        self.cache = cache  # Cache persistente opcional (ruta, tamaño, mtime_ns) -> metadatos
+        self.ultimo_escaneo: Dict[str, Any] = {}  # Estadísticas del último escaneo (archivos/s, workers, errores...)
+        self.ultimo_guardado: Dict[str, Any] = {}  # Estadísticas del último guardar_letras_lote
+        self.indice = indice  # Índice de búsqueda en las letras (opcional)
+        # Carpetas raíz cargadas (rutas reales, en orden de alta) y canciones aportadas por cada una
+        self.raices: List[str] = []
+        self._por_raiz: Dict[str, Set[str]] = {}
+        # ruta normalizada -> clave en `songs`; sólo hace falta si el sistema no distingue mayúsculas
+        self._por_normalizada: Dict[str, str] = {}
 
     def limpiar_biblioteca(self) -> None:
         """
         Limpia la biblioteca eliminando todas las canciones.
         """
         self.songs.clear()
+        self.raices.clear()
+        self._por_raiz.clear()
+        self._por_normalizada.clear()
         print("Biblioteca limpiada.")
 
-    def cargar_desde_carpeta(self, folder_path: str, recursive: bool = True, verbose: bool = True) -> int:
+    def buscar_raiz(self, folder_path: str) -> Optional[str]:
+        """Devuelve la raíz registrada que corresponde a `folder_path` (o None)."""
+        norm = normalizar_ruta(folder_path)
+        for raiz in self.raices:
+            if os.path.normcase(raiz) == norm:
+                return raiz
+        return None
+
+    def registrar_raiz(self, folder_path: str) -> Optional[str]:
         """
-        Carga todas las canciones de una carpeta específica.
-        :param folder_path: Ruta de la carpeta que contiene archivos de audio.
-        :param recursive: Si True, busca en subcarpetas recursivamente.
-        :param verbose: Si True, imprime progreso.
-        :return: Número de canciones cargadas.
+        Añade `folder_path` a las carpetas raíz sin escanearla (ver `agregar_raiz`).
+        :return: La ruta real de la raíz (la existente si ya estaba) o None si no es una carpeta.
         """
+        if not os.path.isdir(folder_path):
+            print(f"Error: La carpeta '{folder_path}' no existe.")
+            return None
+        existente = self.buscar_raiz(folder_path)
+        if existente is not None:
+            return existente
+        raiz = os.path.realpath(folder_path)
+        self.raices.append(raiz)
+        self._por_raiz[raiz] = set()
+        self._guardar_raices()
+        return raiz
+
+    def quitar_raiz(self, folder_path: str) -> List[str]:
+        """
+        Quita una carpeta raíz y las canciones que sólo aportaba ella (las que también
+        pertenecen a otra raíz se conservan). Su cache e índice de letras se mantienen,
+        así que volver a agregarla no obliga a reparsear.
+        :return: Claves de las canciones eliminadas de `songs`.
+        """
+        raiz = self.buscar_raiz(folder_path)
+        if raiz is None:
+            return []
+        self.raices.remove(raiz)
+        propias = self._por_raiz.pop(raiz, set())
+        compartidas: Set[str] = set().union(*self._por_raiz.values()) if self._por_raiz else set()
+        quitadas = [clave for clave in propias if clave not in compartidas and clave in self.songs]
+        for clave in quitadas:
+            del self.songs[clave]
+            if _RUTAS_SIN_MAYUSCULAS:
+                self._por_normalizada.pop(os.path.normcase(clave), None)
+        self._guardar_raices()
+        return quitadas
+
+    def _guardar_raices(self) -> None:
+        if self.cache is None:
+            return
+        try:
+            self.cache.guardar_raices(self.raices)
+        except Exception as e:
+            print(f"Error al guardar las carpetas de la biblioteca: {e}")
+
+    def raices_guardadas(self) -> List[str]:
+        """Carpetas raíz de la sesión anterior (persistidas en el cache)."""
+        if self.cache is None:
+            return []
+        try:
+            return self.cache.cargar_raices()
+        except Exception as e:
+            print(f"Error al leer las carpetas de la biblioteca: {e}")
+            return []
+
+    def _clave_existente(self, file_path: str) -> Optional[str]:
+        if file_path in self.songs:
+            return file_path
+        if _RUTAS_SIN_MAYUSCULAS:
+            return self._por_normalizada.get(os.path.normcase(file_path))
+        return None
+
+    def _crear_executor(self, workers: int, modo: str) -> Executor:
+        if modo == "procesos":
+            return ProcessPoolExecutor(max_workers=workers)
+        return ThreadPoolExecutor(max_workers=workers, thread_name_prefix="escaneo")
+
+    def _mapear_carga(self, rutas: List[str], workers: int, modo: str, include_lyrics: bool = True,
+                      sidecars: Optional[Dict[str, str]] = None) -> Iterator[Tuple[str, Optional[Song], Optional[BaseException], FirmaLetras]]:
+        """
+        Aplica `_cargar_cancion` a cada ruta conservando el orden de entrada,
+        de forma secuencial (workers <= 1) o con un pool de hilos/procesos.
+        :param sidecars: {ruta: .lrc} del listado; con él no se busca el .lrc de cada archivo en disco.
+        """
+        cargar = partial(_cargar_cancion, include_lyrics=include_lyrics)
+        adjuntos = [sidecars.get(ruta, "") for ruta in rutas] if sidecars is not None else [None] * len(rutas)
+        if workers <= 1 or len(rutas) <= 1:
+            for file_path, sidecar in zip(rutas, adjuntos):
+                yield cargar(file_path, sidecar)
+            return
+        # Con procesos conviene agrupar para amortizar el coste de serialización
+        chunksize = max(1, len(rutas) // (workers * 8)) if modo == "procesos" else 1
+        executor = self._crear_executor(workers, modo)
+        try:
+            # Executor.map devuelve los resultados en el orden de `rutas`: resultado determinista
+            yield from executor.map(cargar, rutas, adjuntos, chunksize=chunksize)
+        finally:
+            # Si el consumidor cancela, descartar lo que aún no empezó en vez de esperarlo
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def agregar_canciones(self, lote: Iterable[Tuple[str, Song]], raiz: Optional[str] = None) -> List[Tuple[str, Song]]:
+        """
+        Añade a `songs` un lote (ruta, song) producido por `escanear_carpeta`.
+        :param raiz: Carpeta raíz de la que procede el lote (para `quitar_raiz`).
+        :return: Las entradas realmente añadidas (se omiten las rutas ya cargadas desde cualquier raíz).
+        """
+        propias = self._por_raiz.setdefault(raiz, set()) if raiz is not None else None
+        agregadas: List[Tuple[str, Song]] = []
+        for file_path, song in lote:
+            existente = self._clave_existente(file_path)
+            if existente is not None:
+                if propias is not None:
+                    propias.add(existente)
+                continue
+            self.songs[file_path] = song
+            if _RUTAS_SIN_MAYUSCULAS:
+                self._por_normalizada[os.path.normcase(file_path)] = file_path
+            if propias is not None:
+                propias.add(file_path)
+            agregadas.append((file_path, song))
+        return agregadas
+
+    def escanear_carpeta(self, folder_path: str, recursive: bool = True, verbose: bool = True,
+                         workers: int = 0, modo: str = "hilos", tam_lote: int = 200, intervalo_lote: float = 0.1,
+                         cancelado: Optional[Callable[[], bool]] = None, solo_cabeceras: bool = False,
+                         incluir: Optional[Iterable[str]] = None, excluir: Optional[Iterable[str]] = None) -> Iterator[Tuple[int, int, List[Tuple[str, Song]]]]:
+        """
+        Escanea una carpeta y produce las canciones por lotes, sin modificar `songs`
+        (puede ejecutarse en un hilo de fondo; el consumidor llama a `agregar_canciones`).
+        Si la biblioteca tiene `cache`, sólo se vuelven a parsear los archivos nuevos o
+        modificados (tamaño o mtime distintos) y se purgan del cache (y del índice de letras) los que
+        ya no existen en disco; los que sólo quedaron fuera del recorrido (filtros, sin recursión) se conservan.
+        :param tam_lote: Máximo de canciones por lote.
+        :param intervalo_lote: Segundos máximos entre lotes aunque no se haya llenado el lote.
+        :param cancelado: Callable consultado durante el recorrido y entre archivos; si devuelve True el escaneo se detiene.
+        :param solo_cabeceras: Si True sólo se leen título, artista, álbum y duración; las letras
+                               se cargan al acceder a `Song.timeline`.
+        :param incluir: Patrones glob que deben cumplir los archivos (ruta relativa o nombre).
+        :param excluir: Patrones glob de archivos o carpetas a omitir.
+        :return: Iterador de (procesados, total, lote) con lote = [(ruta, song), ...] en orden de recorrido.
+        """
+        if modo not in MODOS_ESCANEO:
+            raise ValueError(f"Modo de escaneo no soportado: {modo} (use {', '.join(MODOS_ESCANEO)})")
+
         p = Path(folder_path)
         if not p.is_dir():
             print(f"Error: La carpeta '{folder_path}' no existe.")
-            return 0
+            return
 
-        self.limpiar_biblioteca()
-        formatos_validos = {".mp3", ".flac", ".m4a"}
         canciones_cargadas = 0
+        errores = 0
+        fue_cancelado = False
 
-        iterator = p.rglob("*") if recursive else p.iterdir()
-        for f in iterator:
-            if not f.is_file():
-                continue
-            if f.suffix.lower() not in formatos_validos:
-                continue
-            try:
-                file_path = str(f.resolve())
-            except Exception:
-                file_path = str(f)
+        inicio = time.perf_counter()
+        try:
+            raiz = str(p.resolve())
+        except Exception:
+            raiz = str(p)
+        previas = self.cache.cargar_carpeta(raiz) if self.cache is not None else {}
 
+        # Lista ordenada según el recorrido: cada posición es una Song del cache o None (pendiente de parsear)
+        orden: List[Tuple[str, Optional[Song]]] = []
+        stats_por_ruta: Dict[str, Tuple[int, int]] = {}
+        # .lrc junto a cada audio, según los nombres del mismo listado (ver SidecarLRC)
+        sidecars: Dict[str, str] = {}
+        # El listado se completa antes de procesar (los .lrc de cada carpeta se conocen después de
+        # devolver sus archivos), pero el recorrido consulta `cancelado` para no bloquear la cancelación
+        listado = list(iterar_archivos(raiz, extensiones_registradas(), recursive=recursive,
+                                       incluir=incluir, excluir=excluir, adjuntos=sidecars,
+                                       cancelado=cancelado))
+        if cancelado is not None and cancelado():
+            # Listado incompleto: no se procesa nada (ni se purga lo que falte en él)
+            fue_cancelado = True
+            listado = []
+        for file_path, size, mtime_ns in listado:
             # Evitar recargar duplicados
-            if file_path in self.songs:
+            if file_path in stats_por_ruta:
                 if verbose:
                     print(f"Omitido (ya cargado): {file_path}")
                 continue
+            stats_por_ruta[file_path] = (size, mtime_ns)
+            entrada = previas.get(file_path)
+            if self.cache is None and self._clave_existente(file_path) is not None:
+                # Sin cache: ya cargada desde otra raíz que se solapa con esta, no volver a parsearla
+                orden.append((file_path, self.songs[self._clave_existente(file_path)]))
+            elif entrada is not None and entrada.size == size and entrada.mtime_ns == mtime_ns:
+                # Con .lrc las letras del cache pueden estar desfasadas (editar el .lrc no cambia el
+                # mtime del audio): se leen al usarlas, con la caché propia de SidecarLRC
+                letras = None if file_path in sidecars else entrada.lyrics
+                orden.append((file_path, Song(title=entrada.title, artist=entrada.artist, album=entrada.album,
+                                              duration=entrada.duration, lyrics=letras, file_path=file_path,
+                                              lazy_lyrics=letras is None)))
+            else:
+                orden.append((file_path, None))
+        fin_listado = time.perf_counter()
+
+        rutas = [file_path for file_path, song in orden if song is None]
+        total = len(orden)
+        workers = max(0, int(workers or 0))
+        parseadas = self._mapear_carga(rutas, workers, modo, include_lyrics=not solo_cabeceras, sidecars=sidecars)
+        lote: List[Tuple[str, Song]] = []
+        nuevas_cache: List[Tuple[str, int, int, Song]] = []
+        procesados = 0
+        ultimo_lote = time.perf_counter()
+        try:
+            for file_path, song in orden:
+                if cancelado is not None and cancelado():
+                    fue_cancelado = True
+                    break
+                procesados += 1
+                if song is None:
+                    # `parseadas` sigue el mismo orden que las posiciones pendientes de `orden`
+                    file_path, song, error, firma = next(parseadas)
+                    _recordar_firma(file_path, firma)
+                    if error is not None or song is None:
+                        errores += 1
+                        if verbose:
+                            if isinstance(error, FileNotFoundError):
+                                print(f"Archivo no encontrado: {file_path}")
+                            else:
+                                print(f"Error al cargar {file_path}: {error}")
+                        song = None
+                    else:
+                        nuevas_cache.append((file_path, *stats_por_ruta[file_path], song))
+                        if self.indice is not None:
+                            # El archivo cambió: reindexar si ya tenemos sus letras, si no queda pendiente
+                            if song.lyrics_loaded:
+                                self.indice.indexar_cancion(file_path, song.timeline)
+                            else:
+                                self.indice.eliminar_cancion(file_path)
+                elif (self.indice is not None and song.lyrics_loaded
+                      and not self.indice.contiene(file_path)):
+                    self.indice.indexar_cancion(file_path, song.timeline)
+                if song is not None:
+                    lote.append((file_path, song))
+                    canciones_cargadas += 1
+                    if verbose:
+                        print(f"Canción cargada: {song.title} - {song.artist}")
+
+                ahora = time.perf_counter()
+                if len(lote) >= tam_lote or (lote and ahora - ultimo_lote >= intervalo_lote):
+                    self._guardar_en_cache(nuevas_cache)
+                    yield procesados, total, lote
+                    lote = []
+                    ultimo_lote = ahora
+        finally:
+            parseadas.close()
+            self._guardar_en_cache(nuevas_cache)
 
+        # Que falte en el listado no basta (patrones incluir/excluir, recursive=False, carpetas que no se
+        # pudieron leer): sólo se purgan los archivos que ya no existen en disco
+        eliminadas = [ruta for ruta in previas if ruta not in stats_por_ruta and not os.path.exists(ruta)]
+        if not fue_cancelado and self.cache is not None:
             try:
-                song = Song.from_file(file_path)
-                self.songs[file_path] = song
-                canciones_cargadas += 1
-                if verbose:
-                    print(f"Canción cargada: {song.title} - {song.artist}")
-            except FileNotFoundError:
-                if verbose:
-                    print(f"Archivo no encontrado: {file_path}")
+                self.cache.eliminar(eliminadas)
             except Exception as e:
-                if verbose:
-                    print(f"Error al cargar {file_path}: {e}")
+                print(f"Error al actualizar el cache de la biblioteca: {e}")
+        if not fue_cancelado and self.indice is not None:
+            for ruta in eliminadas:
+                self.indice.eliminar_cancion(ruta)
+
+        fin = time.perf_counter()
+        segundos = fin - inicio
+        self.ultimo_escaneo = {
+            "carpeta": raiz,
+            "archivos": total,
+            "procesados": procesados,
+            "cargadas": canciones_cargadas,
+            "parseadas": len(rutas),
+            "desde_cache": total - len(rutas),
+            "eliminadas": 0 if fue_cancelado else len(eliminadas),
+            "errores": errores,
+            "cancelado": fue_cancelado,
+            "workers": workers,
+            "modo": modo if workers > 1 else "secuencial",
+            "segundos_listado": fin_listado - inicio,
+            "segundos": segundos,
+            "archivos_por_segundo": (procesados / segundos) if segundos > 0 else 0.0,
+        }
+        yield procesados, total, lote
 
         if verbose:
             print(f"Total de canciones cargadas: {canciones_cargadas}")
+            print(f"Escaneo: {procesados} archivos en {segundos:.2f} s "
+                  f"({self.ultimo_escaneo['archivos_por_segundo']:.1f} archivos/s, "
+                  f"{self.ultimo_escaneo['modo']}, workers={workers}, "
+                  f"parseados={len(rutas)}, desde cache={total - len(rutas)})")
+
+    def _guardar_en_cache(self, nuevas: List[Tuple[str, int, int, Song]]) -> None:
+        """Vuelca al cache persistente las canciones recién parseadas y vacía la lista."""
+        if self.cache is None or not nuevas:
+            nuevas.clear()
+            return
+        try:
+            self.cache.guardar(nuevas)
+        except Exception as e:
+            print(f"Error al actualizar el cache de la biblioteca: {e}")
+        nuevas.clear()
+
+    def cargar_desde_carpeta(self, folder_path: str, recursive: bool = True, verbose: bool = True,
+                             workers: int = 0, modo: str = "hilos", solo_cabeceras: bool = False,
+                             incluir: Optional[Iterable[str]] = None, excluir: Optional[Iterable[str]] = None,
+                             agregar: bool = False) -> int:
+        """
+        Carga todas las canciones de una carpeta específica.
+        :param folder_path: Ruta de la carpeta que contiene archivos de audio.
+        :param recursive: Si True, busca en subcarpetas recursivamente.
+        :param verbose: Si True, imprime progreso.
+        :param workers: Número de workers para extraer metadatos en paralelo (0 o 1 = secuencial).
+        :param modo: "hilos" (carpetas de red / disco lento, I/O) o "procesos" (parseo limitado por CPU).
+        :param solo_cabeceras: Si True las letras no se leen hasta acceder a `Song.timeline`.
+        :param incluir: Patrones glob que deben cumplir los archivos (ruta relativa o nombre).
+        :param excluir: Patrones glob de archivos o carpetas a omitir.
+        :param agregar: Si True la carpeta se añade como otra raíz sin descartar las ya cargadas.
+        :return: Número de canciones cargadas.
+        """
+        if modo not in MODOS_ESCANEO:
+            raise ValueError(f"Modo de escaneo no soportado: {modo} (use {', '.join(MODOS_ESCANEO)})")
+        if not Path(folder_path).is_dir():
+            print(f"Error: La carpeta '{folder_path}' no existe.")
+            return 0
+
+        if not agregar:
+            self.limpiar_biblioteca()
+        raiz = self.registrar_raiz(folder_path)
+        canciones_cargadas = 0
+        for _, _, lote in self.escanear_carpeta(folder_path, recursive=recursive, verbose=verbose,
+                                                 workers=workers, modo=modo, tam_lote=1000, intervalo_lote=float("inf"),
+                                                 solo_cabeceras=solo_cabeceras, incluir=incluir, excluir=excluir):
+            canciones_cargadas += len(self.agregar_canciones(lote, raiz=raiz))
         return canciones_cargadas
 
+    def agregar_raiz(self, folder_path: str, **kwargs) -> int:
+        """
+        Añade otra carpeta raíz a la biblioteca y carga sólo sus archivos; las canciones de las
+        demás raíces se conservan y las rutas repetidas (raíces solapadas) se cargan una vez.
+        Acepta los mismos parámetros que `cargar_desde_carpeta`.
+        :return: Número de canciones nuevas.
+        """
+        kwargs["agregar"] = True
+        return self.cargar_desde_carpeta(folder_path, **kwargs)
+
+    def indexar_pendientes(self, rutas: Optional[Iterable[str]] = None, workers: int = 0, modo: str = "hilos",
+                           cancelado: Optional[Callable[[], bool]] = None,
+                           progreso: Optional[Callable[[int, int], None]] = None) -> int:
+        """
+        Añade al índice de letras las canciones que aún no están indexadas (p. ej. tras un
+        escaneo sólo de cabeceras). Las letras se leen del archivo sin quedarse en memoria.
+        :param rutas: Rutas a revisar (por defecto todas las de la biblioteca).
+        :param progreso: Callable (hechas, total) llamado tras cada archivo.
+        :return: Número de canciones indexadas.
+        """
+        if self.indice is None:
+            return 0
+        pendientes = [ruta for ruta in (self.songs if rutas is None else rutas) if not self.indice.contiene(ruta)]
+        total = len(pendientes)
+        if not total:
+            return 0
+        workers = max(0, int(workers or 0))
+        indexadas = 0
+        hechas = 0
+        if workers <= 1:
+            resultados: Iterator = map(_leer_letras, pendientes)
+            executor = None
+        else:
+            executor = self._crear_executor(workers, modo)
+            resultados = executor.map(_leer_letras, pendientes)
+        try:
+            for file_path, letras, error, firma in resultados:
+                if cancelado is not None and cancelado():
+                    break
+                hechas += 1
+                _recordar_firma(file_path, firma)
+                if error is None:
+                    self.indice.indexar_cancion(file_path, letras if letras is not None else [])
+                    indexadas += 1
+                if progreso is not None:
+                    progreso(hechas, total)
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=True, cancel_futures=True)
+        return indexadas
+
+    def buscar_letras(self, consulta: str, limite: int = 100) -> List[Tuple[ResultadoBusqueda, Optional[Song]]]:
+        """
+        Busca en las letras de toda la biblioteca (términos, "frases" y prefijos con *).
+        :return: Lista de (resultado, song) con la línea encontrada y su timestamp en ms.
+        """
+        if self.indice is None:
+            return []
+        # El índice conserva las letras de raíces quitadas (para no releerlas): sólo se devuelven las cargadas
+        songs = self.songs
+        return [(r, songs.get(r.path)) for r in self.indice.buscar(consulta, limite, filtro=songs.__contains__)]
+
+    def registrar_guardado(self, song: Song, pendientes_cache: Optional[List[Tuple[str, int, int, Song]]] = None) -> None:
+        """
+        Actualiza la biblioteca, el índice de letras y el cache persistente tras escribir las
+        letras de `song` en su archivo, para que el próximo escaneo no tenga que volver a parsearlo.
+        :param pendientes_cache: Si se pasa, la entrada del cache se añade a esta lista en vez de
+                                 guardarse ya (para volcar un lote con _guardar_en_cache).
+        """
+        if not getattr(song, "file_path", None):
+            return
+        if song.file_path in self.songs:
+            # Necesario con el almacén columnar, que guarda copias de los campos
+            self.songs[song.file_path] = song
+        if self.indice is not None and song.lyrics_loaded:
+            self.indice.indexar_cancion(song.file_path, song.timeline)
+        if self.cache is None:
+            return
+        try:
+            st = os.stat(song.file_path)
+            if pendientes_cache is not None:
+                pendientes_cache.append((song.file_path, st.st_size, st.st_mtime_ns, song))
+                return
+            self.cache.guardar([(song.file_path, st.st_size, st.st_mtime_ns, song)])
+        except Exception as e:
+            print(f"Error al actualizar el cache de {song.file_path}: {e}")
+
+    def guardar_letras_lote(self, canciones: Iterable[Song], workers: int = 4, atomico: bool = True,
+                            forzar: bool = False, verbose: bool = True,
+                            cancelado: Optional[Callable[[], bool]] = None,
+                            progreso: Optional[Callable[[ResultadoGuardado, int, int], None]] = None) -> List[ResultadoGuardado]:
+        """
+        Escribe las letras de muchas canciones con un pool de `workers` hilos (la escritura es
+        sobre todo I/O). Como mucho hay 2 * workers archivos en curso a la vez.
+        Cada archivo se escribe como en el guardado normal: en el lugar si cabe en el padding y,
+        si hay que reescribirlo y atomico=True, sobre una copia temporal que reemplaza al original;
+        las letras sin cambios se omiten (salvo forzar=True).
+        Las canciones guardadas se registran en la biblioteca, el índice y el cache (registrar_guardado).
+        :param progreso: Callable (resultado, hechos, total) llamado tras cada archivo.
+        :return: Un ResultadoGuardado por canción con ruta, en el orden en que terminaron.
+        """
+        trabajos = [(song, song.file_path, song.timeline.copy()) for song in canciones if getattr(song, "file_path", None)]
+        total = len(trabajos)
+        workers = max(1, int(workers or 1))
+        resultados: List[ResultadoGuardado] = []
+        inicio = time.perf_counter()
+        pendientes = iter(trabajos)
+        en_curso: Dict[Future, Song] = {}
+        nuevas_cache: List[Tuple[str, int, int, Song]] = []
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="guardado")
+        try:
+            def enviar() -> bool:
+                trabajo = next(pendientes, None)
+                if trabajo is None or (cancelado is not None and cancelado()):
+                    return False
+                song, ruta, timeline = trabajo
+                en_curso[executor.submit(_guardar_letras, ruta, timeline, atomico, forzar)] = song
+                return True
+
+            while len(en_curso) < 2 * workers and enviar():
+                pass
+            while en_curso:
+                hechos, _ = wait(list(en_curso), return_when=FIRST_COMPLETED)
+                for futuro in hechos:
+                    song = en_curso.pop(futuro)
+                    resultado = futuro.result()
+                    resultados.append(resultado)
+                    if resultado.ok and not resultado.omitida:
+                        self.registrar_guardado(song, pendientes_cache=nuevas_cache)
+                        if len(nuevas_cache) >= 200:
+                            self._guardar_en_cache(nuevas_cache)
+                    if verbose and not resultado.ok:
+                        print(f"Error al guardar las letras de {resultado.path}: {resultado.error}")
+                    if progreso is not None:
+                        progreso(resultado, len(resultados), total)
+                    enviar()
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+            self._guardar_en_cache(nuevas_cache)
+
+        segundos = time.perf_counter() - inicio
+        bytes_totales = sum(r.bytes_escritos for r in resultados)
+        self.ultimo_guardado = {
+            "archivos": total,
+            "procesados": len(resultados),
+            "escritos": sum(1 for r in resultados if r.ok and not r.omitida),
+            "omitidos": sum(1 for r in resultados if r.omitida),
+            "en_sitio": sum(1 for r in resultados if r.ok and r.en_sitio and not r.omitida),
+            "errores": sum(1 for r in resultados if not r.ok),
+            "cancelado": len(resultados) < total,
+            "workers": workers,
+            "bytes_escritos": bytes_totales,
+            "segundos": segundos,
+            "archivos_por_segundo": (len(resultados) / segundos) if segundos > 0 else 0.0,
+            "mb_por_segundo": (bytes_totales / 1e6 / segundos) if segundos > 0 else 0.0,
+        }
+        if verbose:
+            g = self.ultimo_guardado
+            print(f"Guardado en lote: {g['procesados']}/{total} archivos en {segundos:.2f} s "
+                  f"({g['archivos_por_segundo']:.1f} archivos/s, {g['mb_por_segundo']:.1f} MB/s), "
+                  f"escritos={g['escritos']} (en el lugar={g['en_sitio']}), omitidos={g['omitidos']}, "
+                  f"errores={g['errores']}")
+        return resultados
+
     def listar_canciones(self) -> List[Song]:
         """
         Lista todas las canciones en la biblioteca.
@@ -73,11 +615,12 @@ class Biblioteca:
 
     def get_song(self, file_path: str) -> Optional[Song]:
         """
-        Recupera una canción por su ruta (acepta rutas no normalizadas).
+        Recupera una canción por su ruta (acepta rutas no normalizadas; las ya resueltas se recuerdan).
         """
         try:
-            key = str(Path(file_path).resolve())
+            key = CacheMetadatos.resolver_ruta(file_path)
         except Exception:
             key = file_path
-        return self.songs.get(key)
+        existente = self._clave_existente(key)
+        return self.songs.get(existente) if existente is not None else None
 
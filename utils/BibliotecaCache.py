@@ -0,0 +1,134 @@
+import json
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+
+class EntradaCache(NamedTuple):
+    """Fila almacenada para un archivo de audio."""
+    path: str
+    size: int
+    mtime_ns: int
+    title: str
+    artist: str
+    album: str
+    duration: Any  # milisegundos (int); filas antiguas pueden tener la cadena "MM:SS:mmm"
+    lyrics: Optional[List[Dict[str, Any]]]  # None = no leídas (escaneo sólo de cabeceras)
+
+
+class BibliotecaCache:
+    """Almacén persistente (SQLite) de los metadatos ya extraídos de la biblioteca.
+
+    Cada archivo se guarda con su tamaño y `mtime_ns`; si ambos coinciden en un
+    reescaneo, la canción se reconstruye desde aquí sin volver a leer las etiquetas.
+    """
+    VERSION = 1
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path or self.ruta_por_defecto()
+        carpeta = os.path.dirname(self.db_path)
+        if carpeta:
+            os.makedirs(carpeta, exist_ok=True)
+        # El escaneo puede ejecutarse fuera del hilo de la GUI: una conexión compartida protegida por lock
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._crear_esquema()
+
+    @staticmethod
+    def ruta_por_defecto() -> str:
+        """Devuelve la ruta por defecto de la base de datos (%LOCALAPPDATA%\\LyricsAPP en Windows)."""
+        base = os.environ.get("LOCALAPPDATA") or os.path.join(os.path.expanduser("~"), ".lyricsapp")
+        return os.path.join(base, "LyricsAPP", "biblioteca.db")
+
+    def _crear_esquema(self) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+            if version != self.VERSION:
+                self._conn.execute("DROP TABLE IF EXISTS songs")
+                self._conn.execute(f"PRAGMA user_version={self.VERSION}")
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS songs (
+                    path TEXT PRIMARY KEY,
+                    size INTEGER NOT NULL,
+                    mtime_ns INTEGER NOT NULL,
+                    title TEXT,
+                    artist TEXT,
+                    album TEXT,
+                    duration,
+                    lyrics TEXT
+                ) WITHOUT ROWID"""
+            )
+            # Carpetas raíz de la biblioteca, en el orden en que se agregaron
+            self._conn.execute("CREATE TABLE IF NOT EXISTS raices (orden INTEGER PRIMARY KEY, path TEXT UNIQUE NOT NULL)")
+
+    @staticmethod
+    def _rango_prefijo(carpeta: str) -> Tuple[str, str]:
+        """Rango [desde, hasta) de claves que cuelgan de `carpeta` (usa el índice de la clave primaria)."""
+        prefijo = carpeta.rstrip("\\/") + os.sep
+        return prefijo, prefijo[:-1] + chr(ord(os.sep) + 1)
+
+    def cargar_carpeta(self, carpeta: str) -> Dict[str, EntradaCache]:
+        """Devuelve todas las entradas guardadas bajo `carpeta`, indexadas por ruta."""
+        desde, hasta = self._rango_prefijo(carpeta)
+        with self._lock:
+            filas = self._conn.execute(
+                "SELECT path, size, mtime_ns, title, artist, album, duration, lyrics "
+                "FROM songs WHERE path >= ? AND path < ?",
+                (desde, hasta),
+            ).fetchall()
+        entradas: Dict[str, EntradaCache] = {}
+        for path, size, mtime_ns, title, artist, album, duration, lyrics in filas:
+            try:
+                letras = json.loads(lyrics) if lyrics is not None else None
+            except ValueError:
+                letras = None
+            entradas[path] = EntradaCache(path, size, mtime_ns, title, artist, album, duration, letras)
+        return entradas
+
+    def guardar(self, entradas: Iterable[Tuple[str, int, int, Any]]) -> None:
+        """Inserta o actualiza canciones. `entradas` son tuplas (path, size, mtime_ns, song).
+        Las letras no cargadas (carga diferida) se guardan como NULL sin forzar su lectura.
+        """
+        filas = [
+            (
+                path, int(size), int(mtime_ns),
+                getattr(song, "title", None), getattr(song, "artist", None), getattr(song, "album", None),
+                getattr(song, "duration_ms", None) if hasattr(song, "duration_ms") else getattr(song, "duration", None),
+                json.dumps(song.timeline.to_lyrics(), ensure_ascii=False) if getattr(song, "lyrics_loaded", True) else None,
+            )
+            for path, size, mtime_ns, song in entradas
+        ]
+        if not filas:
+            return
+        with self._lock, self._conn:
+            self._conn.executemany("INSERT OR REPLACE INTO songs VALUES (?, ?, ?, ?, ?, ?, ?, ?)", filas)
+
+    def eliminar(self, paths: Iterable[str]) -> None:
+        """Borra las entradas de archivos que ya no existen."""
+        filas = [(p,) for p in paths]
+        if not filas:
+            return
+        with self._lock, self._conn:
+            self._conn.executemany("DELETE FROM songs WHERE path = ?", filas)
+
+    def cargar_raices(self) -> List[str]:
+        """Devuelve las carpetas raíz guardadas con `guardar_raices`."""
+        with self._lock:
+            return [fila[0] for fila in self._conn.execute("SELECT path FROM raices ORDER BY orden")]
+
+    def guardar_raices(self, raices: Iterable[str]) -> None:
+        """Reemplaza la lista persistida de carpetas raíz."""
+        filas = list(enumerate(raices))
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM raices")
+            self._conn.executemany("INSERT INTO raices VALUES (?, ?)", filas)
+
+    def cerrar(self) -> None:
+        with self._lock:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
@@ -0,0 +1,94 @@
+import sys
+from array import array
+from typing import Any, Dict, Iterator, List, MutableMapping, Optional
+
+from metadata.LyricTimeline import LyricTimeline
+from player.Song import Song
+
+
+class BibliotecaColumnar(MutableMapping[str, Song]):
+    """Almacén columnar de canciones con la misma interfaz que el dict `Biblioteca.songs`.
+
+    En lugar de un objeto Song por canción guarda columnas paralelas (títulos, artistas y
+    álbumes internados, duraciones en un `array('i')` de ms) y construye la Song al pedirla.
+    Las Song devueltas son copias: para persistir un cambio hay que volver a asignarla
+    (`songs[ruta] = song`). Las letras se guardan como LyricTimeline (compartido con la Song
+    devuelta) y sólo si ya estaban cargadas; si no, la Song devuelta las leerá del archivo
+    en el primer acceso.
+    """
+
+    def __init__(self):
+        self._indice: Dict[str, int] = {}
+        self._rutas: List[Optional[str]] = []
+        self._titulos: List[Any] = []
+        self._artistas: List[Any] = []
+        self._albums: List[Any] = []
+        self._duraciones = array("i")
+        self._letras: List[Optional[LyricTimeline]] = []
+        self._borradas = 0
+
+    def __len__(self) -> int:
+        return len(self._indice)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._indice
+
+    def __iter__(self) -> Iterator[str]:
+        # Orden de inserción, como un dict
+        for ruta in self._rutas:
+            if ruta is not None:
+                yield ruta
+
+    def __getitem__(self, key: str) -> Song:
+        fila = self._indice[key]
+        letras = self._letras[fila]
+        return Song(title=self._titulos[fila], artist=self._artistas[fila], album=self._albums[fila],
+                    duration=self._duraciones[fila], lyrics=letras, file_path=key, lazy_lyrics=letras is None)
+
+    def __setitem__(self, key: str, song: Song) -> None:
+        artista = getattr(song, "artist", None)
+        album = getattr(song, "album", None)
+        valores = (
+            getattr(song, "title", None),
+            sys.intern(artista) if type(artista) is str else artista,
+            sys.intern(album) if type(album) is str else album,
+            int(getattr(song, "duration_ms", 0) or 0),
+            song.timeline if getattr(song, "lyrics_loaded", False) else None,
+        )
+        fila = self._indice.get(key)
+        if fila is None:
+            self._indice[key] = len(self._rutas)
+            self._rutas.append(key)
+            self._titulos.append(valores[0])
+            self._artistas.append(valores[1])
+            self._albums.append(valores[2])
+            self._duraciones.append(valores[3])
+            self._letras.append(valores[4])
+            return
+        self._titulos[fila], self._artistas[fila], self._albums[fila] = valores[0], valores[1], valores[2]
+        self._duraciones[fila] = valores[3]
+        self._letras[fila] = valores[4]
+
+    def __delitem__(self, key: str) -> None:
+        fila = self._indice.pop(key)
+        # Marcar la fila como borrada; se compacta cuando las filas muertas son mayoría
+        self._rutas[fila] = None
+        self._titulos[fila] = self._artistas[fila] = self._albums[fila] = None
+        self._letras[fila] = None
+        self._borradas += 1
+        if self._borradas > len(self._indice):
+            self._compactar()
+
+    def clear(self) -> None:
+        self.__init__()
+
+    def _compactar(self) -> None:
+        vivas = [fila for fila, ruta in enumerate(self._rutas) if ruta is not None]
+        self._rutas = [self._rutas[i] for i in vivas]
+        self._titulos = [self._titulos[i] for i in vivas]
+        self._artistas = [self._artistas[i] for i in vivas]
+        self._albums = [self._albums[i] for i in vivas]
+        self._duraciones = array("i", (self._duraciones[i] for i in vivas))
+        self._letras = [self._letras[i] for i in vivas]
+        self._indice = {ruta: i for i, ruta in enumerate(self._rutas)}  # type: ignore[misc]
+        self._borradas = 0
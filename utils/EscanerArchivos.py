@@ -0,0 +1,141 @@
+import fnmatch
+import os
+import stat
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+from metadata import SidecarLRC
+
+
+class ArchivoEncontrado(NamedTuple):
+    """Archivo de audio encontrado durante el recorrido."""
+    path: str
+    size: int
+    mtime_ns: int
+
+
+def _normalizar_patrones(patrones: Optional[Iterable[str]]) -> Tuple[str, ...]:
+    return tuple(p.replace("\\", "/").lower() for p in (patrones or ()) if p)
+
+
+def _coincide(rel: str, nombre: str, patrones: Sequence[str]) -> bool:
+    """Un patrón con "/" se compara con la ruta relativa (separadores "/"); sin "/", sólo con el nombre.
+    La comparación no distingue mayúsculas ("*.flac" también acepta "01.FLAC")."""
+    for patron in patrones:
+        objetivo = rel if "/" in patron else nombre
+        if fnmatch.fnmatchcase(objetivo.lower(), patron):
+            return True
+    return False
+
+
+def _es_enlace(entry: os.DirEntry) -> bool:
+    if entry.is_symlink():
+        return True
+    es_junction = getattr(entry, "is_junction", None)  # Python 3.12+ (Windows)
+    try:
+        return bool(es_junction()) if es_junction else False
+    except OSError:
+        return False
+
+
+def iterar_archivos(raiz: str, extensiones: Iterable[str], recursive: bool = True,
+                    incluir: Optional[Iterable[str]] = None, excluir: Optional[Iterable[str]] = None,
+                    seguir_enlaces: bool = True,
+                    adjuntos: Optional[Dict[str, str]] = None,
+                    cancelado: Optional[Callable[[], bool]] = None) -> Iterator[ArchivoEncontrado]:
+    """
+    Recorre `raiz` con os.scandir y devuelve los archivos cuya extensión está en `extensiones`.
+
+    - La extensión se filtra por nombre antes de cualquier stat; sólo los archivos candidatos
+      se consultan con `DirEntry.stat()` (que en Windows usa los datos ya leídos del listado).
+    - Los directorios se detectan con `DirEntry.is_dir()` (sin stat en la mayoría de sistemas).
+    - Los enlaces simbólicos/junctions a directorios se siguen una sola vez y se ignoran los que
+      apuntan a un ancestro (bucles) o a un directorio ya recorrido.
+    - `incluir`/`excluir`: patrones glob sobre la ruta relativa ("Podcasts/*") o el nombre ("*.tmp").
+      `excluir` también poda directorios completos.
+    - `adjuntos`: si se pasa un dict, se rellena con {ruta_audio: ruta_lrc} para los audios que tienen
+      un .lrc con el mismo nombre en su carpeta, usando sólo los nombres del listado (sin stats).
+      Las entradas de una carpeta se añaden después de devolver sus archivos.
+    - `cancelado`: callable consultado en cada carpeta y antes de cada stat; si devuelve True el
+      recorrido termina (también en carpetas sin audio, que no devuelven nada entre consultas).
+    Las rutas devueltas usan la ruta real de su carpeta (sin resolver cada archivo) y el orden es
+    determinista: primero los archivos de cada carpeta por nombre, luego sus subcarpetas.
+    """
+    extensiones = {e.lower() for e in extensiones}
+    incluir_p = _normalizar_patrones(incluir)
+    excluir_p = _normalizar_patrones(excluir)
+
+    raiz_real = os.path.realpath(raiz)
+    # Carpetas ya recorridas (ruta real): evita recorrer dos veces lo alcanzable por varios enlaces
+    visitadas: Set[str] = set()
+    # Pila de (ruta real de la carpeta, ruta relativa a la raíz con "/")
+    pila: List[Tuple[str, str]] = [(raiz_real, "")]
+    while pila:
+        if cancelado is not None and cancelado():
+            return
+        carpeta, rel_carpeta = pila.pop()
+        clave_carpeta = os.path.normcase(carpeta)
+        if clave_carpeta in visitadas:
+            continue
+        visitadas.add(clave_carpeta)
+        try:
+            with os.scandir(carpeta) as it:
+                entradas = sorted(it, key=lambda e: e.name)
+        except OSError:
+            continue
+
+        subcarpetas: List[Tuple[str, str]] = []
+        audios: Dict[str, str] = {}  # ruta en el listado -> ruta devuelta
+        lrcs: List[str] = []
+        for entry in entradas:
+            nombre = entry.name
+            rel = f"{rel_carpeta}/{nombre}" if rel_carpeta else nombre
+            try:
+                es_dir = entry.is_dir()
+            except OSError:
+                continue
+
+            if es_dir:
+                if not recursive or (excluir_p and _coincide(rel, nombre, excluir_p)):
+                    continue
+                destino = os.path.join(carpeta, nombre)
+                if _es_enlace(entry):
+                    if not seguir_enlaces:
+                        continue
+                    destino = os.path.realpath(destino)
+                    clave = os.path.normcase(destino)
+                    # Bucle: el enlace apunta a un ancestro (o a sí mismo) o a algo ya recorrido
+                    if clave in visitadas or clave_carpeta == clave or clave_carpeta.startswith(clave.rstrip(os.sep) + os.sep):
+                        continue
+                subcarpetas.append((destino, rel))
+                continue
+
+            ext = os.path.splitext(nombre)[1].lower()
+            if ext not in extensiones:
+                if adjuntos is not None and ext == SidecarLRC.EXTENSION:
+                    lrcs.append(os.path.join(carpeta, nombre))
+                continue
+            if excluir_p and _coincide(rel, nombre, excluir_p):
+                continue
+            if incluir_p and not _coincide(rel, nombre, incluir_p):
+                continue
+            if cancelado is not None and cancelado():
+                return
+            try:
+                st = entry.stat()
+            except OSError:
+                continue
+            if not stat.S_ISREG(st.st_mode):
+                continue
+            path = os.path.join(carpeta, nombre)
+            if entry.is_symlink():
+                path = os.path.realpath(path)
+            if adjuntos is not None:
+                audios[os.path.join(carpeta, nombre)] = path
+            yield ArchivoEncontrado(path, st.st_size, st.st_mtime_ns)
+
+        if lrcs and audios:
+            for audio, lrc in SidecarLRC.emparejar(audios, lrcs).items():
+                adjuntos[audios[audio]] = lrc  # type: ignore[index]
+
+        # Invertidas para que la pila las recorra en orden alfabético
+        pila.extend(reversed(subcarpetas))
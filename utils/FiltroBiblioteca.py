@@ -0,0 +1,123 @@
+import re
+from bisect import bisect_left
+from typing import Iterable, List, Optional
+
+from utils.LyricsSearchIndex import normalizar
+
+
+def clave_busqueda(song) -> str:
+    """Texto normalizado (sin mayúsculas ni acentos) con título, artista y álbum de la canción."""
+    partes = (getattr(song, "title", None), getattr(song, "artist", None), getattr(song, "album", None))
+    return normalizar(" ".join(str(p) for p in partes if p))
+
+
+class FiltroIncremental:
+    """Filtro de la lista de la biblioteca mientras se escribe.
+
+    Guarda una clave de búsqueda precalculada por fila. Si la consulta nueva extiende la
+    anterior (se ha tecleado un carácter más), sólo se revisan las filas que ya coincidían,
+    así que cada pulsación cuesta cada vez menos; al borrar se vuelve a recorrer todo.
+    Sin `difuso` cada palabra de la consulta debe aparecer en la clave; con `difuso` basta con
+    que los caracteres aparezcan en orden ("bhmrp" encuentra "Bohemian Rhapsody").
+    """
+
+    def __init__(self, difuso: bool = False):
+        self.difuso = difuso
+        self.claves: List[str] = []
+        self.consulta = ""
+        self._coincidencias: Optional[List[int]] = None  # None = sin filtro (todas las filas visibles)
+
+    def __len__(self) -> int:
+        return len(self.claves)
+
+    def limpiar(self) -> None:
+        self.claves.clear()
+        self.consulta = ""
+        self._coincidencias = None
+
+    def agregar(self, claves: Iterable[str]) -> List[int]:
+        """Añade filas al final; devuelve las filas nuevas que cumplen el filtro actual."""
+        inicio = len(self.claves)
+        self.claves.extend(claves)
+        nuevas = range(inicio, len(self.claves))
+        if self._coincidencias is None:
+            return list(nuevas)
+        visibles = self._filtrar(self.consulta, nuevas)
+        self._coincidencias.extend(visibles)
+        return visibles
+
+    def actualizar(self, fila: int, clave: str) -> bool:
+        """Cambia la clave de una fila y devuelve si debe estar visible."""
+        self.claves[fila] = clave
+        if self._coincidencias is None:
+            return True
+        visible = bool(self._filtrar(self.consulta, (fila,)))
+        # Las coincidencias están ordenadas por fila
+        i = bisect_left(self._coincidencias, fila)
+        presente = i < len(self._coincidencias) and self._coincidencias[i] == fila
+        if visible and not presente:
+            self._coincidencias.insert(i, fila)
+        elif presente and not visible:
+            del self._coincidencias[i]
+        return visible
+
+    def quitar(self, fila: int) -> None:
+        """Elimina una fila; las posteriores se desplazan una posición."""
+        del self.claves[fila]
+        if self._coincidencias is None:
+            return
+        i = bisect_left(self._coincidencias, fila)
+        if i < len(self._coincidencias) and self._coincidencias[i] == fila:
+            del self._coincidencias[i]
+        for j in range(i, len(self._coincidencias)):
+            self._coincidencias[j] -= 1
+
+    def quitar_filas(self, filas: Iterable[int]) -> None:
+        """Elimina varias filas de una vez (p. ej. al quitar una carpeta raíz)."""
+        quitar = set(filas)
+        if not quitar:
+            return
+        # Nueva posición de cada fila superviviente
+        nueva: List[int] = []
+        n = 0
+        for fila in range(len(self.claves)):
+            nueva.append(n)
+            if fila not in quitar:
+                n += 1
+        self.claves = [c for fila, c in enumerate(self.claves) if fila not in quitar]
+        if self._coincidencias is not None:
+            self._coincidencias = [nueva[fila] for fila in self._coincidencias if fila not in quitar]
+
+    def visibles(self) -> Optional[List[int]]:
+        """Filas que cumplen la consulta actual en orden, o None si no hay filtro."""
+        return self._coincidencias
+
+    def filtrar(self, consulta: str) -> Optional[List[int]]:
+        """Aplica `consulta` y devuelve las filas que coinciden (None si la consulta está vacía)."""
+        consulta = normalizar(consulta or "").strip()
+        if not consulta:
+            self.consulta = ""
+            self._coincidencias = None
+            return None
+        if self._coincidencias is not None and self.consulta and consulta.startswith(self.consulta):
+            # Refinamiento: lo que no coincidía antes tampoco coincide ahora
+            candidatas: Iterable[int] = self._coincidencias
+        else:
+            candidatas = range(len(self.claves))
+        self._coincidencias = self._filtrar(consulta, candidatas)
+        self.consulta = consulta
+        return self._coincidencias
+
+    def _filtrar(self, consulta: str, filas: Iterable[int]) -> List[int]:
+        claves = self.claves
+        if self.difuso:
+            caracteres = consulta.replace(" ", "")
+            # "k[^a]*a[^r]*r": sin cuantificadores perezosos el motor no retrocede
+            patron = re.escape(caracteres[0]) + "".join(f"[^{re.escape(c)}]*{re.escape(c)}" for c in caracteres[1:])
+            buscar = re.compile(patron).search
+            return [i for i in filas if buscar(claves[i])]
+        palabras = consulta.split()
+        if len(palabras) == 1:
+            palabra = palabras[0]
+            return [i for i in filas if palabra in claves[i]]
+        return [i for i in filas if all(p in claves[i] for p in palabras)]
@@ -0,0 +1,307 @@
+import os
+import pickle
+import re
+import threading
+import unicodedata
+from array import array
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+
+from metadata.LRCCodec import ts_a_ms
+from metadata.LyricTimeline import LyricTimeline
+
+# Mismos bloques CJK que ImportContoller (kanji, hiragana, katakana) más la extensión A de kanji.
+# Estos caracteres no se separan con espacios, así que cada uno se indexa como un token.
+_CJK = re.compile(r"[\u3400-\u4DBF\u4E00-\u9FFF\u3040-\u309F\u30A0-\u30FF]")
+_SEPARADORES = re.compile(r"[\W_]+")
+
+
+class ResultadoBusqueda(NamedTuple):
+    path: str
+    linea: int     # índice de la línea dentro de Song.timeline (fila de la tabla)
+    ts_ms: int     # inicio de la línea en milisegundos (-1 si no tenía timestamp válido)
+    texto: str
+
+
+def normalizar(texto: str) -> str:
+    """NFKC + casefold y sin acentos latinos (los diacríticos de kana, p. ej. が, se conservan)."""
+    if texto.isascii():
+        return texto.lower()
+    texto = unicodedata.normalize("NFKC", texto).casefold()
+    descompuesto = unicodedata.normalize("NFD", texto)
+    salida: List[str] = []
+    for ch in descompuesto:
+        if unicodedata.combining(ch) and salida and ord(salida[-1]) < 0x0250:
+            continue
+        salida.append(ch)
+    return unicodedata.normalize("NFC", "".join(salida))
+
+
+def tokenizar(texto: str) -> List[str]:
+    """Tokens normalizados: palabras para escrituras con espacios, un token por carácter CJK."""
+    texto = _CJK.sub(r" \g<0> ", normalizar(texto))
+    return [t for t in _SEPARADORES.split(texto) if t]
+
+
+class LyricsSearchIndex:
+    """Índice invertido de todas las líneas de letras de la biblioteca.
+
+    - Cada línea tiene un id; sus datos viven en arrays paralelos (canción, nº de línea, ms, texto).
+    - Las listas de apariciones (`array('i')` ordenados) se recorren por intersección con bisect,
+      empezando por el término menos frecuente, así que las consultas tardan milisegundos.
+    - Reindexar una canción marca sus líneas antiguas como borradas; se compacta cuando
+      las líneas borradas superan a las vivas.
+    Consultas: términos sueltos (AND), "frase exacta" entre comillas y prefijos con `*` (`corazo*`).
+    """
+    VERSION = 1
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._lock = threading.RLock()
+        self._reiniciar()
+
+    def _reiniciar(self) -> None:
+        self._rutas: List[str] = []
+        self._id_ruta: Dict[str, int] = {}
+        self._rango_ruta: Dict[int, Tuple[int, int]] = {}  # id de canción -> [primera línea, última línea)
+        self._linea_ruta = array("i")
+        self._linea_num = array("i")
+        self._linea_ms = array("i")
+        self._linea_texto: List[Optional[str]] = []
+        self._vivas = bytearray()
+        self._borradas = 0
+        self._postings: Dict[str, array] = {}
+        self._vocabulario: Optional[List[str]] = None  # ordenado, sólo para prefijos (se recalcula si cambia)
+        self.modificado = False
+
+    @staticmethod
+    def ruta_junto_a(db_path: str) -> str:
+        """Ruta del índice junto a la base de datos del cache de la biblioteca."""
+        return os.path.join(os.path.dirname(db_path), "letras.idx")
+
+    def __len__(self) -> int:
+        return len(self._rango_ruta)
+
+    def contiene(self, path: str) -> bool:
+        with self._lock:
+            pid = self._id_ruta.get(path)
+            return pid is not None and pid in self._rango_ruta
+
+    def indexar_cancion(self, path: str, lyrics: Union[LyricTimeline, Iterable[Dict[str, Any]]]) -> None:
+        """Indexa (o reindexa) las letras de una canción: LyricTimeline o lista de {"ts", "lyrc"}."""
+        with self._lock:
+            self._quitar(path)
+            pid = self._id_ruta.get(path)
+            if pid is None:
+                pid = len(self._rutas)
+                self._rutas.append(path)
+                self._id_ruta[path] = pid
+            inicio = len(self._linea_texto)
+            if isinstance(lyrics, LyricTimeline):
+                for num, (ms, texto) in enumerate(lyrics):
+                    self._agregar_linea(pid, num, ms, texto)
+                lyrics = ()
+            for num, entrada in enumerate(lyrics or []):
+                texto = str(entrada.get("lyrc", "") or "") if isinstance(entrada, dict) else str(entrada)
+                ms = ts_a_ms(entrada.get("ts")) if isinstance(entrada, dict) else None
+                self._agregar_linea(pid, num, -1 if ms is None else ms, texto)
+            self._rango_ruta[pid] = (inicio, len(self._linea_texto))
+            self.modificado = True
+            if self._borradas > len(self._linea_texto) - self._borradas:
+                self._compactar()
+
+    def eliminar_cancion(self, path: str) -> None:
+        with self._lock:
+            if self._quitar(path):
+                self.modificado = True
+            if self._borradas > len(self._linea_texto) - self._borradas:
+                self._compactar()
+
+    def _agregar_linea(self, pid: int, num: int, ms: int, texto: str) -> None:
+        lid = len(self._linea_texto)
+        self._linea_ruta.append(pid)
+        self._linea_num.append(num)
+        self._linea_ms.append(ms)
+        self._linea_texto.append(texto)
+        self._vivas.append(1)
+        for token in set(tokenizar(texto)):
+            posting = self._postings.get(token)
+            if posting is None:
+                self._postings[token] = array("i", (lid,))
+                self._vocabulario = None
+            else:
+                posting.append(lid)
+
+    def _quitar(self, path: str) -> bool:
+        pid = self._id_ruta.get(path)
+        if pid is None:
+            return False
+        rango = self._rango_ruta.pop(pid, None)
+        if rango is None:
+            return False
+        for lid in range(*rango):
+            self._vivas[lid] = 0
+            self._linea_texto[lid] = None
+        self._borradas += rango[1] - rango[0]
+        return True
+
+    def _compactar(self) -> None:
+        """Reconstruye el índice sólo con las líneas vivas."""
+        canciones: List[Tuple[str, List[Tuple[int, int, str]]]] = []
+        for pid, (ini, fin) in sorted(self._rango_ruta.items(), key=lambda kv: kv[1][0]):
+            canciones.append((self._rutas[pid], [(self._linea_num[l], self._linea_ms[l], self._linea_texto[l] or "")
+                                                 for l in range(ini, fin)]))
+        self._reiniciar()
+        for path, lineas in canciones:
+            pid = len(self._rutas)
+            self._rutas.append(path)
+            self._id_ruta[path] = pid
+            inicio = len(self._linea_texto)
+            for num, ms, texto in lineas:
+                self._agregar_linea(pid, num, ms, texto)
+            self._rango_ruta[pid] = (inicio, len(self._linea_texto))
+        self.modificado = True
+
+    @staticmethod
+    def _parsear_consulta(consulta: str) -> Tuple[List[str], List[str], List[List[str]]]:
+        """Separa la consulta en términos exactos, prefijos (`term*`) y frases ("...")."""
+        frases: List[List[str]] = []
+        for frase in re.findall(r'"([^"]+)"', consulta):
+            tokens = tokenizar(frase)
+            if tokens:
+                frases.append(tokens)
+        resto = re.sub(r'"[^"]*"?', " ", consulta)
+        terminos: List[str] = []
+        prefijos: List[str] = []
+        for palabra in resto.split():
+            es_prefijo = palabra.endswith("*")
+            tokens = tokenizar(palabra.rstrip("*"))
+            if not tokens:
+                continue
+            if es_prefijo:
+                terminos.extend(tokens[:-1])
+                prefijos.append(tokens[-1])
+            else:
+                terminos.extend(tokens)
+                if len(tokens) > 1:
+                    # Una "palabra" que se parte en varios tokens (texto CJK, "don't") se busca como frase
+                    frases.append(tokens)
+        for tokens in frases:
+            terminos.extend(tokens)
+        return terminos, prefijos, frases
+
+    def _posting_prefijo(self, prefijo: str) -> array:
+        if self._vocabulario is None:
+            self._vocabulario = sorted(self._postings)
+        vocab = self._vocabulario
+        ids: set = set()
+        i = bisect_left(vocab, prefijo)
+        while i < len(vocab) and vocab[i].startswith(prefijo):
+            ids.update(self._postings[vocab[i]])
+            i += 1
+        return array("i", sorted(ids))
+
+    @staticmethod
+    def _contiene_secuencia(tokens: List[str], frase: List[str]) -> bool:
+        n = len(frase)
+        for i in range(len(tokens) - n + 1):
+            if tokens[i:i + n] == frase:
+                return True
+        return False
+
+    def buscar(self, consulta: str, limite: int = 100,
+               filtro: Optional[Callable[[str], bool]] = None) -> List[ResultadoBusqueda]:
+        """Devuelve las líneas que cumplen todos los términos, prefijos y frases de la consulta.
+        `filtro(path)` permite descartar canciones (p. ej. las que no están cargadas)."""
+        terminos, prefijos, frases = self._parsear_consulta(consulta or "")
+        if not terminos and not prefijos:
+            return []
+        with self._lock:
+            listas: List[array] = []
+            for termino in set(terminos):
+                posting = self._postings.get(termino)
+                if posting is None:
+                    return []
+                listas.append(posting)
+            for prefijo in prefijos:
+                posting = self._posting_prefijo(prefijo)
+                if not posting:
+                    return []
+                listas.append(posting)
+            listas.sort(key=len)
+
+            resultados: List[ResultadoBusqueda] = []
+            for lid in listas[0]:
+                if not self._vivas[lid]:
+                    continue
+                if not all(self._en_posting(otra, lid) for otra in listas[1:]):
+                    continue
+                if filtro is not None and not filtro(self._rutas[self._linea_ruta[lid]]):
+                    continue
+                texto = self._linea_texto[lid] or ""
+                if frases:
+                    tokens = tokenizar(texto)
+                    if not all(self._contiene_secuencia(tokens, frase) for frase in frases):
+                        continue
+                resultados.append(ResultadoBusqueda(self._rutas[self._linea_ruta[lid]], self._linea_num[lid],
+                                                    self._linea_ms[lid], texto))
+                if len(resultados) >= limite:
+                    break
+            return resultados
+
+    @staticmethod
+    def _en_posting(posting: array, lid: int) -> bool:
+        i = bisect_left(posting, lid)
+        return i < len(posting) and posting[i] == lid
+
+    def guardar(self, path: Optional[str] = None) -> bool:
+        """Persiste el índice (escritura atómica: archivo temporal + os.replace)."""
+        destino = path or self.path
+        if not destino:
+            return False
+        with self._lock:
+            datos = {
+                "version": self.VERSION,
+                "rutas": self._rutas,
+                "rango_ruta": self._rango_ruta,
+                "linea_ruta": self._linea_ruta,
+                "linea_num": self._linea_num,
+                "linea_ms": self._linea_ms,
+                "linea_texto": self._linea_texto,
+                "vivas": self._vivas,
+                "borradas": self._borradas,
+                "postings": self._postings,
+            }
+            tmp = destino + ".tmp"
+            with open(tmp, "wb") as f:
+                pickle.dump(datos, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, destino)
+            self.modificado = False
+        return True
+
+    def cargar(self, path: Optional[str] = None) -> bool:
+        """Carga el índice persistido; si no existe o es de otra versión empieza vacío."""
+        origen = path or self.path
+        if not origen or not os.path.exists(origen):
+            return False
+        try:
+            with open(origen, "rb") as f:
+                datos = pickle.load(f)
+        except Exception as e:
+            print(f"No se pudo cargar el índice de letras {origen}: {e}")
+            return False
+        if not isinstance(datos, dict) or datos.get("version") != self.VERSION:
+            return False
+        with self._lock:
+            self._reiniciar()
+            self._rutas = datos["rutas"]
+            self._id_ruta = {p: i for i, p in enumerate(self._rutas)}
+            self._rango_ruta = datos["rango_ruta"]
+            self._linea_ruta = datos["linea_ruta"]
+            self._linea_num = datos["linea_num"]
+            self._linea_ms = datos["linea_ms"]
+            self._linea_texto = datos["linea_texto"]
+            self._vivas = datos["vivas"]
+            self._borradas = datos["borradas"]
+            self._postings = datos["postings"]
+        return True